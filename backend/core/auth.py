@@ -1,30 +1,151 @@
-"""JWT validation and Auth0 user id extraction."""
-import os
+"""JWT validation and Auth0 user id extraction.
+
+Signing keys come from the tenant's JWKS, fetched once and kept in a kid -> key map. An unknown kid
+triggers a refetch (at most once per JWKS_MIN_REFRESH_INTERVAL_S), and a background thread refreshes
+the set every JWKS_REFRESH_INTERVAL_S. Tokens that pass verification are cached by sha256 until their
+`exp`, so a token reused across page loads is only verified once per worker.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 
 import jwt
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import PyJWKClient
+from starlette.concurrency import run_in_threadpool
 
-from .config import AUTH0_AUDIENCE, AUTH0_DOMAIN
+from . import http, metrics
+from .config import (
+    AUTH0_AUDIENCE,
+    AUTH0_BASE_URL,
+    AUTH0_DOMAIN,
+    AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    AUTH_TOKEN_CACHE_MAX_TTL_S,
+    JWKS_MIN_REFRESH_INTERVAL_S,
+    JWKS_REFRESH_INTERVAL_S,
+)
 
 security = HTTPBearer(auto_error=False)
 
-# Cache JWKS client per domain
-_jwks_client: Optional[PyJWKClient] = None
+
+class _JWKS:
+    """Signing keys by kid, refreshed on unknown kids and periodically in the background."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: dict[str, object] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def refresh(self) -> None:
+        resp = http.get_client().get(self.url)
+        resp.raise_for_status()
+        keys = {}
+        for jwk in resp.json().get("keys", []):
+            if jwk.get("kid") and jwk.get("use", "sig") == "sig":
+                try:
+                    keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+                except jwt.PyJWKError:
+                    continue
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        metrics.incr("auth_jwks.refresh")
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(JWKS_REFRESH_INTERVAL_S)
+            try:
+                with self._lock:
+                    self.refresh()
+            except Exception as e:
+                metrics.incr("auth_jwks.refresh_error")
+                print(f"⚠️ JWKS refresh failed: {e}")
+
+    def get_key(self, kid: str):
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            key = self._keys.get(kid)
+            # Unknown kid (first use or key rotation): refetch, but not more often than the minimum interval
+            if key is None and (not self._fetched_at or time.monotonic() - self._fetched_at >= JWKS_MIN_REFRESH_INTERVAL_S):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    raise jwt.InvalidTokenError(f"Unable to fetch JWKS: {e}") from e
+                key = self._keys.get(kid)
+            if self._thread is None and JWKS_REFRESH_INTERVAL_S > 0:
+                self._thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+                self._thread.start()
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key id: {kid!r}")
+        return key
+
+
+class _VerifiedTokenCache:
+    """LRU of sha256(token) -> (expires_at, sub) for tokens whose signature already checked out."""
+
+    def __init__(self, max_entries: int = AUTH_TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def put(self, key: bytes, sub: str, exp: float | None) -> None:
+        expires_at = time.time() + AUTH_TOKEN_CACHE_MAX_TTL_S
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[key] = (expires_at, sub)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
 
 
-def _get_jwks_client() -> PyJWKClient:
-    global _jwks_client
-    if _jwks_client is None:
+_jwks: Optional[_JWKS] = None
+_token_cache = _VerifiedTokenCache()
+
+
+def _get_jwks() -> _JWKS:
+    global _jwks
+    if _jwks is None:
         if not AUTH0_DOMAIN:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Auth0 is not configured (AUTH0_DOMAIN)",
             )
-        _jwks_client = PyJWKClient(f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
-    return _jwks_client
+        _jwks = _JWKS(f"{AUTH0_BASE_URL}/.well-known/jwks.json")
+    return _jwks
+
+
+def _verify(token: str) -> dict:
+    """Check the RS256 signature and audience; return the claims."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not kid:
+        raise jwt.InvalidTokenError("Token header has no kid")
+    with metrics.timer("auth.verify"):
+        return jwt.decode(
+            token,
+            _get_jwks().get_key(kid),
+            algorithms=["RS256"],
+            audience=AUTH0_AUDIENCE,
+        )
 
 
 def get_sub_from_token(credentials: Optional[HTTPAuthorizationCredentials]) -> str:
@@ -44,13 +165,15 @@ def get_sub_from_token(credentials: Optional[HTTPAuthorizationCredentials]) -> s
                 algorithms=["RS256"],
             )
         else:
-            signing_key = _get_jwks_client().get_signing_key_from_jwt(token)
-            payload = jwt.decode(
-                token,
-                signing_key.key,
-                algorithms=["RS256"],
-                audience=AUTH0_AUDIENCE,
-            )
+            cache_key = hashlib.sha256(token.encode()).digest()
+            sub = _token_cache.get(cache_key)
+            if sub is not None:
+                metrics.incr("auth_token.hit")
+                return sub
+            metrics.incr("auth_token.miss")
+            payload = _verify(token)
+            if payload.get("sub"):
+                _token_cache.put(cache_key, payload["sub"], payload.get("exp"))
         sub = payload.get("sub")
         if not sub:
             raise HTTPException(
@@ -63,3 +186,9 @@ def get_sub_from_token(credentials: Optional[HTTPAuthorizationCredentials]) -> s
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         ) from e
+
+
+async def get_sub_from_token_async(credentials: Optional[HTTPAuthorizationCredentials]) -> str:
+    """get_sub_from_token for async handlers: runs in the threadpool, since verifying a token may
+    fetch the JWKS (blocking HTTP) on a key miss."""
+    return await run_in_threadpool(get_sub_from_token, credentials)
@@ -0,0 +1,177 @@
+"""Bounded process pool for CPU-heavy request work (scoring, 2D layout), off the event loop and the GIL.
+
+Worker processes memory-map the embedding matrix (and 2D layout) once in their initializer, so they
+share the page cache with the main process instead of receiving the matrix per call. Submissions
+beyond COMPUTE_POOL_WORKERS + COMPUTE_POOL_MAX_QUEUE are rejected with 503, and each call is bounded
+by COMPUTE_POOL_TIMEOUT_S. A task that times out while running cannot be stopped, so it keeps its
+slot until it actually finishes; a pool broken by a dead worker (e.g. OOM-killed) is replaced. Queue wait and compute time are recorded per task name in core.metrics
+(`compute_pool.<name>.queue_wait` / `.compute`). With COMPUTE_POOL_WORKERS=0 work runs in the
+threadpool instead.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics
+from .config import (
+    COMPUTE_POOL_MAX_QUEUE,
+    COMPUTE_POOL_START_METHOD,
+    COMPUTE_POOL_TIMEOUT_S,
+    COMPUTE_POOL_WORKERS,
+)
+
+
+def _init_worker() -> None:
+    """Map the shared read-only data once per worker process."""
+    from ..services import embedding_store, layout_store, quantized_store
+
+    if embedding_store.exists():
+        embedding_store.get_embeddings()
+        quantized_store.get_store()
+        layout_store.get_layout()
+
+
+def _timed_call(fn: Callable, args: tuple, submitted_at: float) -> tuple[object, float, float]:
+    """Run in the worker: return (result, seconds queued, seconds computing)."""
+    started = time.time()
+    result = fn(*args)
+    return result, started - submitted_at, time.time() - started
+
+
+class ComputePool:
+    def __init__(
+        self,
+        max_workers: int = COMPUTE_POOL_WORKERS,
+        max_queue: int = COMPUTE_POOL_MAX_QUEUE,
+        timeout_s: float = COMPUTE_POOL_TIMEOUT_S,
+        start_method: str = COMPUTE_POOL_START_METHOD,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.timeout_s = timeout_s
+        self.start_method = start_method
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = self._new_executor() if max_workers > 0 else None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        """Swap in a fresh executor after a worker died (once, however many requests saw it break)."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+        metrics.incr("compute_pool.restart")
+        print("⚠️ Compute pool worker died; started a new pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self, name: str) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.incr(f"compute_pool.{name}.rejected")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _done(self, future) -> None:
+        """Free the slot when the work itself ends (not when the caller stops waiting)."""
+        self._release()
+        if not future.cancelled():
+            future.exception()  # retrieved, so an abandoned task's error is not logged as unhandled
+
+    async def run(self, name: str, fn: Callable, *args):
+        """Run module-level `fn(*args)` in a worker process; 503 when saturated, timed out or crashed."""
+        self._acquire(name)
+        executor = self._executor
+        try:
+            if executor is None:
+                future = asyncio.ensure_future(run_in_threadpool(_timed_call, fn, args, time.time()))
+                waiter = future
+            else:
+                future = executor.submit(_timed_call, fn, args, time.time())
+                waiter = asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._release()
+            self._replace_broken(executor)
+            raise self._crashed(name)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._done)
+        try:
+            # shield: on timeout stop waiting, but leave the future to _done
+            result, queued_s, compute_s = await asyncio.wait_for(asyncio.shield(waiter), self.timeout_s)
+        except asyncio.TimeoutError:
+            # Drops a process task that has not started yet; running work finishes in the background
+            if isinstance(future, Future):
+                future.cancel()
+            metrics.incr(f"compute_pool.{name}.timeout")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Request timed out",
+            )
+        except BrokenProcessPool:
+            self._replace_broken(executor)
+            raise self._crashed(name)
+        metrics.observe(f"compute_pool.{name}.queue_wait", queued_s)
+        metrics.observe(f"compute_pool.{name}.compute", compute_s)
+        return result
+
+    @staticmethod
+    def _crashed(name: str) -> HTTPException:
+        metrics.incr(f"compute_pool.{name}.crashed")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Compute worker crashed, try again",
+            headers={"Retry-After": "1"},
+        )
+
+    def warm(self) -> None:
+        """Start every worker process now (and run its initializer) instead of on the first requests."""
+        if self._executor is not None:
+            futures = [self._executor.submit(time.sleep, 0.05) for _ in range(self.max_workers)]
+            for future in futures:
+                future.result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool: ComputePool | None = None
+
+
+def get_pool() -> ComputePool:
+    """Process-wide compute pool (started on first use)."""
+    global _pool
+    if _pool is None:
+        _pool = ComputePool()
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
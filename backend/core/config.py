@@ -7,17 +7,124 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 # MAG id (OpenAlex URL) -> title; lives at backend/mag_id_to_title.json
 MAG_ID_TO_TITLE_PATH = BASE_DIR / "mag_id_to_title.json"
+# Same titles in node order: concatenated UTF-8 blob + int64 offsets (built by scripts/build_title_store.py)
+TITLE_BLOB_PATH = DATA_DIR / "titles.blob.uint8.npy"
+TITLE_OFFSETS_PATH = DATA_DIR / "titles.offsets.int64.npy"
 # MAG id -> node index; 1D array in same order as sorted MAG_ID_TO_TITLE_PATH keys
 MAG_TO_NODE_IDX_PATH = BASE_DIR / "mag_to_node_idx.npy"
 # Node index -> paper id (from same mapping as mag_to_node_idx); for for-you recommendations
 NODE_TO_MAG_ID_PATH = BASE_DIR / "node_to_mag_id.npy"
+# Dense, memory-mappable versions of the two mappings above (built by scripts/build_node_index.py)
+# node idx -> numeric MAG id, int64 of shape (num_nodes,), -1 where unknown
+NODE_TO_MAG_ARRAY_PATH = DATA_DIR / "node_to_mag.int64.npy"
+# Sorted numeric MAG ids and the node idx for each (searched with np.searchsorted)
+MAG_SORTED_KEYS_PATH = DATA_DIR / "mag_sorted_keys.int64.npy"
+MAG_SORTED_NODES_PATH = DATA_DIR / "mag_sorted_nodes.int64.npy"
 # L2-normalized paper embeddings, shape (num_nodes, 256); row i = node i
 PAPER_EMBEDDINGS_PATH = BASE_DIR / "paper_embeddings_256d.npy"
+# Written next to the embeddings by ml_pipeline/src/layerwise_inference.py: {"version": ..., ...}
+PAPER_EMBEDDINGS_MANIFEST_PATH = BASE_DIR / "paper_embeddings_256d.manifest.json"
+# Same matrix pre-normalized to float32 once at build time; memory-mapped by every worker
+NORMALIZED_EMBEDDINGS_PATH = DATA_DIR / "paper_embeddings_256d.normalized.f32.npy"
+# Compact copies for coarse scoring (built by scripts/build_quantized_store.py): int8 + per-row scale, or float16
+QUANTIZED_EMBEDDINGS_INT8_PATH = DATA_DIR / "paper_embeddings_256d.int8.npy"
+QUANTIZED_SCALES_PATH = DATA_DIR / "paper_embeddings_256d.int8_scales.f32.npy"
+QUANTIZED_EMBEDDINGS_F16_PATH = DATA_DIR / "paper_embeddings_256d.f16.npy"
+# "none" (default, exact float32 scoring), "int8" or "float16": compact store for lossy coarse scoring (when built)
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none").lower()
+# Candidates rescored in float32 per requested result
+EMBEDDING_RESCORE_FACTOR = int(os.getenv("EMBEDDING_RESCORE_FACTOR", "4"))
+# Delta segments of re-embedded / new papers merged over the base matrix at runtime
+# (written by scripts/refresh_embeddings.py); the directory, node index and title store are
+# re-checked at most every N seconds
+EMBEDDING_DELTA_DIR = DATA_DIR / "embedding_deltas"
+EMBEDDING_DELTA_POLL_S = float(os.getenv("EMBEDDING_DELTA_POLL_S", "5"))
 UPLOAD_DIR = BASE_DIR / "uploads"
 
+# Versioned, memory-mapped graph bundle (built by ml_pipeline/src/graph_bundle.py): node features
+# (N, 384), citation graph as CSR / CSC, splits and MAG ids; used by the inductive GNN for new papers
+GRAPH_BUNDLE_DIR = BASE_DIR.parent / "ml_pipeline" / "data" / "graph_bundle"
+GNN_MODEL_PATH = BASE_DIR.parent / "ml_pipeline" / "models" / "gnn_contrastive_v2.pth"
+# Neighbours sampled per hop (hop 1 = the citation list)
+GNN_NUM_NEIGHBORS = [int(n) for n in os.getenv("GNN_NUM_NEIGHBORS", "10,10,5").split(",")]
+# New papers embedded per forward pass when ingesting in bulk
+GNN_BATCH_SIZE = int(os.getenv("GNN_BATCH_SIZE", "64"))
+
+# Precomputed 2D map of all papers, float32 (num_nodes, 2) (built by scripts/build_layout.py)
+LAYOUT_PATH = DATA_DIR / "paper_layout_2d.f32.npy"
+# Nearest papers interpolated to place a virtual point (e.g. the user vector) on the map
+LAYOUT_PROJECTION_K = int(os.getenv("LAYOUT_PROJECTION_K", "10"))
+
+# ANN vector index over the normalized embeddings (built by scripts/build_vector_index.py)
+VECTOR_INDEX_PATH = DATA_DIR / "paper_embeddings.faiss"
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX_ENABLED", "1") != "0"
+# Recall/latency knobs: IVF lists probed per query, HNSW candidate list size
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "32"))
+VECTOR_INDEX_EF_SEARCH = int(os.getenv("VECTOR_INDEX_EF_SEARCH", "128"))
+# Extra candidates fetched from the index per request to survive servable/history filtering
+VECTOR_INDEX_OVERFETCH = int(os.getenv("VECTOR_INDEX_OVERFETCH", "4"))
+
+# Per-worker cache of computed /for-you (similar part) and /tsne-coordinates responses
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "4096"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Worker processes for CPU-heavy request work (0 = use the threadpool), extra queued tasks before 503, timeout
+COMPUTE_POOL_WORKERS = int(os.getenv("COMPUTE_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+COMPUTE_POOL_MAX_QUEUE = int(os.getenv("COMPUTE_POOL_MAX_QUEUE", "32"))
+COMPUTE_POOL_TIMEOUT_S = float(os.getenv("COMPUTE_POOL_TIMEOUT_S", "30"))
+# "spawn" avoids forking the server's threads and locks; "forkserver" starts faster on Linux
+COMPUTE_POOL_START_METHOD = os.getenv("COMPUTE_POOL_START_METHOD", "spawn")
+
+# Micro-batching of /for-you scoring: wait up to this long for concurrent requests, max requests per GEMM
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "3"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "32"))
+
+# OpenAlex API (override OPENALEX_API_URL to point at a local stub server)
+OPENALEX_API_URL = os.getenv("OPENALEX_API_URL", "https://api.openalex.org").rstrip("/")
+OPENALEX_TIMEOUT_S = float(os.getenv("OPENALEX_TIMEOUT_S", "15"))
+# Max MAG ids accepted by POST /api/papers/paper-info:batch
+PAPER_INFO_BATCH_MAX = int(os.getenv("PAPER_INFO_BATCH_MAX", "300"))
+# Max in-flight OpenAlex requests per worker
+OPENALEX_MAX_CONCURRENCY = int(os.getenv("OPENALEX_MAX_CONCURRENCY", "32"))
+# Tiered OpenAlex metadata cache: in-process LRU + SQLite file shared by workers on the host
+METADATA_CACHE_PATH = DATA_DIR / "openalex_cache.sqlite3"
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "10000"))
+METADATA_CACHE_TTL_S = float(os.getenv("METADATA_CACHE_TTL_S", str(7 * 24 * 3600)))
+METADATA_CACHE_NEGATIVE_TTL_S = float(os.getenv("METADATA_CACHE_NEGATIVE_TTL_S", "3600"))
+
+# Shared outbound HTTP connection pool (per worker)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "10"))
+
 # Auth0 (optional): for JWT validation and Management API user_metadata)
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN", "").rstrip("/")
 AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE", "")  # API identifier for JWT validation
 AUTH0_M2M_CLIENT_ID = os.getenv("AUTH0_M2M_CLIENT_ID", "")
 AUTH0_M2M_CLIENT_SECRET = os.getenv("AUTH0_M2M_CLIENT_SECRET", "")
 AUTH0_MANAGEMENT_AUDIENCE = f"https://{AUTH0_DOMAIN}/api/v2/" if AUTH0_DOMAIN else ""
+# Base URL for Auth0 HTTP calls (override to point at a local fake Auth0 server)
+AUTH0_BASE_URL = os.getenv("AUTH0_BASE_URL", f"https://{AUTH0_DOMAIN}").rstrip("/")
+# JWKS (JWT signing keys): background refresh interval; minimum gap between refetches on an unknown kid
+JWKS_REFRESH_INTERVAL_S = float(os.getenv("JWKS_REFRESH_INTERVAL_S", "3600"))
+JWKS_MIN_REFRESH_INTERVAL_S = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL_S", "30"))
+# Verified-token cache per worker: entries, and max lifetime of an entry even if the token's exp is later
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+AUTH_TOKEN_CACHE_MAX_TTL_S = float(os.getenv("AUTH_TOKEN_CACHE_MAX_TTL_S", "3600"))
+# Refresh the cached M2M token this many seconds before it expires
+AUTH0_TOKEN_REFRESH_MARGIN_S = float(os.getenv("AUTH0_TOKEN_REFRESH_MARGIN_S", "60"))
+# How long a user's node_history is served from the per-worker cache before re-reading Auth0
+AUTH0_HISTORY_CACHE_TTL_S = float(os.getenv("AUTH0_HISTORY_CACHE_TTL_S", "30"))
+# Node ids kept per user in the click history (newest last)
+NODE_HISTORY_MAX_SIZE = int(os.getenv("NODE_HISTORY_MAX_SIZE", "5"))
+
+# Local click-history store (hot path): "sqlite" (default, shared by workers on the host), "redis" or "memory"
+HISTORY_STORE = os.getenv("HISTORY_STORE", "sqlite").lower()
+HISTORY_DB_PATH = DATA_DIR / "history.sqlite3"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Write-behind of local histories to Auth0 user_metadata: flush interval and users per flush
+AUTH0_SYNC_ENABLED = os.getenv("AUTH0_SYNC_ENABLED", "1") != "0"
+AUTH0_SYNC_INTERVAL_S = float(os.getenv("AUTH0_SYNC_INTERVAL_S", "2"))
+AUTH0_SYNC_BATCH = int(os.getenv("AUTH0_SYNC_BATCH", "50"))
+# Seconds shutdown spends on the final Auth0 sync (one attempt per user; the rest stays local only)
+AUTH0_SYNC_SHUTDOWN_TIMEOUT_S = float(os.getenv("AUTH0_SYNC_SHUTDOWN_TIMEOUT_S", "10"))
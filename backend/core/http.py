@@ -0,0 +1,38 @@
+"""Shared, pooled HTTP clients (one set per worker) for outbound calls to OpenAlex and Auth0."""
+import httpx
+
+from .config import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_TIMEOUT_S
+
+_client: httpx.Client | None = None
+_async_client: httpx.AsyncClient | None = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+
+
+def get_client() -> httpx.Client:
+    """Pooled sync client for code that still runs in the threadpool."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(limits=_limits(), timeout=HTTP_TIMEOUT_S)
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled async client; must be used from the worker's event loop."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(limits=_limits(), timeout=HTTP_TIMEOUT_S)
+    return _async_client
+
+
+async def aclose() -> None:
+    """Close both clients (app shutdown)."""
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
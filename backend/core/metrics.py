@@ -0,0 +1,66 @@
+"""In-process counters and timers (per worker), exposed at GET /api/metrics."""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Recent samples kept per timer for percentiles
+TIMER_WINDOW = 2048
+
+_lock = threading.Lock()
+_counters: dict[str, int] = defaultdict(int)
+_timers: dict[str, dict] = {}
+
+
+def incr(name: str, value: int = 1) -> None:
+    """Add `value` to counter `name`."""
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record one duration sample for timer `name`."""
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            t = _timers[name] = {"count": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=TIMER_WINDOW)}
+        t["count"] += 1
+        t["total"] += seconds
+        t["max"] = max(t["max"], seconds)
+        t["recent"].append(seconds)
+
+
+@contextmanager
+def timer(name: str):
+    """Time the enclosed block into timer `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def hit_rate(prefix: str) -> float | None:
+    """hits / (hits + misses) for counters `<prefix>.hit` and `<prefix>.miss`."""
+    with _lock:
+        hits, misses = _counters.get(f"{prefix}.hit", 0), _counters.get(f"{prefix}.miss", 0)
+    return hits / (hits + misses) if hits + misses else None
+
+
+def snapshot() -> dict:
+    """Counters and timer summaries (ms) for this worker process."""
+    with _lock:
+        counters = dict(_counters)
+        timers = {}
+        for name, t in _timers.items():
+            recent = np.fromiter(t["recent"], dtype=np.float64) * 1000.0
+            timers[name] = {
+                "count": t["count"],
+                "mean_ms": t["total"] * 1000.0 / t["count"],
+                "max_ms": t["max"] * 1000.0,
+                "p50_ms": float(np.percentile(recent, 50)),
+                "p99_ms": float(np.percentile(recent, 99)),
+            }
+    return {"counters": counters, "timers": timers}
@@ -0,0 +1,77 @@
+"""Micro-batching: collect concurrent calls for a short window and run them as one batch.
+
+Items submitted within `window_s` of the first pending item (or until `max_size` items are pending)
+are passed together to `run_batch`, which returns one result per item in order. Exceptions from
+`run_batch` propagate to every caller in the batch. In-flight batch tasks are referenced until they
+finish (the event loop only keeps weak references); `aclose` drains them on shutdown. Counters `<name>.batches` / `<name>.items` and
+timer `<name>.wait` (submit to batch start) go to core.metrics.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from . import metrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[list[T]], Awaitable[list[R]]],
+        window_s: float,
+        max_size: int,
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.window_s = window_s
+        self.max_size = max(1, max_size)
+        self._pending: list[tuple[T, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_size or self.window_s <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self) -> None:
+        """Run anything still pending now and wait for every in-flight batch (app shutdown)."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        metrics.incr(f"{self.name}.batches")
+        metrics.incr(f"{self.name}.items", len(batch))
+        for _, _, submitted in batch:
+            metrics.observe(f"{self.name}.wait", started - submitted)
+        try:
+            results = await self.run_batch([item for item, _, _ in batch])
+        except BaseException as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,26 @@
+"""Single-flight request coalescing: concurrent callers for the same key share one in-flight call."""
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from . import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, or the call already running for `key`. Exceptions propagate to every caller."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, key=key: self._inflight.pop(key, None))
+            metrics.incr(f"{self.name}.leader")
+        else:
+            metrics.incr(f"{self.name}.coalesced")
+        # shield: a cancelled caller must not cancel the call other callers are waiting on
+        return await asyncio.shield(task)
@@ -2,25 +2,43 @@ from dotenv import load_dotenv
 load_dotenv()
 import os
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import papers, upload, user
-import numpy as np
-from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from .core import compute_pool, http
+from .routers import metrics, papers, upload, user
+from .services import embedding_delta, embedding_store, history_store, layout_store, recommender, vector_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn compute workers before serving so the first heavy requests don't pay for process startup
+    await run_in_threadpool(compute_pool.get_pool().warm)
+    yield
+    # Push pending click histories to Auth0 before the pools close
+    await run_in_threadpool(history_store.shutdown)
+    # Let queued /for-you batches finish while the compute pool is still up
+    await papers.shutdown()
+    compute_pool.shutdown()
+    # Close the shared outbound connection pools
+    await http.aclose()
+
 
 app = FastAPI(
     title="Ariadne API",
     description="Backend for paper discovery and uploads",
+    lifespan=lifespan,
 )
 
-# Load precomputed embeddings (no torch needed!)
-embeddings_path = Path(__file__).parent / "paper_embeddings_256d.npy"
-if embeddings_path.exists():
-    embeddings = np.load(embeddings_path).astype('float32')
-    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
-    print(f"✅ Loaded {embeddings.shape[0]} paper embeddings")
+# Precomputed embeddings (no torch needed!); one memory-mapped copy shared with the papers router
+if embedding_store.exists():
+    print(f"✅ Loaded {embedding_store.get_embeddings().shape[0]} paper embeddings (version {embedding_store.version() or 'unknown'})")
+    # Memory-map the ANN index now (if built) rather than on the first request
+    vector_index.get_index()
+    layout_store.get_layout()
 else:
-    embeddings = None
     print("⚠️ Embeddings not found, /get_new_node_embedding will fail")
 
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -47,6 +65,7 @@ app.add_middleware(
 app.include_router(upload.router)
 app.include_router(papers.router)
 app.include_router(user.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
@@ -63,6 +82,5 @@ class CitationListRequest(BaseModel):
 def get_new_node_embedding(request: CitationListRequest):
     """Get embedding for a virtual user node based on clicked papers."""
     # Average the clicked papers' embeddings
-    user_embedding = embeddings[request.ids].mean(axis=0)
-    user_embedding = user_embedding / np.linalg.norm(user_embedding)
+    user_embedding = recommender.user_vector(embedding_delta.merged(embedding_store.get_embeddings()), request.ids)
     return {"embedding": user_embedding.tolist()}
\ No newline at end of file
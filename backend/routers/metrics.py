@@ -0,0 +1,12 @@
+"""Operational metrics endpoint (cache hit rates, timings) for this worker."""
+from fastapi import APIRouter
+
+from ..core import metrics
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+
+@router.get("/metrics")
+def get_metrics():
+    """Return this worker's counters and timer summaries."""
+    return metrics.snapshot()
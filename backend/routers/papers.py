@@ -1,116 +1,251 @@
-"""Paper-related endpoints: arXiv PDF URL by MAG id, For You feed."""
+"""Paper-related endpoints: arXiv PDF URL by MAG id, For You feed, new-paper embeddings."""
 import numpy as np
 from sklearn.manifold import TSNE
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from ..core.auth import get_sub_from_token, security
+from ..core import compute_pool
+from ..core.microbatch import MicroBatcher
+from ..core.auth import get_sub_from_token_async, security
 from ..core.config import (
-    MAG_TO_NODE_IDX_PATH,
-    NODE_TO_MAG_ID_PATH,
+    EMBEDDING_DELTA_DIR,
+    EMBEDDING_RESCORE_FACTOR,
+    LAYOUT_PATH,
+    LAYOUT_PROJECTION_K,
+    MICROBATCH_MAX_SIZE,
+    MICROBATCH_WINDOW_MS,
+    NORMALIZED_EMBEDDINGS_PATH,
+    PAPER_EMBEDDINGS_MANIFEST_PATH,
     PAPER_EMBEDDINGS_PATH,
+    PAPER_INFO_BATCH_MAX,
+    QUANTIZED_EMBEDDINGS_F16_PATH,
+    QUANTIZED_EMBEDDINGS_INT8_PATH,
+    QUANTIZED_SCALES_PATH,
+    VECTOR_INDEX_OVERFETCH,
+    VECTOR_INDEX_PATH,
+)
+from ..services import (
+    embedding_delta,
+    embedding_store,
+    gnn_service,
+    history_store,
+    layout_store,
+    node_index,
+    paper_service,
+    quantized_store,
+    recommender,
+    response_cache,
+    title_store,
+    vector_index,
 )
-from ..services import auth0_storage, paper_service
 
 router = APIRouter(prefix="/api/papers", tags=["papers"])
 
-# In-memory click history: node ids (for terminal logging only; Auth0 is source of truth)
+# In-memory click history: node ids (for terminal logging only; history_store is the source of truth)
 _click_history: list[int] = []
 
-# mag_to_node dict (paper id -> node idx), loaded from mag_to_node_idx.npy
-_mag_to_node: dict | None = None
-# node_to_mag dict (node idx -> paper id), loaded from node_to_mag_id.npy
-_node_to_mag: dict | None = None
-# L2-normalized embeddings, shape (num_nodes, 256)
-_embeddings: np.ndarray | None = None
+# Micro-batcher for /for-you scoring; created on first use
+_recommend_batcher: MicroBatcher | None = None
 
+# Boolean mask, shape (num_nodes,): node has a MAG id and a title (can be shown to users)
+_servable: np.ndarray | None = None
+# (num_nodes, node index generation, title store generation) the mask was built for
+_servable_key: tuple | None = None
 
-def _load_mag_to_node() -> dict:
-    """Load mag_to_node dict from mag_to_node_idx.npy (saved as np.save(dict))."""
-    global _mag_to_node
-    if _mag_to_node is None:
-        if not MAG_TO_NODE_IDX_PATH.exists():
-            raise FileNotFoundError(f"Mapping not found: {MAG_TO_NODE_IDX_PATH}")
-        arr = np.load(MAG_TO_NODE_IDX_PATH, allow_pickle=True)
-        _mag_to_node = arr.item()
-    return _mag_to_node
 
+def _load_embeddings() -> np.ndarray:
+    """L2-normalized paper embeddings (shared memory-mapped store) with any delta segments applied."""
+    return embedding_delta.merged(embedding_store.get_embeddings())
 
-def _load_node_to_mag() -> dict:
-    """Load node_to_mag dict from node_to_mag_id.npy (saved as np.save(dict))."""
-    global _node_to_mag
-    if _node_to_mag is None:
-        if not NODE_TO_MAG_ID_PATH.exists():
-            raise FileNotFoundError(f"Mapping not found: {NODE_TO_MAG_ID_PATH}")
-        arr = np.load(NODE_TO_MAG_ID_PATH, allow_pickle=True)
-        _node_to_mag = arr.item()
-    return _node_to_mag
 
+def _load_mean_vector() -> np.ndarray:
+    """Normalized mean embedding (computed once)."""
+    return embedding_store.get_mean_vector()
 
-def _load_embeddings() -> np.ndarray:
-    """Load and L2-normalize paper embeddings."""
-    global _embeddings
-    if _embeddings is None:
-        if not PAPER_EMBEDDINGS_PATH.exists():
-            raise FileNotFoundError(f"Embeddings not found: {PAPER_EMBEDDINGS_PATH}")
-        emb = np.load(PAPER_EMBEDDINGS_PATH).astype(np.float32)
-        _embeddings = emb / np.linalg.norm(emb, axis=1, keepdims=True)
-    return _embeddings
+
+def _load_servable_mask() -> np.ndarray:
+    """Servable-node mask: node has a MAG id and a title.
+
+    Rebuilt when delta segments add rows or the node index / title store reload (new papers).
+    """
+    global _servable, _servable_key
+    num_nodes = _load_embeddings().shape[0]
+    key = (num_nodes, node_index.generation(), title_store.generation())
+    if _servable is None or _servable_key != key:
+        has_mag = node_index.node_ids_to_mag_ids(np.arange(num_nodes)) != node_index.MISSING
+        has_title = np.zeros(num_nodes, dtype=bool)
+        titled = title_store.has_title_mask()[:num_nodes]
+        has_title[: titled.shape[0]] = titled
+        _servable = has_mag & has_title
+        _servable_key = key
+    return _servable
+
+
+def _recommend(avg: np.ndarray, k: int, exclude: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k servable node ids (best first) and their cosine scores, excluding `exclude`.
+
+    Uses the ANN index when one is built, falling back to exact scoring over all nodes.
+    """
+    embeddings = _load_embeddings()
+    servable = _load_servable_mask()
+    index = vector_index.get_index()
+    if index is not None:
+        # The index only holds base rows: skip those a delta segment replaced, then merge in the delta
+        found = recommender.top_k_ann(
+            index,
+            embeddings,
+            avg,
+            k,
+            servable=embedding_delta.index_servable(embeddings, servable),
+            exclude=exclude,
+            overfetch=VECTOR_INDEX_OVERFETCH,
+        )
+        if found is not None:
+            return embedding_delta.merge_top_k(embeddings, found, avg, k, servable=servable, exclude=exclude)
+    store = quantized_store.get_store()
+    if store is not None:
+        # Coarse scores on the compact matrix, float32 rescoring of the best candidates
+        coarse = embedding_delta.patch_scores(embeddings, quantized_store.coarse_scores(*store, avg), avg)
+        return quantized_store.rescore(
+            embeddings, coarse, avg, k, EMBEDDING_RESCORE_FACTOR, servable=servable, exclude=exclude
+        )
+    # Cosine similarity (embeddings already normalized)
+    scores = embeddings @ avg
+    top = recommender.top_k(scores, k, servable=servable, exclude=exclude)
+    return top, scores[top]
+
+
+def _recommend_batch(queries: np.ndarray, excludes: list[list[int]], k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """`_recommend` for several user vectors: one `embeddings @ U` GEMM instead of a GEMV each."""
+    if vector_index.get_index() is not None:
+        return [_recommend(q, k, exclude) for q, exclude in zip(queries, excludes)]
+    embeddings = _load_embeddings()
+    servable = _load_servable_mask()
+    store = quantized_store.get_store()
+    if store is not None:
+        coarse = embedding_delta.patch_scores(embeddings, quantized_store.coarse_scores(*store, queries.T), queries.T)
+        return [
+            quantized_store.rescore(
+                embeddings, coarse[:, i], q, k, EMBEDDING_RESCORE_FACTOR, servable=servable, exclude=exclude
+            )
+            for i, (q, exclude) in enumerate(zip(queries, excludes))
+        ]
+    scores = embeddings @ queries.T
+    tops = recommender.top_k_batch(scores.T, k, servable=servable, excludes=excludes)
+    return [(top, scores[top, i]) for i, top in enumerate(tops)]
+
+
+async def _run_recommend_batch(items: list[tuple[np.ndarray, list[int], int]]) -> list[tuple[np.ndarray, np.ndarray]]:
+    queries = np.stack([q for q, _, _ in items]).astype(np.float32)
+    k = max(k for _, _, k in items)
+    # Scoring is CPU-bound; run it in the compute pool
+    results = await compute_pool.get_pool().run(
+        "recommend_batch", _recommend_batch, queries, [exclude for _, exclude, _ in items], k
+    )
+    return [(ids[:k_i], scores[:k_i]) for (ids, scores), (_, _, k_i) in zip(results, items)]
+
+
+def _get_recommend_batcher() -> MicroBatcher:
+    """Collects concurrent /for-you scoring requests for MICROBATCH_WINDOW_MS (per worker)."""
+    global _recommend_batcher
+    if _recommend_batcher is None:
+        _recommend_batcher = MicroBatcher(
+            "recommend_batch", _run_recommend_batch, MICROBATCH_WINDOW_MS / 1000.0, MICROBATCH_MAX_SIZE
+        )
+    return _recommend_batcher
+
+
+async def shutdown() -> None:
+    """Finish in-flight /for-you micro-batches (app shutdown, before the compute pool closes)."""
+    if _recommend_batcher is not None:
+        await _recommend_batcher.aclose()
 
 
 def _mag_id_to_node_id(mag_id: str) -> int | None:
-    """Resolve MAG id (URL or numeric) to node idx using mag_to_node_idx.npy."""
-    mapping = _load_mag_to_node()
-    numeric = paper_service._mag_id_to_numeric(mag_id)
-    if not numeric.isdigit():
-        return None
-    key_int = int(numeric)
-    if key_int in mapping:
-        return int(mapping[key_int])
-    if numeric in mapping:
-        return int(mapping[numeric])
-    return None
-
-
-def _node_id_to_mag_id_url(node_id: int) -> str | None:
-    """Convert node idx to OpenAlex URL using node_to_mag_id.npy."""
-    mapping = _load_node_to_mag()
-    node_id = int(node_id)
-    if node_id not in mapping:
-        return None
-    paper_id = mapping[node_id]
-    return f"https://openalex.org/W{paper_id}"
+    """Resolve MAG id (URL or numeric) to node idx."""
+    return node_index.mag_id_to_node_id(paper_service._mag_id_to_numeric(mag_id))
 
 
 class ClickRequest(BaseModel):
     mag_id: str
 
 
+class PaperInfoBatchRequest(BaseModel):
+    mag_ids: list[str] = Field(..., min_length=1, max_length=PAPER_INFO_BATCH_MAX)
+
+
+class EmbedNewPaperRequest(BaseModel):
+    cited_mag_ids: list[str] = Field(..., min_length=1, max_length=PAPER_INFO_BATCH_MAX)
+    k: int = Field(10, ge=1, le=100)
+
+
 @router.get("/paper-info")
-def get_paper_info(mag_id: str = Query(..., description="MAG/OpenAlex id")):
+async def get_paper_info(mag_id: str = Query(..., description="MAG/OpenAlex id")):
     """Look up paper title, DOI URL, and abstract by MAG id."""
-    result = paper_service.get_paper_info_by_mag_id(mag_id)
+    result = await paper_service.get_paper_info_by_mag_id_async(mag_id)
     if result["title"] is None and result["doi_url"] is None:
         raise HTTPException(status_code=404, detail=f"No paper found for MAG id: {mag_id}")
     return result
 
 
+@router.post("/paper-info:batch")
+async def get_paper_info_batch(body: PaperInfoBatchRequest):
+    """
+    Look up title, DOI URL, and abstract for many MAG ids in one round trip.
+    Results are in request order, each with a status (ok / not_found / invalid / error).
+    """
+    papers = await paper_service.get_paper_infos_async(body.mag_ids)
+    return {"papers": papers, "count": len(papers)}
+
+
+def _embed_and_neighbors(cited_node_ids: list[int], k: int) -> tuple[list[float], list[int], list[float]]:
+    """GNN embedding of a new paper plus its k nearest servable papers (runs in the compute pool)."""
+    embedding = gnn_service.embed_new_paper(cited_node_ids)
+    vec = embedding / np.linalg.norm(embedding)
+    top, scores = _recommend(vec.astype(np.float32), k, exclude=[])
+    return embedding.tolist(), top.tolist(), scores.tolist()
+
+
+@router.post("/embed-new")
+async def embed_new_paper(body: EmbedNewPaperRequest):
+    """
+    Embed a paper that is not in the graph from the MAG ids it cites (inductive GNN), and return
+    the embedding with its k nearest papers. Unknown MAG ids are ignored.
+    """
+    reason = gnn_service.unavailable_reason()
+    if reason is not None:
+        raise HTTPException(status_code=503, detail=reason)
+    node_ids = [n for n in (_mag_id_to_node_id(m) for m in body.cited_mag_ids) if n is not None]
+    if not node_ids:
+        raise HTTPException(status_code=400, detail="None of the cited MAG ids are in the graph")
+    embedding, top, scores = await compute_pool.get_pool().run(
+        "embed_new", _embed_and_neighbors, node_ids, body.k
+    )
+    urls = node_index.node_ids_to_mag_urls(top)
+    titles = paper_service.get_titles_by_node_ids(top)
+    neighbors = [
+        {"node_id": nid, "mag_id": url, "title": title or "—", "score": score}
+        for nid, url, title, score in zip(top, urls, titles, scores)
+    ]
+    return {"embedding": embedding, "cited_node_ids": node_ids, "neighbors": neighbors}
+
+
 @router.post("/click")
-def register_click(
+async def register_click(
     body: ClickRequest,
     credentials=Depends(security),
 ):
     """
-    Register a paper click: convert mag ID to node ID, update Auth0 node_history (max 5).
-    Requires Bearer token.
+    Register a paper click: convert mag ID to node ID, append it to the user's node history
+    (local store, synced to Auth0 in the background). Requires Bearer token.
     """
     node_id = _mag_id_to_node_id(body.mag_id)
     if node_id is None:
         print(f"\n[Click] Unknown MAG id (not in mag_to_node_idx): {body.mag_id!r}\n")
         return {"ok": False, "error": "mag_id not in mapping"}
-    sub = get_sub_from_token(credentials)
-    history = auth0_storage.append_node_to_history(sub, str(node_id))
+    sub = await get_sub_from_token_async(credentials)
+    history = await history_store.append(sub, str(node_id))
     _click_history.append(node_id)
     print("\n[Click] Current click history (node ids):")
     for i, nid in enumerate(history, 1):
@@ -120,77 +255,60 @@ def register_click(
 
 
 @router.get("/for-you")
-def get_for_you_papers(
+async def get_for_you_papers(
     n: int = Query(50, ge=1, le=500, description="Number of papers to return (default 50)"),
     credentials=Depends(security),
 ):
     """
     Return papers for the For You page: top 35 by cosine similarity to user's click history
-    (from Auth0), plus 15 random papers (excluding the top 35). Total up to 50.
+    (local history store, seeded from Auth0), plus 15 random papers (excluding the top 35). Total up to 50.
     If no Bearer token or invalid token, treats as no history. Random papers have no score.
     """
     history: list[str] = []
     if credentials and credentials.credentials:
         try:
-            sub = get_sub_from_token(credentials)
+            sub = await get_sub_from_token_async(credentials)
             try:
-                history = auth0_storage.get_node_history(sub)
+                history = await history_store.get_history(sub)
             except Exception:
                 pass
         except HTTPException:
             pass
-    embeddings = _load_embeddings()
-    node_to_mag = _load_node_to_mag()
-    num_nodes = embeddings.shape[0]
+    papers = await _build_for_you_papers(history)
+    return {"papers": papers, "count": len(papers)}
 
-    # Build average vector from click history (or fallback to random if empty)
-    if history:
-        node_ids = []
-        for x in history:
-            try:
-                ni = int(x)
-                if 0 <= ni < num_nodes:
-                    node_ids.append(ni)
-            except (ValueError, TypeError):
-                continue
-        if node_ids:
-            avg = embeddings[node_ids].mean(axis=0)
-            avg = avg / np.linalg.norm(avg)
-        else:
-            avg = embeddings.mean(axis=0)
-            avg = avg / np.linalg.norm(avg)
-    else:
-        avg = embeddings.mean(axis=0)
-        avg = avg / np.linalg.norm(avg)
 
-    # Cosine similarity (embeddings already normalized)
-    scores = embeddings @ avg
-    # Descending; exclude nodes we don't have mag_id for, and exclude user's history
-    history_set = {int(x) for x in history if isinstance(x, str) and x.isdigit()}
+def _model_version(*extra_paths) -> str:
+    """Fingerprint of the files recommendations are computed from (cache invalidation)."""
+    return response_cache.file_fingerprint(
+        NORMALIZED_EMBEDDINGS_PATH,
+        PAPER_EMBEDDINGS_PATH,
+        PAPER_EMBEDDINGS_MANIFEST_PATH,
+        QUANTIZED_EMBEDDINGS_INT8_PATH,
+        QUANTIZED_SCALES_PATH,
+        QUANTIZED_EMBEDDINGS_F16_PATH,
+        VECTOR_INDEX_PATH,
+        EMBEDDING_DELTA_DIR,
+        *extra_paths,
+    )
+
+
+async def _build_for_you_papers(history: list[str]) -> list[dict]:
+    """Top 35 similar papers for the given history (cached) plus 15 random ones."""
+    embeddings = _load_embeddings()
     n_similar = 35
     n_random = 15
-    candidate_nodes = []
-    for idx in np.argsort(-scores):
-        idx_int = int(idx)
-        if idx_int in history_set or idx_int not in node_to_mag:
-            continue
-        mag_url = _node_id_to_mag_id_url(idx_int)
-        if mag_url and paper_service.get_title_by_mag_id(mag_url):
-            candidate_nodes.append(idx_int)
-        if len(candidate_nodes) >= n_similar:
-            break
 
-    papers = []
-    for node_id in candidate_nodes[:n_similar]:
-        mag_id = _node_id_to_mag_id_url(node_id)
-        if not mag_id:
-            continue
-        title = paper_service.get_title_by_mag_id(mag_id) or "—"
-        papers.append({
-            "mag_id": mag_id,
-            "title": title,
-            "score": float(scores[node_id]),
-        })
+    node_ids = recommender.valid_node_ids(history, embeddings.shape[0])
+    # The mean vector and exclusion set do not depend on click order
+    version = _model_version()
+    key = response_cache.make_key("for-you", sorted(node_ids), n_similar, version)
+    cache = response_cache.get_cache()
+    similar = cache.get(key, version)
+    if similar is None:
+        similar = await _similar_papers(node_ids, n_similar)
+        cache.put(key, version, similar)
+    papers = list(similar)
 
     # Add 15 random papers (excluding those already in the top 35)
     similar_mag_ids = {p["mag_id"] for p in papers}
@@ -202,98 +320,113 @@ def get_for_you_papers(
             papers.append({"mag_id": p["mag_id"], "title": p["title"]})
             similar_mag_ids.add(p["mag_id"])
 
-    return {"papers": papers, "count": len(papers)}
+    return papers
 
 
-def _get_history_and_top35_node_ids(embeddings: np.ndarray, node_to_mag: dict, history: list[str]):
-    """Return (history_node_ids in chronological order, top_35_recommendation_node_ids)."""
-    num_nodes = embeddings.shape[0]
-    history_set = {int(x) for x in history if isinstance(x, str) and x.isdigit()}
+async def _similar_papers(node_ids: list[int], n_similar: int) -> list[dict]:
+    """Most similar servable papers to the mean of `node_ids`, excluding them."""
+    embeddings = _load_embeddings()
 
-    # Chronological history: node_ids we have mag_id for (oldest to newest)
-    history_node_ids: list[int] = []
-    for x in history:
-        try:
-            ni = int(x)
-            if 0 <= ni < num_nodes and ni in node_to_mag:
-                mag_url = _node_id_to_mag_id_url(ni)
-                if mag_url and paper_service.get_title_by_mag_id(mag_url):
-                    history_node_ids.append(ni)
-        except (ValueError, TypeError):
+    # User vector: average of click history (or global mean if empty)
+    avg = recommender.user_vector(embeddings, node_ids, fallback=_load_mean_vector())
+
+    # Most similar servable papers, excluding the user's history (scored together with concurrent requests)
+    top, scores = await _get_recommend_batcher().submit((avg, node_ids, n_similar))
+
+    papers = []
+    urls = node_index.node_ids_to_mag_urls(top)
+    titles = paper_service.get_titles_by_node_ids(top)
+    for mag_id, title, score in zip(urls, titles, scores.tolist()):
+        if not mag_id:
             continue
+        title = title or "—"
+        papers.append({
+            "mag_id": mag_id,
+            "title": title,
+            "score": float(score),
+        })
+    return papers
+
+
+def _get_history_and_top35_node_ids(embeddings: np.ndarray, history: list[str]):
+    """Return (history_node_ids in chronological order, top_35_recommendation_node_ids, user vector)."""
+    num_nodes = embeddings.shape[0]
+    servable = _load_servable_mask()
+
+    # Chronological history: node_ids we have mag_id and title for (oldest to newest)
+    history_node_ids = recommender.valid_node_ids(history, num_nodes, servable=servable)
+    exclude = recommender.valid_node_ids(history, num_nodes)
 
     # User vector: average of history or global mean
-    if history_node_ids:
-        avg = embeddings[history_node_ids].mean(axis=0)
-        avg = avg / np.linalg.norm(avg)
-    else:
-        avg = embeddings.mean(axis=0)
-        avg = avg / np.linalg.norm(avg)
+    avg = recommender.user_vector(embeddings, history_node_ids, fallback=_load_mean_vector())
 
-    scores = embeddings @ avg
-    n_similar = 35
-    rec_node_ids: list[int] = []
-    for idx in np.argsort(-scores):
-        idx_int = int(idx)
-        if idx_int in history_set or idx_int not in node_to_mag:
-            continue
-        mag_url = _node_id_to_mag_id_url(idx_int)
-        if mag_url and paper_service.get_title_by_mag_id(mag_url):
-            rec_node_ids.append(idx_int)
-        if len(rec_node_ids) >= n_similar:
-            break
+    rec_node_ids = _recommend(avg, 35, exclude=exclude)[0].tolist()
 
-    return history_node_ids, rec_node_ids
+    return history_node_ids, rec_node_ids, avg
 
 
 @router.get("/tsne-coordinates")
-def get_tsne_coordinates(credentials=Depends(security)):
+async def get_tsne_coordinates(credentials=Depends(security)):
     """
-    Return history (chronological) and top 35 For You recommendations as 2D coordinates
-    from a single t-SNE run so both can be plotted in the same space.
+    Return history (chronological) and top 35 For You recommendations as 2D coordinates in the
+    same space: positions on the precomputed paper map, plus the user vector projected onto it.
+    Falls back to a per-request t-SNE of just these points if the map has not been built.
     """
     history: list[str] = []
     if credentials and credentials.credentials:
         try:
-            sub = get_sub_from_token(credentials)
+            sub = await get_sub_from_token_async(credentials)
             try:
-                history = auth0_storage.get_node_history(sub)
+                history = await history_store.get_history(sub)
             except Exception:
                 pass
         except HTTPException:
             pass
+    return await _cached_tsne_coordinates(history)
+
+
+async def _cached_tsne_coordinates(history: list[str]) -> dict:
+    """_tsne_coordinates, cached by the (ordered) history node ids and run in the compute pool."""
+    node_ids = recommender.valid_node_ids(history, _load_embeddings().shape[0])
+    version = _model_version(LAYOUT_PATH)
+    key = response_cache.make_key("tsne-coordinates", node_ids, 35, version)
+    cache = response_cache.get_cache()
+    result = cache.get(key, version)
+    if result is None:
+        result = await compute_pool.get_pool().run("tsne", _tsne_coordinates, history)
+        cache.put(key, version, result)
+    return result
 
-    embeddings = _load_embeddings()
-    node_to_mag = _load_node_to_mag()
-    history_node_ids, rec_node_ids = _get_history_and_top35_node_ids(
-        embeddings, node_to_mag, history
-    )
 
-    def _node_to_item(nid: int, mag_url: str | None, x: float, y: float) -> dict:
-        url = mag_url or _node_id_to_mag_id_url(nid) or ""
-        title = paper_service.get_title_by_mag_id(url) if url else None
-        return {"node_id": nid, "mag_id": url, "title": title or "", "x": x, "y": y}
+def _tsne_coordinates(history: list[str]) -> dict:
+    """2D coordinates of the history and its top 35 recommendations."""
+    embeddings = _load_embeddings()
+    history_node_ids, rec_node_ids, avg = _get_history_and_top35_node_ids(embeddings, history)
 
     # Combined points: history first (chronological), then top 35 recommendations
     all_node_ids = history_node_ids + rec_node_ids
-    if len(all_node_ids) < 2:
-        # t-SNE needs at least 2 samples
-        history_coords = [_node_to_item(nid, _node_id_to_mag_id_url(nid), 0.0, 0.0) for nid in history_node_ids]
-        rec_coords = [_node_to_item(nid, _node_id_to_mag_id_url(nid), 0.0, 0.0) for nid in rec_node_ids]
-        return {"history": history_coords, "recommendations": rec_coords}
-
-    emb_subset = embeddings[all_node_ids]
-    perplexity = min(30, max(2, len(all_node_ids) - 1))
-    tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42)
-    coords_2d = tsne.fit_transform(emb_subset)
-
-    history_coords = [
-        _node_to_item(nid, _node_id_to_mag_id_url(nid), float(coords_2d[i, 0]), float(coords_2d[i, 1]))
-        for i, nid in enumerate(history_node_ids)
-    ]
+    urls = node_index.node_ids_to_mag_urls(all_node_ids)
+    titles = paper_service.get_titles_by_node_ids(all_node_ids)
     n_hist = len(history_node_ids)
-    rec_coords = [
-        _node_to_item(nid, _node_id_to_mag_id_url(nid), float(coords_2d[n_hist + i, 0]), float(coords_2d[n_hist + i, 1]))
-        for i, nid in enumerate(rec_node_ids)
+    layout = layout_store.get_layout()
+    user = None
+    if layout is not None:
+        coords_2d = layout_store.coordinates(layout, all_node_ids)
+        # The recommendations are the user vector's nearest papers, so they double as its kNN
+        neighbors = rec_node_ids[:LAYOUT_PROJECTION_K] or history_node_ids
+        ux, uy = layout_store.interpolate(layout, neighbors, embeddings[neighbors] @ avg).tolist()
+        user = {"x": ux, "y": uy}
+    elif len(all_node_ids) < 2:
+        # t-SNE needs at least 2 samples
+        coords_2d = np.zeros((len(all_node_ids), 2), dtype=np.float32)
+    else:
+        emb_subset = embeddings[all_node_ids]
+        perplexity = min(30, max(2, len(all_node_ids) - 1))
+        tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42)
+        coords_2d = tsne.fit_transform(emb_subset)
+
+    items = [
+        {"node_id": nid, "mag_id": url or "", "title": title or "", "x": float(x), "y": float(y)}
+        for nid, url, title, (x, y) in zip(all_node_ids, urls, titles, coords_2d.tolist())
     ]
-    return {"history": history_coords, "recommendations": rec_coords}
+    return {"history": items[:n_hist], "recommendations": items[n_hist:], "user": user}
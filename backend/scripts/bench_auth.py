@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Per-request auth overhead of core/auth.get_sub_from_token against a local JWKS stub.
+
+Compares the previous path (PyJWKClient lookup + full RS256 decode on every request) with the
+cached path: first sight of a token (signature check, kid map) and repeat requests (verified-token
+cache). Also reports how many times the JWKS endpoint was fetched. Run from repo root:
+
+  python -m backend.scripts.bench_auth --users 50 --requests 2000
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_jwks_stub(port: int, jwks: dict) -> dict:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    calls = {"jwks": 0}
+
+    async def keys(request):
+        calls["jwks"] += 1
+        return JSONResponse(jwks)
+
+    app = Starlette(routes=[Route("/.well-known/jwks.json", keys)])
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return calls
+
+
+def _signing_key(kid: str):
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+    jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return key, jwk
+
+
+def _timed(fn, tokens: list[str]) -> np.ndarray:
+    times = np.empty(len(tokens))
+    for i, token in enumerate(tokens):
+        t0 = time.perf_counter()
+        fn(token)
+        times[i] = time.perf_counter() - t0
+    return times * 1e6
+
+
+def _report(label: str, us: np.ndarray) -> None:
+    print(f"{label:22s} mean={us.mean():8.1f} us  p50={np.percentile(us, 50):8.1f} us  p99={np.percentile(us, 99):8.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Auth overhead per request with a local JWKS stub")
+    parser.add_argument("--users", type=int, default=50, help="Distinct tokens")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests (tokens reused round-robin)")
+    args = parser.parse_args()
+
+    port = _free_port()
+    audience = "https://ariadne.test/api"
+    os.environ.update({
+        "AUTH0_DOMAIN": "fake.auth0.local",
+        "AUTH0_BASE_URL": f"http://127.0.0.1:{port}",
+        "AUTH0_AUDIENCE": audience,
+    })
+    import jwt
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    key, jwk = _signing_key("bench-key")
+    calls = _start_jwks_stub(port, {"keys": [jwk]})
+    exp = int(time.time()) + 3600
+    tokens = [
+        jwt.encode({"sub": f"auth0|user{u}", "aud": audience, "exp": exp}, key, algorithm="RS256", headers={"kid": "bench-key"})
+        for u in range(args.users)
+    ]
+    workload = [tokens[i % len(tokens)] for i in range(args.requests)]
+
+    from ..core import auth
+
+    # Previous behaviour: JWKS client lookup and full decode per request
+    jwks_client = jwt.PyJWKClient(f"http://127.0.0.1:{port}/.well-known/jwks.json")
+
+    def uncached(token: str) -> str:
+        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        return jwt.decode(token, signing_key.key, algorithms=["RS256"], audience=audience)["sub"]
+
+    def cached(token: str) -> str:
+        return auth.get_sub_from_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+    calls["jwks"] = 0
+    _report("uncached (per request)", _timed(uncached, workload))
+    print(f"  jwks fetches: {calls['jwks']}")
+
+    calls["jwks"] = 0
+    _report("cached, first sight", _timed(cached, tokens))
+    _report("cached, repeat", _timed(cached, workload))
+    print(f"  jwks fetches: {calls['jwks']}  token cache hit rate: {auth.metrics.hit_rate('auth_token'):.3f}")
+
+
+if __name__ == "__main__":
+    main()
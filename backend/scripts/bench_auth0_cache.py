@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Count Auth0 round trips for a click / page-load workload against a local fake Auth0 server,
+with and without the M2M token cache and the node_history cache (services/auth0_storage.py).
+
+The fake server implements POST /oauth/token, GET and PATCH /api/v2/users/{id} (PATCH merges
+user_metadata keys like Auth0). Run from repo root:
+
+  python -m backend.scripts.bench_auth0_cache --users 20 --page-loads 10 --clicks 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_fake_auth0(port: int, latency_s: float) -> dict:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    calls = {"token": 0, "get_user": 0, "patch_user": 0}
+    users: dict[str, dict] = {}
+
+    async def token(request):
+        calls["token"] += 1
+        await asyncio.sleep(latency_s)
+        return JSONResponse({"access_token": "fake-m2m-token", "expires_in": 86400, "token_type": "Bearer"})
+
+    async def user(request):
+        await asyncio.sleep(latency_s)
+        uid = request.path_params["uid"]
+        meta = users.setdefault(uid, {})
+        if request.method == "PATCH":
+            calls["patch_user"] += 1
+            meta.update((await request.json()).get("user_metadata") or {})
+        else:
+            calls["get_user"] += 1
+        return JSONResponse({"user_id": uid, "user_metadata": meta})
+
+    app = Starlette(routes=[
+        Route("/oauth/token", token, methods=["POST"]),
+        Route("/api/v2/users/{uid:path}", user, methods=["GET", "PATCH"]),
+    ])
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return calls
+
+
+async def _workload(users: int, page_loads: int, clicks: int) -> tuple[int, float]:
+    from ..services import auth0_storage
+
+    ops = 0
+    t0 = time.perf_counter()
+
+    async def one_user(u: int):
+        nonlocal ops
+        sub = f"auth0|user{u}"
+        for i in range(max(page_loads, clicks)):
+            if i < page_loads:
+                await auth0_storage.get_node_history_async(sub)
+                ops += 1
+            if i < clicks:
+                # A click: read (cached) history, then the write-behind's PATCH of the new one
+                history = auth0_storage._appended_history(
+                    await auth0_storage.get_node_history_async(sub), str(u * 100 + i)
+                )
+                await asyncio.to_thread(auth0_storage.replace_node_history, sub, history)
+                ops += 1
+
+    await asyncio.gather(*(one_user(u) for u in range(users)))
+    return ops, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Auth0 calls per request with and without caching")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--page-loads", type=int, default=10)
+    parser.add_argument("--clicks", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake Auth0 latency per call")
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ.update({
+        "AUTH0_DOMAIN": "fake.auth0.local",
+        "AUTH0_BASE_URL": f"http://127.0.0.1:{port}",
+        "AUTH0_M2M_CLIENT_ID": "id",
+        "AUTH0_M2M_CLIENT_SECRET": "secret",
+    })
+    calls = _start_fake_auth0(port, args.latency_ms / 1000.0)
+
+    from ..core import http
+    from ..services import auth0_storage
+
+    ttl, margin = auth0_storage.AUTH0_HISTORY_CACHE_TTL_S, auth0_storage.AUTH0_TOKEN_REFRESH_MARGIN_S
+    for label, cached in (("uncached", False), ("cached", True)):
+        # Uncached: every token is considered expired and every history read goes to Auth0
+        auth0_storage.AUTH0_HISTORY_CACHE_TTL_S = ttl if cached else 0.0
+        auth0_storage.AUTH0_TOKEN_REFRESH_MARGIN_S = margin if cached else float("inf")
+        auth0_storage._token_cache = auth0_storage._TokenCache()
+        auth0_storage._history_cache.clear()
+        http._async_client = None
+        for k in calls:
+            calls[k] = 0
+        ops, elapsed = asyncio.run(_workload(args.users, args.page_loads, args.clicks))
+        total = sum(calls.values())
+        print(
+            f"{label:8s} ops={ops} auth0_calls={total} ({total / ops:.2f}/op: {calls}) "
+            f"mean={elapsed * 1000 / (ops / args.users):.1f} ms/op per user"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Report per-worker memory for N worker processes holding the embedding matrix:
+- legacy: each worker loads + normalizes twice (old main.py and papers router), private copies
+- mmap:   each worker np.load(mmap_mode="r")s the pre-normalized file (services/embedding_store.py)
+
+RSS counts shared page-cache pages in every worker; PSS splits them between the workers that map
+them, so PSS is the real per-worker cost. Uses a synthetic ogbn-arxiv-sized matrix by default.
+Run from repo root:
+
+  python -m backend.scripts.bench_embedding_rss --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from ..services import embedding_store
+
+
+def _memory_mb() -> tuple[float, float]:
+    """(RSS, PSS) of this process in MB, from /proc/self/smaps_rollup (Linux)."""
+    rss = pss = 0.0
+    with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1]) / 1024
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1]) / 1024
+    return rss, pss
+
+
+def _worker(mode: str, raw_path: str, norm_path: str, ready, done, out) -> None:
+    if mode == "legacy":
+        a = embedding_store.normalize(np.load(raw_path))
+        b = embedding_store.normalize(np.load(raw_path))
+        mats = [a, b]
+    else:
+        mats = [np.load(norm_path, mmap_mode="r")]
+    # Touch every page, like a scoring request would
+    for m in mats:
+        float((m @ np.ones(m.shape[1], dtype=np.float32)).sum())
+    ready.wait()
+    out.put(_memory_mb())
+    done.wait()
+
+
+def _run(mode: str, workers: int, raw: Path, norm: Path) -> list[tuple[float, float]]:
+    ctx = mp.get_context("spawn")
+    ready, done, out = ctx.Barrier(workers + 1), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, str(raw), str(norm), ready, done, out)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    ready.wait()
+    results = [out.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-worker RSS/PSS: private copies vs shared mmap")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--num-nodes", type=int, default=169343)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw, norm = Path(tmp) / "raw.npy", Path(tmp) / "normalized.npy"
+        rng = np.random.default_rng(0)
+        np.save(raw, rng.standard_normal((args.num_nodes, args.dim), dtype=np.float32))
+        embedding_store.build(raw, norm)
+        size_mb = norm.stat().st_size / 2**20
+        print(f"matrix {args.num_nodes}x{args.dim} float32 = {size_mb:.1f} MB, workers={args.workers}")
+        for mode in ("legacy", "mmap"):
+            res = _run(mode, args.workers, raw, norm)
+            rss = np.mean([r[0] for r in res])
+            pss = np.mean([r[1] for r in res])
+            print(f"{mode:6s} per-worker RSS={rss:8.1f} MB  PSS={pss:8.1f} MB  total PSS={pss * len(res):8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the For You top-35 selection: legacy full argsort + per-node Python filtering
+vs. vectorized top-k over the servable mask (services/recommender.py).
+
+Uses synthetic data with the ogbn-arxiv shape by default, so it runs without the real files.
+Run from repo root:
+
+  python -m backend.scripts.bench_for_you --iters 200
+
+Prints p50/p99 latency (ms) of the selection step (scores -> 35 node ids) for both paths,
+plus the shared `embeddings @ avg` scoring cost, and checks both paths return the same ids.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ..services import recommender
+
+
+def _legacy_top(scores, history, node_to_mag, titles, n_similar=35):
+    """Copy of the pre-vectorization selection loop in routers/papers.py."""
+    history_set = {int(x) for x in history if isinstance(x, str) and x.isdigit()}
+    out = []
+    for idx in np.argsort(-scores):
+        idx_int = int(idx)
+        if idx_int in history_set or idx_int not in node_to_mag:
+            continue
+        mag_url = f"https://openalex.org/W{node_to_mag[idx_int]}"
+        if mag_url and titles.get(mag_url):
+            out.append(idx_int)
+        if len(out) >= n_similar:
+            break
+    return out
+
+
+def _percentiles(samples: list[float]) -> str:
+    arr = np.array(samples) * 1000.0
+    return f"p50={np.percentile(arr, 50):8.2f} ms  p99={np.percentile(arr, 99):8.2f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark For You top-k selection")
+    parser.add_argument("--num-nodes", type=int, default=169343)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--titled-fraction", type=float, default=0.9, help="Fraction of nodes with a title")
+    parser.add_argument("--iters", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    emb = rng.standard_normal((args.num_nodes, args.dim), dtype=np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    paper_ids = rng.choice(10**10, size=args.num_nodes, replace=False)
+    node_to_mag = {i: int(p) for i, p in enumerate(paper_ids)}
+    titled = rng.random(args.num_nodes) < args.titled_fraction
+    titles = {f"https://openalex.org/W{paper_ids[i]}": f"Paper {i}" for i in np.flatnonzero(titled)}
+    servable = titled.copy()
+
+    histories = [[str(x) for x in rng.integers(0, args.num_nodes, size=5)] for _ in range(args.iters)]
+
+    scoring, legacy, vectorized = [], [], []
+    for history in histories:
+        node_ids = recommender.valid_node_ids(history, args.num_nodes)
+        avg = recommender.user_vector(emb, node_ids)
+
+        t0 = time.perf_counter()
+        scores = emb @ avg
+        scoring.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        old = _legacy_top(scores, history, node_to_mag, titles)
+        legacy.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        new = recommender.top_k(scores, 35, servable=servable, exclude=node_ids).tolist()
+        vectorized.append(time.perf_counter() - t0)
+
+        assert old == new, "vectorized top-k disagrees with legacy loop"
+
+    print(f"nodes={args.num_nodes} dim={args.dim} iters={args.iters}")
+    print(f"scoring (emb @ avg)   : {_percentiles(scoring)}")
+    print(f"legacy argsort + loop : {_percentiles(legacy)}")
+    print(f"vectorized top-k      : {_percentiles(vectorized)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Throughput (papers/sec on CPU) of batched new-paper GNN inference (services/gnn_service.py
+`embed_new_papers`) against one forward pass per paper.
+
+Uses a randomly initialized EmbedderGNNv3 on a synthetic citation graph with the ogbn-arxiv shape,
+so no graph files or checkpoint are needed (torch + torch_geometric are). Also checks that batched
+embeddings match the one-at-a-time ones. Run from repo root:
+
+  python -m backend.scripts.bench_gnn_batch --papers 512 --batch-sizes 1 16 64 256
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ml_pipeline.src import sampler
+
+from ..services import gnn_service
+
+
+def _synthetic_graph(num_nodes: int, avg_degree: int, rng: np.random.Generator):
+    src = rng.integers(0, num_nodes, size=num_nodes * avg_degree)
+    dst = rng.integers(0, num_nodes, size=num_nodes * avg_degree)
+    rowptr, col = sampler.build_csr(np.stack([src, dst]), num_nodes)
+    features = rng.standard_normal((num_nodes, gnn_service.INPUT_DIM), dtype=np.float32)
+    return features, rowptr, col
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batched GNN inference for new papers")
+    parser.add_argument("--num-nodes", type=int, default=169343)
+    parser.add_argument("--avg-degree", type=int, default=7, help="ogbn-arxiv has ~6.9 citations per paper")
+    parser.add_argument("--papers", type=int, default=512)
+    parser.add_argument("--citations", type=int, default=15, help="Citations per new paper")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch = gnn_service.torch
+    if torch is None:
+        raise SystemExit("torch is not installed (pip install torch torch-geometric)")
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+    from ml_pipeline.src.model import EmbedderGNNv3
+
+    rng = np.random.default_rng(args.seed)
+    model = EmbedderGNNv3(
+        gnn_service.INPUT_DIM, gnn_service.HIDDEN_DIM, gnn_service.OUTPUT_DIM, num_layers=gnn_service.NUM_LAYERS
+    )
+    model.eval()
+    # Stand in for the memory-mapped graph files and the trained checkpoint
+    gnn_service._graph = _synthetic_graph(args.num_nodes, args.avg_degree, rng)
+    gnn_service._model = model
+    queries = [rng.integers(0, args.num_nodes, size=args.citations) for _ in range(args.papers)]
+
+    print(f"nodes={args.num_nodes} papers={args.papers} citations={args.citations} threads={torch.get_num_threads()}")
+    gnn_service.embed_new_papers(queries[:4], batch_size=4)  # warm-up
+
+    t0 = time.perf_counter()
+    reference = np.stack([gnn_service.embed_new_paper(q) for q in queries])
+    base = args.papers / (time.perf_counter() - t0)
+    print(f"one at a time  {base:8.1f} papers/s")
+
+    for batch_size in args.batch_sizes:
+        t0 = time.perf_counter()
+        emb = gnn_service.embed_new_papers(queries, batch_size=batch_size)
+        rate = args.papers / (time.perf_counter() - t0)
+        err = float(np.abs(emb - reference).max())
+        print(f"batch {batch_size:<8d} {rate:8.1f} papers/s  x{rate / base:5.2f}  max |diff|={err:.2e}")
+
+
+if __name__ == "__main__":
+    main()
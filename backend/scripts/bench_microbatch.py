@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Throughput vs. added latency of micro-batched For You scoring (core/microbatch.py).
+
+Concurrent clients each submit a user vector and wait for its top-35. Without batching
+(--windows 0 includes the baseline) every request is its own `embeddings @ avg` GEMV; with a window,
+requests arriving together are scored by one `embeddings @ U` GEMM plus batched top-k. Scoring runs
+in a single worker thread, like one compute-pool process. Synthetic data with the ogbn-arxiv shape.
+Run from repo root:
+
+  python -m backend.scripts.bench_microbatch --clients 64 --seconds 5 --windows 0 1 3 5
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ..core.microbatch import MicroBatcher
+from ..services import recommender
+
+
+def _score_batch(emb: np.ndarray, servable: np.ndarray, queries: np.ndarray, k: int) -> list[np.ndarray]:
+    if len(queries) == 1:
+        return [recommender.top_k(emb @ queries[0], k, servable=servable)]
+    scores = emb @ queries.T
+    return recommender.top_k_batch(scores.T, k, servable=servable)
+
+
+async def _run(emb, servable, clients: int, seconds: float, window_ms: float, max_size: int, seed: int) -> dict:
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    async def run_batch(queries: list[np.ndarray]) -> list[np.ndarray]:
+        return await loop.run_in_executor(executor, _score_batch, emb, servable, np.stack(queries), 35)
+
+    batcher = MicroBatcher("bench_batch", run_batch, window_ms / 1000.0, max_size if window_ms > 0 else 1)
+    rng = np.random.default_rng(seed)
+    latencies: list[float] = []
+    batches = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        while time.perf_counter() < deadline:
+            q = emb[rng.integers(0, emb.shape[0], size=5)].mean(axis=0)
+            q /= np.linalg.norm(q)
+            t0 = time.perf_counter()
+            await batcher.submit(q)
+            latencies.append(time.perf_counter() - t0)
+
+    original = batcher._run
+
+    async def counting_run(batch):
+        nonlocal batches
+        batches += 1
+        await original(batch)
+
+    batcher._run = counting_run
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - t0
+    executor.shutdown()
+    lat = np.array(latencies) * 1000.0
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": np.percentile(lat, 50),
+        "p99": np.percentile(lat, 99),
+        "mean_batch": len(latencies) / max(1, batches),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched scoring")
+    parser.add_argument("--num-nodes", type=int, default=169343)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent requests in flight")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per window setting")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 1, 3, 5], help="Window sizes (ms)")
+    parser.add_argument("--max-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    emb = rng.standard_normal((args.num_nodes, args.dim), dtype=np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    servable = rng.random(args.num_nodes) < 0.9
+
+    print(f"nodes={args.num_nodes} clients={args.clients} max_size={args.max_size}")
+    for window in args.windows:
+        r = asyncio.run(_run(emb, servable, args.clients, args.seconds, window, args.max_size, args.seed))
+        label = "no batching" if window <= 0 else f"window {window:g} ms"
+        print(
+            f"{label:14s} {r['rps']:8.1f} req/s  p50={r['p50']:8.2f} ms  p99={r['p99']:8.2f} ms  "
+            f"mean batch={r['mean_batch']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
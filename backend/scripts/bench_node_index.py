@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Compare the pickled dict mappings with the dense memory-mapped node index
+(services/node_index.py): startup time, RSS growth and MAG -> node lookup throughput.
+Each variant runs in a fresh process so RSS numbers are not shared. Run from repo root
+after `python -m backend.scripts.build_node_index`:
+
+  python -m backend.scripts.bench_node_index --lookups 200000
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process in MB (Linux /proc, else ru_maxrss)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_dict(queries: np.ndarray) -> dict:
+    from ..core.config import MAG_TO_NODE_IDX_PATH, NODE_TO_MAG_ID_PATH
+
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    mag_to_node = np.load(MAG_TO_NODE_IDX_PATH, allow_pickle=True).item()
+    np.load(NODE_TO_MAG_ID_PATH, allow_pickle=True).item()
+    load_s = time.perf_counter() - t0
+    rss = _rss_mb() - rss0
+
+    strs = [str(q) for q in queries.tolist()]
+    t0 = time.perf_counter()
+    for numeric in strs:
+        # Same logic as the old routers/papers.py _mag_id_to_node_id
+        key_int = int(numeric)
+        if key_int in mag_to_node:
+            int(mag_to_node[key_int])
+        elif numeric in mag_to_node:
+            int(mag_to_node[numeric])
+    single_s = time.perf_counter() - t0
+    return {"load_s": load_s, "rss_mb": rss, "single_s": single_s, "batch_s": None}
+
+
+def _run_dense(queries: np.ndarray) -> dict:
+    from ..services import node_index
+
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    node_index.node_to_mag_array()
+    load_s = time.perf_counter() - t0
+    rss = _rss_mb() - rss0
+
+    strs = [str(q) for q in queries.tolist()]
+    t0 = time.perf_counter()
+    for numeric in strs:
+        node_index.mag_id_to_node_id(numeric)
+    single_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    node_index.mag_ids_to_node_ids(queries)
+    batch_s = time.perf_counter() - t0
+    return {"load_s": load_s, "rss_mb": rss, "single_s": single_s, "batch_s": batch_s}
+
+
+def _worker(name: str, queries: np.ndarray, out) -> None:
+    out.put((_run_dict if name == "dict" else _run_dense)(queries))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dict vs dense node index")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from ..services import node_index
+
+    keys = node_index.build_from_legacy()[1]
+    rng = np.random.default_rng(args.seed)
+    queries = rng.choice(keys, size=args.lookups)
+
+    ctx = mp.get_context("spawn")
+    for name in ("dict", "dense"):
+        out = ctx.Queue()
+        proc = ctx.Process(target=_worker, args=(name, queries, out))
+        proc.start()
+        r = out.get()
+        proc.join()
+        line = (
+            f"{name:6s} load={r['load_s'] * 1000:8.1f} ms  rss=+{r['rss_mb']:7.1f} MB  "
+            f"single={args.lookups / r['single_s']:12,.0f} lookups/s"
+        )
+        if r["batch_s"] is not None:
+            line += f"  batch={args.lookups / r['batch_s']:14,.0f} lookups/s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
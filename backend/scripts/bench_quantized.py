@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Recall@35 and latency of coarse int8 / float16 scoring + float32 rescoring
+(services/quantized_store.py) against exact float32 scoring.
+
+Uses the real normalized embeddings if present, else synthetic clustered data with the
+ogbn-arxiv shape. Run from repo root:
+
+  python -m backend.scripts.bench_quantized --queries 200 --rescore-factors 1 2 4 8
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ..services import embedding_store, quantized_store, recommender
+
+
+def _synthetic(num: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((500, dim), dtype=np.float32)
+    emb = centers[rng.integers(0, 500, size=num)] + 0.7 * rng.standard_normal((num, dim), dtype=np.float32)
+    return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark quantized coarse scoring + rescoring")
+    parser.add_argument("--num-nodes", type=int, default=169343, help="Synthetic rows if no real embeddings")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=35)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if embedding_store.exists():
+        emb = np.asarray(embedding_store.get_embeddings())
+    else:
+        emb = _synthetic(args.num_nodes, args.dim, args.seed)
+    rng = np.random.default_rng(args.seed)
+    queries = np.stack([emb[rng.integers(0, emb.shape[0], size=5)].mean(axis=0) for _ in range(args.queries)])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    t0 = time.perf_counter()
+    exact = [recommender.top_k(emb @ q, args.k) for q in queries]
+    base_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"rows={emb.shape[0]} k={args.k} queries={len(queries)}")
+    print(f"float32 exact        {emb.nbytes / 1e6:7.1f} MB  recall=1.0000  {base_ms:7.2f} ms/query")
+
+    stores = {
+        "int8": quantized_store.quantize_int8(emb),
+        "float16": (emb.astype(np.float16), None),
+    }
+    for kind, (matrix, scales) in stores.items():
+        size_mb = (matrix.nbytes + (scales.nbytes if scales is not None else 0)) / 1e6
+        for factor in args.rescore_factors:
+            hits = 0
+            t0 = time.perf_counter()
+            for q, truth in zip(queries, exact):
+                coarse = quantized_store.coarse_scores(matrix, scales, q)
+                ids, _ = quantized_store.rescore(emb, coarse, q, args.k, factor)
+                hits += len(np.intersect1d(ids, truth))
+            ms = (time.perf_counter() - t0) * 1000 / len(queries)
+            recall = hits / (len(queries) * args.k)
+            print(f"{kind:7s} rescore x{factor:<3d} {size_mb:7.1f} MB  recall={recall:.4f}  {ms:7.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
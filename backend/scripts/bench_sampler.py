@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Subgraph construction time per query: the CSR sampler (ml_pipeline/src/sampler.py) against the
+per-node edge scans of the original gnn_embed_new.get_cluster / build_query_graph.
+
+The legacy path is a numpy port of the original: append the new node and its edges to the full
+edge array, scan all edges for every frontier node on every hop, take the induced subgraph with a
+mask over all edges, then reorder to put the center first. Synthetic citation graph with the
+ogbn-arxiv shape, random citation lists. numpy only. Run from repo root:
+
+  python -m backend.scripts.bench_sampler --queries 200 --legacy-queries 5 --batch-sizes 1 64
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ml_pipeline.src import sampler
+
+
+def _legacy_query_graph(edge_index: np.ndarray, num_nodes: int, cited: np.ndarray, num_neighbors, rng):
+    new_node = num_nodes
+    edges = np.concatenate([edge_index, np.stack([np.full(len(cited), new_node), cited])], axis=1)
+    all_nodes = {new_node}
+    current = {new_node}
+    for n_sample in num_neighbors:
+        next_layer = set()
+        for node in current:
+            neighbors = edges[1, edges[0] == node]
+            if len(neighbors) > n_sample:
+                neighbors = rng.choice(neighbors, n_sample, replace=False)
+            next_layer.update(neighbors)
+        all_nodes.update(next_layer)
+        current = next_layer
+    subset = np.array(sorted(all_nodes), dtype=np.int64)
+    local = np.full(num_nodes + 1, -1, dtype=np.int64)
+    local[subset] = np.arange(len(subset))
+    mask = (local[edges[0]] >= 0) & (local[edges[1]] >= 0)
+    sub_edges = local[edges[:, mask]]
+    center = int(local[new_node])
+    reorder = np.array([center] + [i for i in range(len(subset)) if i != center])
+    old_to_new = np.empty(len(subset), dtype=np.int64)
+    old_to_new[reorder] = np.arange(len(subset))
+    return subset[reorder], old_to_new[sub_edges]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark subgraph construction per query")
+    parser.add_argument("--num-nodes", type=int, default=169343)
+    parser.add_argument("--num-edges", type=int, default=1166243)
+    parser.add_argument("--citations", type=int, default=15, help="Citations per new paper")
+    parser.add_argument("--num-neighbors", type=int, nargs="+", default=[10, 10, 5])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-queries", type=int, default=5, help="The edge scan is slow; 0 skips it")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    edge_index = rng.integers(0, args.num_nodes, size=(2, args.num_edges))
+    queries = [rng.integers(0, args.num_nodes, size=args.citations) for _ in range(args.queries)]
+    print(f"nodes={args.num_nodes} edges={args.num_edges} citations={args.citations} fan-out={args.num_neighbors}")
+
+    t0 = time.perf_counter()
+    rowptr, col = sampler.build_csr(edge_index, args.num_nodes)
+    print(f"CSR build (once, then cached as .npy)   {(time.perf_counter() - t0) * 1000:9.1f} ms")
+
+    if args.legacy_queries:
+        t0 = time.perf_counter()
+        for cited in queries[:args.legacy_queries]:
+            _legacy_query_graph(edge_index, args.num_nodes, cited, args.num_neighbors, rng)
+        legacy = (time.perf_counter() - t0) * 1000 / args.legacy_queries
+        print(f"legacy edge scan                        {legacy:9.2f} ms/query")
+
+    for batch_size in args.batch_sizes:
+        t0 = time.perf_counter()
+        nodes = 0
+        for start in range(0, len(queries), batch_size):
+            node_ids, _, _ = sampler.sample_query_subgraphs(
+                rowptr, col, queries[start:start + batch_size], args.num_neighbors, rng
+            )
+            nodes += len(node_ids)
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        speedup = f"  x{legacy / ms:7.1f}" if args.legacy_queries else ""
+        print(f"CSR sampler, batch {batch_size:<4d}                {ms:9.3f} ms/query{speedup}  "
+              f"({nodes / len(queries):.0f} nodes/subgraph)")
+
+
+if __name__ == "__main__":
+    main()
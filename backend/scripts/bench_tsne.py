@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Latency of the /tsne-coordinates layout step: per-request sklearn t-SNE on the history + top 35
+points (previous behaviour) vs. lookups on a precomputed map plus kNN interpolation of the
+user vector (services/layout_store.py).
+
+Uses synthetic embeddings and a PCA map by default, so it runs without the real files. Run from
+repo root:
+
+  python -m backend.scripts.bench_tsne --iters 20
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.manifold import TSNE
+
+from ..services import layout_store, recommender
+
+
+def _percentiles(samples: list[float]) -> str:
+    arr = np.array(samples) * 1000.0
+    return f"p50={np.percentile(arr, 50):9.2f} ms  p99={np.percentile(arr, 99):9.2f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-request t-SNE vs precomputed layout")
+    parser.add_argument("--num-nodes", type=int, default=169343)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--history", type=int, default=5)
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    emb = rng.standard_normal((args.num_nodes, args.dim), dtype=np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    layout = layout_store.build_layout(emb, method="pca")
+
+    tsne_times, layout_times = [], []
+    for _ in range(args.iters):
+        history = rng.integers(0, args.num_nodes, size=args.history).tolist()
+        avg = recommender.user_vector(emb, history)
+        recs = recommender.top_k(emb @ avg, 35, exclude=history).tolist()
+        points = history + recs
+
+        t0 = time.perf_counter()
+        TSNE(n_components=2, perplexity=min(30, len(points) - 1), random_state=42).fit_transform(emb[points])
+        tsne_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        layout_store.coordinates(layout, points)
+        # As in the endpoint: the recommendations are the user vector's kNN
+        neighbors = recs[:10]
+        layout_store.interpolate(layout, neighbors, emb[neighbors] @ avg)
+        layout_times.append(time.perf_counter() - t0)
+
+    print(f"nodes={args.num_nodes} points/request={args.history + 35} iters={args.iters}")
+    print(f"per-request t-SNE       : {_percentiles(tsne_times)}")
+    print(f"layout lookup + project : {_percentiles(layout_times)}")
+
+
+if __name__ == "__main__":
+    main()
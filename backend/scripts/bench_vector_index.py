@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Recall@k vs latency for each vector index kind across nprobe / efSearch settings, against the
+exact `embeddings @ q` baseline. Uses the real normalized embeddings if present, else a clustered
+synthetic matrix of the same shape. Run from repo root:
+
+  python -m backend.scripts.bench_vector_index --kinds ivf_flat hnsw ivf_pq
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ..services import embedding_store, vector_index
+from .build_vector_index import sample_queries
+
+
+def _synthetic(num: int, dim: int, clusters: int = 400, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    emb = centers[rng.integers(0, clusters, size=num)] + 0.5 * rng.standard_normal((num, dim), dtype=np.float32)
+    return embedding_store.normalize(emb)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vector index recall vs latency")
+    parser.add_argument("--kinds", nargs="+", choices=vector_index.INDEX_KINDS, default=["ivf_flat", "hnsw", "ivf_pq"])
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-searches", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--k", type=int, default=35)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--num-nodes", type=int, default=169343, help="Synthetic size when no real embeddings")
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    if embedding_store.exists():
+        embeddings = np.ascontiguousarray(embedding_store.get_embeddings())
+        print(f"real embeddings {embeddings.shape}")
+    else:
+        embeddings = _synthetic(args.num_nodes, args.dim)
+        print(f"synthetic clustered embeddings {embeddings.shape}")
+    queries = sample_queries(embeddings, args.queries)
+
+    t0 = time.perf_counter()
+    for q in queries:
+        scores = embeddings @ q
+        np.argpartition(-scores, args.k - 1)[: args.k]
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"exact (numpy)              recall@{args.k}=1.0000  latency={exact_ms:8.3f} ms/query")
+
+    for kind in args.kinds:
+        t0 = time.perf_counter()
+        index = vector_index.build_index(embeddings, kind=kind)
+        print(f"built {kind} in {time.perf_counter() - t0:.1f} s")
+        settings = [("efSearch", v) for v in args.ef_searches] if kind == "hnsw" else [("nprobe", v) for v in args.nprobes]
+        for name, value in settings:
+            vector_index.set_search_params(
+                index,
+                nprobe=value if name == "nprobe" else None,
+                ef_search=value if name == "efSearch" else None,
+            )
+            # One query at a time, as the request path issues them
+            recalls, latency = [], 0.0
+            for q in queries:
+                stats = vector_index.evaluate(index, embeddings, q[None, :], k=args.k)
+                recalls.append(stats["recall"])
+                latency += stats["latency_ms"]
+            label = f"{kind} {name}={value}"
+            print(f"{label:26s} recall@{args.k}={np.mean(recalls):.4f}  latency={latency / len(queries):8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Normalize backend/paper_embeddings_256d.npy once and write the float32 matrix that the backend
+memory-maps (see services/embedding_store.py). Run from repo root:
+
+  python -m backend.scripts.build_embedding_store
+
+Output: backend/data/paper_embeddings_256d.normalized.f32.npy
+"""
+import argparse
+from pathlib import Path
+
+from ..core.config import NORMALIZED_EMBEDDINGS_PATH, PAPER_EMBEDDINGS_PATH
+from ..services import embedding_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the pre-normalized embedding store")
+    parser.add_argument("-i", "--input", type=Path, default=PAPER_EMBEDDINGS_PATH, help="Raw embeddings .npy")
+    parser.add_argument("-o", "--output", type=Path, default=NORMALIZED_EMBEDDINGS_PATH, help="Output .npy path")
+    args = parser.parse_args()
+
+    shape = embedding_store.build(args.input, args.output)
+    print(f"Wrote normalized float32 embeddings {shape} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
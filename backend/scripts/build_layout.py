@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compute the global 2D paper map served by /api/papers/tsne-coordinates (services/layout_store.py).
+Uses openTSNE if installed, else UMAP, else a PCA projection. Run from repo root:
+
+  pip install openTSNE   # or umap-learn
+  python -m backend.scripts.build_layout --method auto
+
+Output: backend/data/paper_layout_2d.f32.npy
+"""
+import argparse
+import time
+from pathlib import Path
+
+from ..core.config import LAYOUT_PATH
+from ..services import embedding_store, layout_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the precomputed 2D paper layout")
+    parser.add_argument("--method", choices=("auto",) + layout_store.LAYOUT_METHODS, default="auto")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Threads for openTSNE")
+    parser.add_argument("-o", "--output", type=Path, default=LAYOUT_PATH, help="Output .npy path")
+    args = parser.parse_args()
+
+    embeddings = embedding_store.get_embeddings()
+    t0 = time.perf_counter()
+    coords = layout_store.build_layout(embeddings, method=args.method, seed=args.seed, n_jobs=args.n_jobs)
+    layout_store.save_layout(coords, args.output)
+    print(f"Wrote {coords.shape} layout to {args.output} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Convert the pickled dict mappings (backend/mag_to_node_idx.npy, backend/node_to_mag_id.npy)
+into dense int64 arrays that the backend memory-maps (see services/node_index.py).
+Run from repo root:
+
+  python -m backend.scripts.build_node_index
+
+Output: backend/data/node_to_mag.int64.npy, mag_sorted_keys.int64.npy, mag_sorted_nodes.int64.npy
+"""
+from ..core.config import MAG_SORTED_KEYS_PATH, MAG_SORTED_NODES_PATH, NODE_TO_MAG_ARRAY_PATH
+from ..services import node_index
+
+
+def main() -> None:
+    node_arr, keys, nodes = node_index.build_from_legacy()
+    node_index.save_arrays(node_arr, keys, nodes)
+    missing = int((node_arr == node_index.MISSING).sum())
+    print(f"Wrote {node_arr.shape[0]} nodes ({missing} without MAG id) to {NODE_TO_MAG_ARRAY_PATH}")
+    print(f"Wrote {keys.shape[0]} sorted MAG ids to {MAG_SORTED_KEYS_PATH} and {MAG_SORTED_NODES_PATH}")
+
+
+if __name__ == "__main__":
+    main()
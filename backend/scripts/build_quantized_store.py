@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Write the compact embedding store used for coarse scoring (services/quantized_store.py) from the
+normalized embeddings. Run from repo root:
+
+  python -m backend.scripts.build_quantized_store --kind int8
+
+Output: backend/data/paper_embeddings_256d.int8.npy + .int8_scales.f32.npy (or .f16.npy)
+"""
+import argparse
+
+from ..services import embedding_store, quantized_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the int8 / float16 embedding store")
+    parser.add_argument("--kind", choices=quantized_store.QUANTIZATION_KINDS, default="int8")
+    args = parser.parse_args()
+
+    embeddings = embedding_store.get_embeddings()
+    paths = quantized_store.build(embeddings, kind=args.kind)
+    mb = sum(p.stat().st_size for p in paths) / 1e6
+    print(f"Wrote {args.kind} store for {embeddings.shape} ({mb:.1f} MB vs {embeddings.nbytes / 1e6:.1f} MB float32): "
+          + ", ".join(str(p) for p in paths))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Convert backend/mag_id_to_title.json (OpenAlex URL -> title) into the node-indexed binary title
+store the backend memory-maps (see services/title_store.py). Run from repo root:
+
+  python -m backend.scripts.build_title_store
+
+Output: backend/data/titles.blob.uint8.npy, backend/data/titles.offsets.int64.npy
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from ..core.config import MAG_ID_TO_TITLE_PATH, TITLE_BLOB_PATH, TITLE_OFFSETS_PATH
+from ..services import title_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the binary title store from mag_id_to_title.json")
+    parser.add_argument("json_path", type=Path, nargs="?", default=MAG_ID_TO_TITLE_PATH)
+    args = parser.parse_args()
+
+    blob, offsets = title_store.build_from_json(args.json_path)
+    title_store.save(blob, offsets)
+    titled = int((np.diff(offsets) > 0).sum())
+    print(f"Wrote {offsets.shape[0] - 1} nodes ({titled} with titles, {blob.nbytes / 2**20:.1f} MB of text)")
+    print(f"  {TITLE_BLOB_PATH}\n  {TITLE_OFFSETS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
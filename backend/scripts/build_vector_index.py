@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Build the ANN vector index over the normalized paper embeddings (see services/vector_index.py),
+save it to backend/data/paper_embeddings.faiss and report recall@k against exact search.
+Run from repo root after `python -m backend.scripts.build_embedding_store`:
+
+  python -m backend.scripts.build_vector_index --kind ivf_flat --nprobe 32
+  python -m backend.scripts.build_vector_index --kind hnsw --hnsw-m 32 --ef-search 128
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from ..core.config import VECTOR_INDEX_PATH
+from ..services import embedding_store, vector_index
+
+
+def sample_queries(embeddings: np.ndarray, num: int, history_len: int = 5, seed: int = 0) -> np.ndarray:
+    """User-like queries: normalized averages of `history_len` random rows."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, embeddings.shape[0], size=(num, history_len))
+    q = np.asarray(embeddings)[rows.ravel()].reshape(num, history_len, -1).mean(axis=1)
+    return (q / np.linalg.norm(q, axis=1, keepdims=True)).astype(np.float32)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the FAISS vector index")
+    parser.add_argument("--kind", choices=vector_index.INDEX_KINDS, default="ivf_flat")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~4*sqrt(N))")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--pq-m", type=int, default=32, help="IVF-PQ sub-quantizers (must divide dim)")
+    parser.add_argument("--pq-bits", type=int, default=8)
+    parser.add_argument("--nprobe", type=int, default=32, help="nprobe used for the recall report")
+    parser.add_argument("--ef-search", type=int, default=128, help="efSearch used for the recall report")
+    parser.add_argument("--k", type=int, default=35)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-o", "--output", type=Path, default=VECTOR_INDEX_PATH)
+    args = parser.parse_args()
+
+    embeddings = embedding_store.get_embeddings()
+    index = vector_index.build_index(
+        embeddings,
+        kind=args.kind,
+        nlist=args.nlist,
+        hnsw_m=args.hnsw_m,
+        ef_construction=args.ef_construction,
+        pq_m=args.pq_m,
+        pq_bits=args.pq_bits,
+    )
+    vector_index.save_index(index, args.output)
+    print(f"Wrote {args.kind} index with {index.ntotal} vectors to {args.output}")
+
+    vector_index.set_search_params(index, nprobe=args.nprobe, ef_search=args.ef_search)
+    stats = vector_index.evaluate(index, embeddings, sample_queries(embeddings, args.queries), k=args.k)
+    print(f"recall@{args.k}={stats['recall']:.4f}  latency={stats['latency_ms']:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Load test /api/papers/paper-info against a local mock OpenAlex server.
+
+Starts a mock /works endpoint (fixed latency) on localhost, points the backend at it and fires
+`--clients` concurrent requests over a pool of hot MAG ids at the async endpoint (pooled
+httpx.AsyncClient + single-flight coalescing). The metadata cache is disabled so every request needs OpenAlex. Run from repo root:
+
+  python -m backend.scripts.loadtest_openalex --clients 500 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_mock_openalex(port: int, latency_s: float) -> dict:
+    """Serve a fake OpenAlex /works endpoint in a background thread; returns a call counter."""
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    calls = {"n": 0}
+
+    async def works(request):
+        calls["n"] += 1
+        await asyncio.sleep(latency_s)
+        mag = request.query_params.get("filter", "").split(":")[-1]
+        return JSONResponse({"results": [{"doi": f"https://doi.org/10.0/{mag}", "abstract_inverted_index": {"mock": [0]}}]})
+
+    server = uvicorn.Server(uvicorn.Config(Starlette(routes=[Route("/works", works)]), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return calls
+
+
+async def _run(app, mag_ids: list[str], clients: int) -> list[float]:
+    import httpx
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for m in mag_ids:
+        queue.put_nowait(m)
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend") as client:
+
+        async def worker():
+            while not queue.empty():
+                mag = queue.get_nowait()
+                t0 = time.perf_counter()
+                resp = await client.get("/api/papers/paper-info", params={"mag_id": mag})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test paper-info against a mock OpenAlex")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--hot-ids", type=int, default=200, help="Distinct MAG ids requested")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock OpenAlex latency")
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ["OPENALEX_API_URL"] = f"http://127.0.0.1:{port}"
+    calls = _start_mock_openalex(port, args.latency_ms / 1000.0)
+
+    from ..main import app
+    from ..services import metadata_cache, node_index, title_store
+
+    # Synthetic titles so the benchmark doesn't need mag_id_to_title.json
+    urls = node_index.node_ids_to_mag_urls(np.arange(node_index.node_to_mag_array().shape[0]))
+    title_store._blob, title_store._offsets = title_store.build_from_mapping({u: "Mock title" for u in urls if u})
+    # No caching: every request has to be answered by (coalesced) upstream calls
+    metadata_cache._cache = metadata_cache.MetadataCache(path=None, max_entries=0)
+
+    rng = np.random.default_rng(0)
+    numeric = node_index.node_to_mag_array()[rng.choice(len(urls), size=args.hot_ids, replace=False)]
+    mag_ids = [str(m) for m in rng.choice(numeric, size=args.requests)]
+
+    t0 = time.perf_counter()
+    lat = asyncio.run(_run(app, mag_ids, args.clients))
+    elapsed = time.perf_counter() - t0
+    ms = np.array(lat) * 1000
+    print(
+        f"clients={args.clients} requests={len(lat)} "
+        f"throughput={len(lat) / elapsed:8.1f} req/s  p50={np.percentile(ms, 50):8.1f} ms  "
+        f"p99={np.percentile(ms, 99):8.1f} ms  upstream_calls={calls['n']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
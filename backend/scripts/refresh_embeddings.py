@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Incrementally refresh paper embeddings after new citation edges / new papers arrive.
+
+Takes a delta of new edges (and optionally new papers' features), adds it to the graph bundle
+(ml_pipeline/src/graph_bundle.py), finds the affected frontier over the CSR graph (the edges'
+targets and new papers, then num_layers hops along out-edges: a node's embedding only changes if
+something within num_layers hops upstream of it changed), re-embeds just those nodes exactly
+(ml_pipeline/src/layerwise_inference.py `subset_inference`) and writes a delta segment that running
+backends merge over the base embeddings and ANN index on their next poll (services/embedding_delta.py).
+The grown graph is written as a new bundle version. Needs torch + torch_geometric. Run from repo root:
+
+  python -m backend.scripts.refresh_embeddings --edges new_edges.npy \
+      [--new-features new_feat.npy] [--new-papers new_papers.json]
+
+--edges: int64 (2, E) citing -> cited node ids; new papers are numbered from the current node count.
+New papers without --new-features get the model's mask token as features (the same stand-in the
+model uses for a paper whose own features are unknown).
+--new-papers: JSON list, one {"mag_id": ..., "title": ...} per new paper in node order. Their MAG
+ids and titles are appended to the node index and title store (services/node_index.py,
+services/title_store.py), which running backends reload on their next poll. Only papers with both
+can be recommended or looked up; without --new-papers new papers get embeddings but stay hidden.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ml_pipeline.src import graph_bundle, sampler
+
+from ..core.config import GNN_MODEL_PATH, GRAPH_BUNDLE_DIR
+from ..services import embedding_delta, embedding_store, gnn_service, node_index, title_store
+
+# Rows copied per step when rewriting the features file
+COPY_CHUNK_ROWS = 65536
+
+
+def affected_nodes(rowptr: np.ndarray, col: np.ndarray, seeds: np.ndarray, num_hops: int) -> np.ndarray:
+    """Seeds plus every node reachable from them within num_hops out-edges (sorted)."""
+    affected = np.unique(seeds)
+    frontier = affected
+    for _ in range(num_hops):
+        frontier = np.setdiff1d(sampler.gather_neighbors(rowptr, col, frontier), affected)
+        if len(frontier) == 0:
+            break
+        affected = np.union1d(affected, frontier)
+    return affected
+
+
+def _append_features(features: np.ndarray, new_rows: np.ndarray) -> Path:
+    """Stage features with new_rows appended as an .npy in the bundle directory (chunked copy)."""
+    path = GRAPH_BUNDLE_DIR / ".node_feat.staged.npy"
+    out = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.float32, shape=(features.shape[0] + len(new_rows), features.shape[1])
+    )
+    for start in range(0, features.shape[0], COPY_CHUNK_ROWS):
+        out[start:start + COPY_CHUNK_ROWS] = features[start:start + COPY_CHUNK_ROWS]
+    out[features.shape[0]:] = new_rows
+    out.flush()
+    del out
+    return path
+
+
+def _load_new_papers(path: Path) -> tuple[np.ndarray, list[str | None]]:
+    """(MAG ids, titles) from a JSON list of {"mag_id", "title"}; MISSING / None where absent."""
+    with open(path, encoding="utf-8") as f:
+        papers = json.load(f)
+    mag_ids = np.full(len(papers), node_index.MISSING, dtype=np.int64)
+    titles: list[str | None] = []
+    for i, paper in enumerate(papers):
+        mag_id = str(paper.get("mag_id") or "").strip().removeprefix(node_index.OPENALEX_URL_PREFIX).removeprefix("W")
+        if mag_id:
+            if not mag_id.isdigit() or int(mag_id) > np.iinfo(np.int64).max:
+                raise SystemExit(f"--new-papers[{i}]: invalid MAG id {paper.get('mag_id')!r}")
+            mag_ids[i] = int(mag_id)
+        titles.append(paper.get("title") or None)
+    return mag_ids, titles
+
+
+def _check_new_mag_ids(mag_ids: np.ndarray, num_old: int) -> None:
+    """Exit if a new MAG id repeats or already belongs to another node (a rerun may remap its own)."""
+    known = mag_ids[mag_ids != node_index.MISSING]
+    values, counts = np.unique(known, return_counts=True)
+    if (counts > 1).any():
+        raise SystemExit(f"--new-papers repeats MAG ids: {values[counts > 1][:5].tolist()}")
+    existing = node_index.mag_ids_to_node_ids(mag_ids)
+    expected = num_old + np.arange(len(mag_ids))
+    clash = (mag_ids != node_index.MISSING) & (existing != node_index.MISSING) & (existing != expected)
+    if clash.any():
+        raise SystemExit(f"--new-papers MAG ids already in the node index: {mag_ids[clash][:5].tolist()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-embed papers affected by new edges and write a delta segment")
+    parser.add_argument("--edges", type=Path, required=True, help="int64 .npy (2, E), citing -> cited")
+    parser.add_argument("--new-features", type=Path, default=None, help="float32 .npy (num_new, 384)")
+    parser.add_argument("--new-papers", type=Path, default=None,
+                        help='JSON list of {"mag_id", "title"} per new paper (makes them servable)')
+    parser.add_argument("--num-new", type=int, default=None, help="New papers (default: from ids / features)")
+    parser.add_argument("--model", choices=["v3", "v4"], default="v3")
+    parser.add_argument("--checkpoint", type=Path, default=GNN_MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    parser.add_argument("--dry-run", action="store_true", help="Only report the affected frontier")
+    args = parser.parse_args()
+
+    import torch
+    from ml_pipeline.src.layerwise_inference import MODELS, subset_inference
+
+    t0 = time.perf_counter()
+    bundle = graph_bundle.load(GRAPH_BUNDLE_DIR)
+    features = bundle.node_feat
+    num_old = bundle.num_nodes
+
+    new_edges = np.unique(np.asarray(np.load(args.edges), dtype=np.int64).reshape(2, -1), axis=1)
+    new_features = np.load(args.new_features) if args.new_features is not None else None
+    new_mag_ids, new_titles = _load_new_papers(args.new_papers) if args.new_papers is not None else (None, None)
+    num_new = args.num_new
+    if num_new is None:
+        if new_features is not None:
+            num_new = len(new_features)
+        elif new_mag_ids is not None:
+            num_new = len(new_mag_ids)
+        else:
+            num_new = max(0, int(new_edges.max(initial=-1)) + 1 - num_old)
+    num_nodes = num_old + num_new
+    if new_edges.size and (new_edges.min() < 0 or new_edges.max() >= num_nodes):
+        raise SystemExit(f"Edge ids must be in [0, {num_nodes}) ({num_old} existing + {num_new} new papers)")
+    if new_features is not None and new_features.shape != (num_new, features.shape[1]):
+        raise SystemExit(f"--new-features must have shape ({num_new}, {features.shape[1]}), got {new_features.shape}")
+    if new_mag_ids is not None:
+        if len(new_mag_ids) != num_new:
+            raise SystemExit(f"--new-papers must list {num_new} papers, got {len(new_mag_ids)}")
+        _check_new_mag_ids(new_mag_ids, num_old)
+    else:
+        new_mag_ids = np.full(num_new, node_index.MISSING, dtype=np.int64)
+        new_titles = [None] * num_new
+        if num_new:
+            print(f"⚠️ No --new-papers: the {num_new} new papers get embeddings but no MAG id or title, "
+                  "so they cannot be recommended or looked up")
+
+    edge_index = np.concatenate([bundle.edge_index, new_edges], axis=1)
+    rowptr, col = sampler.build_csr(edge_index, num_nodes)
+
+    model = MODELS[args.model](
+        gnn_service.INPUT_DIM, gnn_service.HIDDEN_DIM, gnn_service.OUTPUT_DIM, num_layers=gnn_service.NUM_LAYERS
+    )
+    model.load_state_dict(torch.load(args.checkpoint, map_location="cpu"))
+    # Targets of new edges gain an in-neighbour; new papers are new rows
+    seeds = np.concatenate([new_edges[1], np.arange(num_old, num_nodes, dtype=np.int64)])
+    affected = affected_nodes(rowptr, col, seeds, model.num_layers)
+    print(f"{new_edges.shape[1]} new edges, {num_new} new papers -> {len(affected)} affected nodes "
+          f"({100 * len(affected) / num_nodes:.2f}% of {num_nodes})")
+    if args.dry_run or len(affected) == 0:
+        return
+
+    node_feat = features
+    if num_new:
+        if new_features is None:
+            mask = model.mask_embed if args.model == "v3" else model.mask_token
+            new_features = np.tile(mask.detach().numpy().astype(np.float32), (num_new, 1))
+        node_feat = _append_features(features, new_features)
+        features = np.load(node_feat, mmap_mode="r")
+
+    colptr, row = sampler.build_csc(edge_index, num_nodes)
+    node_ids, embeddings = subset_inference(model, features, colptr, row, affected, args.chunk_size)
+    path = embedding_delta.write_segment(node_ids, embeddings, embedding_store.version())
+    if num_new:
+        # Workers serve a new paper once they have reloaded both its delta row and its mapping
+        node_index.save_arrays(*node_index.extend(num_old, new_mag_ids))
+        title_store.save(*title_store.extend(num_old, new_titles))
+    # Graph last: a failed run leaves the old bundle current, so rerunning the same delta recomputes
+    # the same frontier (and remaps the same new papers). New papers have no OGB label or year (-1)
+    unknown = np.full(num_new, -1, dtype=np.int64)
+    new_bundle = graph_bundle.write(
+        {
+            "node_feat": node_feat,
+            "edge_index": edge_index,
+            "csr_rowptr": rowptr,
+            "csr_col": col,
+            "csc_colptr": colptr,
+            "csc_row": row,
+            **{name: np.concatenate([bundle.arrays[name], unknown]) for name in ("labels", "node_year")},
+            "node_mag_id": np.concatenate([bundle.node_mag_id, new_mag_ids]),
+            **{f"split_{name}": ids for name, ids in bundle.split().items()},
+        },
+        {
+            **{k: bundle.manifest[k] for k in ("source", "semantic_features") if k in bundle.manifest},
+            "parent": bundle.version,
+            "added_nodes": num_new,
+            "added_edges": int(new_edges.shape[1]),
+        },
+        GRAPH_BUNDLE_DIR,
+    )
+    print(f"✅ Wrote {path} ({len(node_ids)} rows) and graph bundle {new_bundle.version} "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,213 @@
-"""Update Auth0 user_metadata (e.g. node history) via Management API."""
+"""Update Auth0 user_metadata (e.g. node history) via Management API.
+
+The M2M token is cached until shortly before it expires (one refresh at a time), and each user's
+node_history is cached per worker for a short TTL and updated on write (write-through).
+"""
+import asyncio
+import threading
+import time
 from typing import List
 from urllib.parse import quote
 
 import httpx
 from fastapi import HTTPException, status
 
+from ..core import http, metrics
 from ..core.config import (
+    AUTH0_BASE_URL,
     AUTH0_DOMAIN,
+    AUTH0_HISTORY_CACHE_TTL_S,
     AUTH0_MANAGEMENT_AUDIENCE,
     AUTH0_M2M_CLIENT_ID,
     AUTH0_M2M_CLIENT_SECRET,
+    AUTH0_TOKEN_REFRESH_MARGIN_S,
+    NODE_HISTORY_MAX_SIZE,
 )
 
 NODE_HISTORY_KEY = "node_history"
-NODE_HISTORY_MAX_SIZE = 5
+# Used when the token response has no expires_in
+DEFAULT_TOKEN_LIFETIME_S = 3600
 
 
-def _get_m2m_token() -> str:
-    if not AUTH0_DOMAIN or not AUTH0_M2M_CLIENT_ID or not AUTH0_M2M_CLIENT_SECRET:
+class _TokenCache:
+    """Cached M2M token; refreshes are single-flight (sync callers via a thread lock, async via an asyncio lock)."""
+
+    def __init__(self):
+        self.token: str | None = None
+        self.expires_at = 0.0
+        self.thread_lock = threading.Lock()
+        self._async_lock: asyncio.Lock | None = None
+
+    def valid(self) -> str | None:
+        if self.token and time.monotonic() < self.expires_at - AUTH0_TOKEN_REFRESH_MARGIN_S:
+            return self.token
+        return None
+
+    def store(self, token: str, expires_in: float) -> str:
+        self.token = token
+        self.expires_at = time.monotonic() + expires_in
+        return token
+
+    def async_lock(self) -> asyncio.Lock:
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        return self._async_lock
+
+
+_token_cache = _TokenCache()
+# user id -> (expires_at, node_history)
+_history_cache: dict[str, tuple[float, List[str]]] = {}
+
+
+def configured() -> bool:
+    """Whether the Management API credentials are set."""
+    return bool(AUTH0_DOMAIN and AUTH0_M2M_CLIENT_ID and AUTH0_M2M_CLIENT_SECRET)
+
+
+def _token_request() -> tuple[str, dict]:
+    if not configured():
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Auth0 Management API not configured (AUTH0_DOMAIN, AUTH0_M2M_CLIENT_ID, AUTH0_M2M_CLIENT_SECRET)",
         )
-    url = f"https://{AUTH0_DOMAIN}/oauth/token"
+    url = f"{AUTH0_BASE_URL}/oauth/token"
     payload = {
         "grant_type": "client_credentials",
         "client_id": AUTH0_M2M_CLIENT_ID,
         "client_secret": AUTH0_M2M_CLIENT_SECRET,
         "audience": AUTH0_MANAGEMENT_AUDIENCE,
     }
-    with httpx.Client() as client:
-        resp = client.post(url, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
+    return url, payload
+
+
+def _token_from_response(resp: httpx.Response) -> str:
+    resp.raise_for_status()
+    data = resp.json()
     access_token = data.get("access_token")
     if not access_token:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Failed to obtain Auth0 Management API token",
         )
-    return access_token
+    return _token_cache.store(access_token, float(data.get("expires_in") or DEFAULT_TOKEN_LIFETIME_S))
+
 
+def _user_url(user_id: str) -> str:
+    return f"{AUTH0_BASE_URL}/api/v2/users/{quote(user_id, safe='')}"
 
-def _get_user_metadata(user_id: str, token: str) -> dict:
-    """Get user record; return user_metadata dict (empty if missing)."""
-    encoded_id = quote(user_id, safe="")
-    url = f"https://{AUTH0_DOMAIN}/api/v2/users/{encoded_id}"
-    with httpx.Client() as client:
-        resp = client.get(
-            url,
-            headers={"Authorization": f"Bearer {token}"},
+
+def _check_user_response(resp: httpx.Response) -> None:
+    if resp.status_code == 404:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
         )
-        if resp.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found",
-            )
-        resp.raise_for_status()
-        data = resp.json()
-    return data.get("user_metadata") or {}
+    resp.raise_for_status()
+
+
+def _get_m2m_token() -> str:
+    token = _token_cache.valid()
+    if token:
+        metrics.incr("auth0_token.hit")
+        return token
+    with _token_cache.thread_lock:
+        # Another thread may have refreshed while we waited
+        token = _token_cache.valid()
+        if token:
+            metrics.incr("auth0_token.hit")
+            return token
+        metrics.incr("auth0_token.miss")
+        url, payload = _token_request()
+        return _token_from_response(http.get_client().post(url, json=payload))
+
+
+async def _get_m2m_token_async() -> str:
+    token = _token_cache.valid()
+    if token:
+        metrics.incr("auth0_token.hit")
+        return token
+    async with _token_cache.async_lock():
+        token = _token_cache.valid()
+        if token:
+            metrics.incr("auth0_token.hit")
+            return token
+        metrics.incr("auth0_token.miss")
+        url, payload = _token_request()
+        return _token_from_response(await http.get_async_client().post(url, json=payload))
+
+
+async def _get_user_metadata_async(user_id: str, token: str) -> dict:
+    resp = await http.get_async_client().get(_user_url(user_id), headers={"Authorization": f"Bearer {token}"})
+    _check_user_response(resp)
+    return resp.json().get("user_metadata") or {}
 
 
 def _patch_user_metadata(user_id: str, token: str, user_metadata: dict) -> None:
-    encoded_id = quote(user_id, safe="")
-    url = f"https://{AUTH0_DOMAIN}/api/v2/users/{encoded_id}"
-    with httpx.Client() as client:
-        resp = client.patch(
-            url,
-            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-            json={"user_metadata": user_metadata},
-        )
-        if resp.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found",
-            )
-        resp.raise_for_status()
+    resp = http.get_client().patch(
+        _user_url(user_id),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        json={"user_metadata": user_metadata},
+    )
+    _check_user_response(resp)
 
 
-def get_node_history(user_id: str) -> List[str]:
-    """
-    Return the user's node_history from Auth0 user_metadata (max 5, newest last).
-    Returns [] if not set or Auth0 not configured.
-    """
-    try:
-        token = _get_m2m_token()
-        meta = _get_user_metadata(user_id, token)
-        history = list(meta.get(NODE_HISTORY_KEY) or [])
-        if not isinstance(history, list):
-            return []
-        return [str(x) for x in history if x is not None][-NODE_HISTORY_MAX_SIZE:]
-    except HTTPException:
-        raise
-    except Exception:
+def _history_from_metadata(meta: dict) -> List[str]:
+    history = meta.get(NODE_HISTORY_KEY) or []
+    if not isinstance(history, list):
         return []
+    return [str(x) for x in history if x is not None]
 
 
-def append_node_to_history(user_id: str, node_id: str) -> List[str]:
-    """
-    Append node_id to the user's node_history in Auth0 user_metadata.
-    Keeps at most NODE_HISTORY_MAX_SIZE (5) entries, newest last.
-    Returns the updated history list.
-    """
-    token = _get_m2m_token()
-    meta = _get_user_metadata(user_id, token)
-    history: List[str] = list(meta.get(NODE_HISTORY_KEY) or [])
-    if not isinstance(history, list):
-        history = []
-    # Ensure string ids and remove duplicates (keep last occurrence)
-    history = [str(x) for x in history if x is not None]
+def _appended_history(history: List[str], node_id: str, max_size: int = NODE_HISTORY_MAX_SIZE) -> List[str]:
+    """History with node_id moved/appended to the end (deduplicated), trimmed to the max size."""
+    history = list(history)
     if node_id in history:
         history.remove(node_id)
     history.append(str(node_id))
-    history = history[-NODE_HISTORY_MAX_SIZE:]
-    meta[NODE_HISTORY_KEY] = history
-    _patch_user_metadata(user_id, token, meta)
+    return history[-max_size:]
+
+
+def _cached_history(user_id: str) -> List[str] | None:
+    entry = _history_cache.get(user_id)
+    if entry is not None and entry[0] > time.monotonic():
+        metrics.incr("auth0_history.hit")
+        return list(entry[1])
+    metrics.incr("auth0_history.miss")
+    return None
+
+
+def _cache_history(user_id: str, history: List[str]) -> List[str]:
+    _history_cache[user_id] = (time.monotonic() + AUTH0_HISTORY_CACHE_TTL_S, list(history))
     return history
+
+
+def invalidate_history(user_id: str) -> None:
+    _history_cache.pop(user_id, None)
+
+
+async def _read_history_async(user_id: str) -> List[str]:
+    cached = _cached_history(user_id)
+    if cached is not None:
+        return cached
+    token = await _get_m2m_token_async()
+    history = _history_from_metadata(await _get_user_metadata_async(user_id, token))
+    return _cache_history(user_id, history)
+
+
+async def get_node_history_async(user_id: str) -> List[str]:
+    """
+    Return the user's node_history from Auth0 user_metadata (max NODE_HISTORY_MAX_SIZE, newest last).
+    Returns [] if not set; raises on Auth0 errors (HTTPException 404 if the user is unknown).
+    """
+    return (await _read_history_async(user_id))[-NODE_HISTORY_MAX_SIZE:]
+
+
+def replace_node_history(user_id: str, history: List[str]) -> None:
+    """Overwrite the user's node_history in Auth0 (write-behind from the local history store)."""
+    history = [str(x) for x in history][-NODE_HISTORY_MAX_SIZE:]
+    try:
+        _patch_user_metadata(user_id, _get_m2m_token(), {NODE_HISTORY_KEY: history})
+    except Exception:
+        invalidate_history(user_id)
+        raise
+    _cache_history(user_id, history)
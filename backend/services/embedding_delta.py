@@ -0,0 +1,168 @@
+"""Embedding delta segments merged over the base embedding matrix at runtime (no restart).
+
+`python -m backend.scripts.refresh_embeddings` re-embeds the papers affected by new citation edges
+/ new papers and writes EMBEDDING_DELTA_DIR/segment-<seq>.npz holding `node_ids` (int64),
+`embeddings` (float32) and `base_version` (the manifest version of the base matrix it was computed
+against). Segments apply in name order, later rows win; ids >= the base row count are new papers.
+
+Every process re-lists the directory at most every EMBEDDING_DELTA_POLL_S seconds and rebuilds its
+`Overlay` when the segment set changes. The overlay keeps the base memmap untouched: row lookups
+and `@` patch in the (few) delta rows. The ANN index and the quantized store only know the base
+rows, so their results drop replaced rows and are merged with exact scores of the delta rows.
+Segments for another base version are ignored; fold them in by regenerating the base matrix.
+"""
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ..core.config import EMBEDDING_DELTA_DIR, EMBEDDING_DELTA_POLL_S
+from . import embedding_store
+
+SEGMENT_GLOB = "segment-*.npz"
+
+_overlay = None
+_fingerprint: tuple | None = None
+_last_poll = 0.0
+_lock = threading.Lock()
+
+
+class Overlay:
+    """Base embedding matrix with delta rows replaced or appended; supports .shape, [ids] and @."""
+
+    def __init__(self, base: np.ndarray, node_ids: np.ndarray, vectors: np.ndarray, version: str):
+        self.base = base
+        self.node_ids = node_ids  # sorted, unique
+        self.vectors = vectors  # normalized float32, row i = node node_ids[i]
+        self.version = version
+        self.num_base = base.shape[0]
+        self.shape = (max(self.num_base, int(node_ids[-1]) + 1), base.shape[1])
+        # Base rows the delta replaces (stale in the ANN index / quantized store)
+        self.replaced = node_ids[node_ids < self.num_base]
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        out = np.zeros(ids.shape + (self.shape[1],), dtype=np.float32)
+        in_base = ids < self.num_base
+        out[in_base] = self.base[ids[in_base]]
+        pos = np.minimum(np.searchsorted(self.node_ids, ids), len(self.node_ids) - 1)
+        hit = self.node_ids[pos] == ids
+        out[hit] = self.vectors[pos[hit]]
+        return out
+
+    def __matmul__(self, queries: np.ndarray) -> np.ndarray:
+        return self.patch_scores(self.base @ queries, queries)
+
+    def patch_scores(self, base_scores: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Extend (num_base,) or (num_base, B) scores to all rows, with exact scores for delta rows."""
+        out = np.zeros((self.shape[0],) + base_scores.shape[1:], dtype=np.float32)
+        out[:self.num_base] = base_scores
+        out[self.node_ids] = self.vectors @ np.asarray(queries, dtype=np.float32)
+        return out
+
+
+def segment_paths(directory: Path = EMBEDDING_DELTA_DIR) -> list[Path]:
+    return sorted(directory.glob(SEGMENT_GLOB))
+
+
+def write_segment(
+    node_ids: np.ndarray,
+    embeddings: np.ndarray,
+    base_version: str | None,
+    directory: Path = EMBEDDING_DELTA_DIR,
+) -> Path:
+    """Atomically write the next segment (unnormalized embeddings are fine). Returns its path."""
+    directory.mkdir(parents=True, exist_ok=True)
+    existing = segment_paths(directory)
+    seq = int(existing[-1].stem.split("-")[1]) + 1 if existing else 1
+    path = directory / f"segment-{seq:06d}.npz"
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            node_ids=np.asarray(node_ids, dtype=np.int64),
+            embeddings=np.asarray(embeddings, dtype=np.float32),
+            base_version=np.array(base_version or ""),
+        )
+    tmp.replace(path)
+    return path
+
+
+def _load(base: np.ndarray, paths: list[Path]) -> Overlay | None:
+    base_version = embedding_store.version() or ""
+    rows: dict[int, np.ndarray] = {}
+    for path in paths:
+        try:
+            with np.load(path) as seg:
+                if str(seg["base_version"]) != base_version:
+                    print(f"⚠️ Ignoring {path.name}: computed for base {str(seg['base_version']) or 'unknown'}")
+                    continue
+                for node_id, vec in zip(seg["node_ids"].tolist(), seg["embeddings"]):
+                    rows[node_id] = vec
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Skipping unreadable embedding delta {path.name}: {e}")
+    if not rows:
+        return None
+    node_ids = np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+    vectors = embedding_store.normalize(np.stack([rows[n] for n in node_ids.tolist()]))
+    print(f"✅ Loaded embedding delta: {len(node_ids)} rows from {len(paths)} segment(s)")
+    return Overlay(base, node_ids, vectors, "|".join(p.name for p in paths))
+
+
+def merged(base: np.ndarray):
+    """`base` with the current delta segments applied (an Overlay), or `base` itself if there are none."""
+    global _overlay, _fingerprint, _last_poll
+    now = time.monotonic()
+    if now - _last_poll >= EMBEDDING_DELTA_POLL_S:
+        with _lock:
+            if now - _last_poll >= EMBEDDING_DELTA_POLL_S:
+                paths = segment_paths()
+                fingerprint = tuple((p.name, p.stat().st_mtime_ns) for p in paths)
+                if fingerprint != _fingerprint or (_overlay is not None and _overlay.base is not base):
+                    _overlay = _load(base, paths) if paths else None
+                    _fingerprint = fingerprint
+                _last_poll = now
+    return _overlay if _overlay is not None else base
+
+
+def index_servable(embeddings, servable: np.ndarray) -> np.ndarray:
+    """Servable mask for results from base-only structures (ANN index): replaced rows are stale."""
+    if not isinstance(embeddings, Overlay) or len(embeddings.replaced) == 0:
+        return servable
+    servable = servable.copy()
+    servable[embeddings.replaced] = False
+    return servable
+
+
+def patch_scores(embeddings, base_scores: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Scores from base-only structures (quantized store) extended with exact delta-row scores."""
+    if not isinstance(embeddings, Overlay):
+        return base_scores
+    return embeddings.patch_scores(base_scores, queries)
+
+
+def merge_top_k(
+    embeddings,
+    found: tuple[np.ndarray, np.ndarray],
+    query: np.ndarray,
+    k: int,
+    servable: np.ndarray | None = None,
+    exclude=None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge base-index top-k (ids, scores) with the delta rows' exact scores."""
+    if not isinstance(embeddings, Overlay):
+        return found
+    ids, scores = found
+    keep = np.ones(len(embeddings.node_ids), dtype=bool)
+    if servable is not None:
+        keep &= servable[embeddings.node_ids]
+    if exclude is not None and len(exclude):
+        keep &= ~np.isin(embeddings.node_ids, np.asarray(exclude, dtype=np.int64))
+    ids = np.concatenate([ids, embeddings.node_ids[keep]])
+    scores = np.concatenate([scores, embeddings.vectors[keep] @ query])
+    order = np.argsort(-scores, kind="stable")[:k]
+    return ids[order].astype(np.int64), scores[order]
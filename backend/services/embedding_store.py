@@ -0,0 +1,80 @@
+"""Single, memory-mapped copy of the L2-normalized paper embedding matrix.
+
+`python -m backend.scripts.build_embedding_store` normalizes paper_embeddings_256d.npy once and
+writes a float32 file that every worker opens with np.load(mmap_mode="r"), so N uvicorn/gunicorn
+workers share one page-cache copy instead of each holding their own normalized array.
+If the pre-normalized file is missing, the raw file is normalized in memory (one copy per process).
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ..core.config import NORMALIZED_EMBEDDINGS_PATH, PAPER_EMBEDDINGS_MANIFEST_PATH, PAPER_EMBEDDINGS_PATH
+
+# Rows normalized per chunk while building (bounds peak memory of the build step)
+BUILD_CHUNK_ROWS = 16384
+
+# L2-normalized embeddings, shape (num_nodes, 256); memmap when the built file exists
+_embeddings: np.ndarray | None = None
+# Normalized mean of all embeddings; user vector when there is no history
+_mean_vector: np.ndarray | None = None
+
+
+def normalize(emb: np.ndarray) -> np.ndarray:
+    """Return float32 rows scaled to unit L2 norm."""
+    emb = np.asarray(emb, dtype=np.float32)
+    return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+
+def build(src: Path = PAPER_EMBEDDINGS_PATH, dst: Path = NORMALIZED_EMBEDDINGS_PATH) -> tuple[int, int]:
+    """Normalize `src` chunk by chunk into a float32 .npy at `dst`. Returns the matrix shape."""
+    if not src.exists():
+        raise FileNotFoundError(f"Embeddings not found: {src}")
+    raw = np.load(src, mmap_mode="r")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".tmp")
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=raw.shape)
+    for start in range(0, raw.shape[0], BUILD_CHUNK_ROWS):
+        out[start:start + BUILD_CHUNK_ROWS] = normalize(raw[start:start + BUILD_CHUNK_ROWS])
+    out.flush()
+    del out
+    tmp.replace(dst)
+    return raw.shape
+
+
+def exists() -> bool:
+    """True if either the pre-normalized or the raw embedding file is present."""
+    return NORMALIZED_EMBEDDINGS_PATH.exists() or PAPER_EMBEDDINGS_PATH.exists()
+
+
+def version() -> str | None:
+    """Version id from the embeddings' manifest (written by layer-wise inference), or None."""
+    try:
+        return json.loads(PAPER_EMBEDDINGS_MANIFEST_PATH.read_text()).get("version")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def get_embeddings() -> np.ndarray:
+    """Return the normalized embedding matrix (read-only memmap if built, else in-memory)."""
+    global _embeddings
+    if _embeddings is None:
+        if NORMALIZED_EMBEDDINGS_PATH.exists():
+            _embeddings = np.load(NORMALIZED_EMBEDDINGS_PATH, mmap_mode="r")
+        elif PAPER_EMBEDDINGS_PATH.exists():
+            print("⚠️ Pre-normalized embeddings not built, normalizing in memory (run backend.scripts.build_embedding_store)")
+            _embeddings = normalize(np.load(PAPER_EMBEDDINGS_PATH))
+        else:
+            raise FileNotFoundError(f"Embeddings not found: {NORMALIZED_EMBEDDINGS_PATH} or {PAPER_EMBEDDINGS_PATH}")
+    return _embeddings
+
+
+def get_mean_vector() -> np.ndarray:
+    """Normalized mean embedding (computed once)."""
+    global _mean_vector
+    if _mean_vector is None:
+        mean = get_embeddings().mean(axis=0, dtype=np.float32)
+        _mean_vector = mean / np.linalg.norm(mean)
+    return _mean_vector
+
@@ -0,0 +1,126 @@
+"""Inductive GNN embeddings for new papers from their citation lists.
+
+Same procedure as ml_pipeline/src/gnn_embed_new.py (new node -> cited papers, sampled out-neighbour
+hops, induced subgraph, EmbedderGNNv3 with the new paper masked at index 0), but without touching
+the whole graph per query: the citation graph is kept as CSR arrays (rowptr/col, memory-mapped), so
+each hop reads only the sampled nodes' adjacency slices (ml_pipeline/src/sampler.py), and only the
+subgraph's feature rows are copied.
+
+The graph comes from the graph bundle (`python ml_pipeline/src/graph_bundle.py`). torch /
+torch_geometric are optional: without them (or without the bundle / model files) `available()` is False.
+"""
+import hashlib
+import threading
+
+import numpy as np
+
+from ml_pipeline.src import graph_bundle, sampler
+
+from ..core.config import GNN_BATCH_SIZE, GNN_MODEL_PATH, GNN_NUM_NEIGHBORS, GRAPH_BUNDLE_DIR
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Must match the trained checkpoint (see gnn_embed_new.py)
+INPUT_DIM = 384  # 128 (OGB) + 256 (Qwen)
+HIDDEN_DIM = 256
+OUTPUT_DIM = 256
+NUM_LAYERS = 4
+
+# (features, rowptr, col); features row i = node i, out-neighbours of i = col[rowptr[i]:rowptr[i + 1]]
+_graph: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+_model = None
+_lock = threading.Lock()
+
+
+def unavailable_reason() -> str | None:
+    """Why the service cannot run, or None if it can."""
+    if torch is None:
+        return "torch is not installed (pip install torch torch-geometric)"
+    if graph_bundle.current_version(GRAPH_BUNDLE_DIR) is None:
+        return f"No graph bundle in {GRAPH_BUNDLE_DIR} (run ml_pipeline/src/graph_bundle.py)"
+    if not GNN_MODEL_PATH.exists():
+        return f"GNN model not found: {GNN_MODEL_PATH}"
+    return None
+
+
+def available() -> bool:
+    return unavailable_reason() is None
+
+
+def _load_graph() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    global _graph
+    if _graph is None:
+        bundle = graph_bundle.load(GRAPH_BUNDLE_DIR)
+        print(f"✅ Loaded graph bundle {bundle.version} ({bundle.num_nodes} nodes, {bundle.num_edges} edges)")
+        _graph = (bundle.node_feat, bundle.csr_rowptr, bundle.csr_col)
+    return _graph
+
+
+def _load_model():
+    global _model
+    with _lock:
+        if _model is None:
+            from ml_pipeline.src.model import EmbedderGNNv3
+
+            model = EmbedderGNNv3(INPUT_DIM, HIDDEN_DIM, OUTPUT_DIM, num_layers=NUM_LAYERS)
+            model.load_state_dict(torch.load(GNN_MODEL_PATH, map_location="cpu"))
+            model.eval()
+            _model = model
+    return _model
+
+
+def _query_rng(cited_node_ids) -> np.random.Generator:
+    """Seed sampling from the citation set so the same query always gets the same embedding."""
+    key = np.unique(np.asarray(cited_node_ids, dtype=np.int64)).tobytes()
+    return np.random.default_rng(int.from_bytes(hashlib.sha256(key).digest()[:8], "little"))
+
+
+def _query_inputs(features: np.ndarray, rowptr: np.ndarray, col: np.ndarray, cited_node_ids) -> tuple[np.ndarray, np.ndarray]:
+    """Model inputs (x, edge_index) for one new paper, which sits at local index 0."""
+    # One query per sampler call keeps each paper's sample (and embedding) independent of the batch
+    node_ids, _, edge_index = sampler.sample_query_subgraphs(
+        rowptr, col, [cited_node_ids], GNN_NUM_NEIGHBORS, _query_rng(cited_node_ids)
+    )
+    # Placeholder row for the new paper; the model replaces it with its mask token
+    x = np.zeros((len(node_ids), features.shape[1]), dtype=np.float32)
+    x[1:] = features[node_ids[1:]]
+    return x, edge_index
+
+
+def embed_new_papers(citation_lists, batch_size: int = GNN_BATCH_SIZE) -> np.ndarray:
+    """GNN embeddings (len(citation_lists), OUTPUT_DIM) float32 of new papers, one per citation list.
+
+    Each chunk of `batch_size` query subgraphs is run as one disjoint union: node indices are offset
+    per graph, every graph's center is masked via `mask_index`, and the centers' rows are returned.
+    Eval-mode BatchNorm and mean aggregation make this identical to one forward per paper.
+    """
+    batch_size = max(1, batch_size)
+    features, rowptr, col = _load_graph()
+    model = _load_model()
+    out = np.empty((len(citation_lists), OUTPUT_DIM), dtype=np.float32)
+    for start in range(0, len(citation_lists), batch_size):
+        xs, edges, centers = [], [], []
+        offset = 0
+        for cited in citation_lists[start:start + batch_size]:
+            x, edge_index = _query_inputs(features, rowptr, col, cited)
+            xs.append(x)
+            edges.append(edge_index + offset)
+            centers.append(offset)
+            offset += len(x)
+        centers = torch.tensor(centers, dtype=torch.long)
+        with torch.inference_mode():
+            emb = model(
+                torch.from_numpy(np.concatenate(xs)),
+                torch.from_numpy(np.concatenate(edges, axis=1)),
+                mask_index=centers,
+            )
+        out[start:start + len(xs)] = emb[centers].numpy()
+    return out
+
+
+def embed_new_paper(cited_node_ids) -> np.ndarray:
+    """GNN embedding (OUTPUT_DIM,) float32 of a new paper citing the given node ids."""
+    return embed_new_papers([cited_node_ids])[0]
@@ -0,0 +1,344 @@
+"""Local per-user click history (the hot path) with optional write-behind sync to Auth0.
+
+Stores (HISTORY_STORE):
+- sqlite: file shared by all workers on the host; appends run in one IMMEDIATE transaction
+- redis:  Redis-compatible server at REDIS_URL; appends run as one Lua script
+- memory: per-process dict (also the fallback if the configured store can't be opened)
+
+A user's history is seeded from Auth0 user_metadata the first time we see them, and only from a
+read that succeeded: if Auth0 fails, nothing is stored (a later write-behind would otherwise
+overwrite their real history). Clicks append locally and return immediately; the user id is queued
+and a background thread PATCHes the user's history to Auth0 every AUTH0_SYNC_INTERVAL_S
+(debounced: several clicks = one PATCH). The history is read from the store when it is sent, not
+when the click is queued, so a worker sharing the store never sends a snapshot it took before
+another worker's newer clicks. Permanent Auth0 rejections (4xx other than 429) are dropped, other
+failures retry next round. Store calls block (SQLite / Redis), so the async API runs them in the
+threadpool.
+"""
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from ..core import metrics
+from ..core.config import (
+    AUTH0_DOMAIN,
+    AUTH0_SYNC_BATCH,
+    AUTH0_SYNC_ENABLED,
+    AUTH0_SYNC_INTERVAL_S,
+    AUTH0_SYNC_SHUTDOWN_TIMEOUT_S,
+    HISTORY_DB_PATH,
+    HISTORY_STORE,
+    NODE_HISTORY_MAX_SIZE,
+    REDIS_URL,
+)
+from . import auth0_storage
+
+
+class HistoryStore(ABC):
+    """Per-user node history, newest last."""
+
+    @abstractmethod
+    def get(self, user_id: str) -> List[str] | None:
+        """Stored history, or None if this user has never been seen (not seeded)."""
+
+    @abstractmethod
+    def seed(self, user_id: str, history: List[str]) -> List[str]:
+        """Store `history` unless the user already has one; return the stored history."""
+
+    @abstractmethod
+    def append(self, user_id: str, node_id: str, max_size: int = NODE_HISTORY_MAX_SIZE) -> List[str]:
+        """Atomically move/append node_id to the end, keep the newest `max_size`; return the result."""
+
+
+class InMemoryHistoryStore(HistoryStore):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: dict[str, List[str]] = {}
+
+    def get(self, user_id: str) -> List[str] | None:
+        with self._lock:
+            history = self._data.get(user_id)
+            return list(history) if history is not None else None
+
+    def seed(self, user_id: str, history: List[str]) -> List[str]:
+        with self._lock:
+            return list(self._data.setdefault(user_id, list(history)))
+
+    def append(self, user_id: str, node_id: str, max_size: int = NODE_HISTORY_MAX_SIZE) -> List[str]:
+        with self._lock:
+            history = auth0_storage._appended_history(self._data.get(user_id, []), node_id, max_size)
+            self._data[user_id] = history
+            return list(history)
+
+
+class SqliteHistoryStore(HistoryStore):
+    def __init__(self, path: Path = HISTORY_DB_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS histories ("
+            "user_id TEXT PRIMARY KEY, history TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, user_id: str) -> List[str] | None:
+        with self._lock:
+            row = self._db.execute("SELECT history FROM histories WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def seed(self, user_id: str, history: List[str]) -> List[str]:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO histories (user_id, history, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(list(history)), time.time()),
+            )
+            row = self._db.execute("SELECT history FROM histories WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0])
+
+    def append(self, user_id: str, node_id: str, max_size: int = NODE_HISTORY_MAX_SIZE) -> List[str]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent appends (any worker) serialize
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT history FROM histories WHERE user_id = ?", (user_id,)).fetchone()
+                history = auth0_storage._appended_history(json.loads(row[0]) if row else [], node_id, max_size)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO histories (user_id, history, updated_at) VALUES (?, ?, ?)",
+                    (user_id, json.dumps(history), time.time()),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return history
+
+
+# KEYS[1] = history key; ARGV = node_id, max_size. Runs atomically on the server.
+_REDIS_APPEND = """
+local raw = redis.call('GET', KEYS[1])
+local history = raw and cjson.decode(raw) or {}
+local out = {}
+for _, v in ipairs(history) do
+  if v ~= ARGV[1] then table.insert(out, v) end
+end
+table.insert(out, ARGV[1])
+local max_size = tonumber(ARGV[2])
+while #out > max_size do table.remove(out, 1) end
+local encoded = #out > 0 and cjson.encode(out) or '[]'
+redis.call('SET', KEYS[1], encoded)
+return encoded
+"""
+
+
+class RedisHistoryStore(HistoryStore):
+    def __init__(self, url: str = REDIS_URL, prefix: str = "ariadne:history:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._redis.ping()
+        self._prefix = prefix
+        self._append = self._redis.register_script(_REDIS_APPEND)
+
+    def get(self, user_id: str) -> List[str] | None:
+        raw = self._redis.get(self._prefix + user_id)
+        return json.loads(raw) if raw is not None else None
+
+    def seed(self, user_id: str, history: List[str]) -> List[str]:
+        key = self._prefix + user_id
+        self._redis.set(key, json.dumps(list(history)), nx=True)
+        return json.loads(self._redis.get(key))
+
+    def append(self, user_id: str, node_id: str, max_size: int = NODE_HISTORY_MAX_SIZE) -> List[str]:
+        return json.loads(self._append(keys=[self._prefix + user_id], args=[node_id, max_size]))
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Auth0 rejected the request itself (4xx other than 429), so retrying cannot succeed."""
+    if isinstance(error, HTTPException):
+        code = error.status_code
+    elif isinstance(error, httpx.HTTPStatusError):
+        code = error.response.status_code
+    else:
+        return False
+    return 400 <= code < 500 and code != 429
+
+
+class Auth0WriteBehind:
+    """Debounced, batched background sync of local histories to Auth0 user_metadata."""
+
+    def __init__(
+        self, store: HistoryStore, interval_s: float = AUTH0_SYNC_INTERVAL_S, batch_size: int = AUTH0_SYNC_BATCH
+    ):
+        self.store = store
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: dict[str, None] = {}  # queued user ids, oldest first
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, user_id: str) -> None:
+        """Queue user_id; their history is read from the store when it is sent."""
+        with self._lock:
+            if user_id in self._pending:
+                metrics.incr("history_sync.debounced")
+            self._pending[user_id] = None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="auth0-history-sync", daemon=True)
+                self._thread.start()
+
+    def _take_batch(self, n: int) -> List[str]:
+        with self._lock:
+            users = list(self._pending)[:n]
+            for user_id in users:
+                del self._pending[user_id]
+            return users
+
+    def _send(self, user_id: str) -> bool:
+        """PATCH the user's current stored history; False if it should be retried."""
+        try:
+            history = self.store.get(user_id)
+            if history is not None:
+                auth0_storage.replace_node_history(user_id, history)
+                metrics.incr("history_sync.sent")
+            return True
+        except Exception as e:
+            if _is_permanent(e):
+                metrics.incr("history_sync.rejected")
+                print(f"⚠️ Auth0 sync: dropped history of {user_id} ({e})")
+                return True
+            metrics.incr("history_sync.error")
+            return False
+
+    def flush(self) -> None:
+        """Send every user queued when the flush starts; transient failures are retried next round."""
+        with self._lock:
+            remaining = len(self._pending)
+        failed: List[str] = []
+        while remaining > 0:
+            users = self._take_batch(min(self.batch_size, remaining))
+            if not users:
+                break
+            remaining -= len(users)
+            failed += [user_id for user_id in users if not self._send(user_id)]
+        if failed:
+            with self._lock:
+                for user_id in failed:
+                    self._pending.setdefault(user_id, None)
+
+    def _final_flush(self, deadline: float) -> None:
+        """One last attempt per pending user before the deadline; failures are dropped."""
+        with self._lock:
+            pending, self._pending = list(self._pending), {}
+        dropped = 0
+        for user_id in pending:
+            if time.monotonic() >= deadline or not self._send(user_id):
+                dropped += 1
+        if dropped:
+            metrics.incr("history_sync.dropped", dropped)
+            print(f"⚠️ Auth0 sync: dropped {dropped} unsent histories on shutdown (kept in the local store)")
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self, timeout_s: float = AUTH0_SYNC_SHUTDOWN_TIMEOUT_S) -> None:
+        deadline = time.monotonic() + timeout_s
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+        self._final_flush(deadline)
+
+
+_store: HistoryStore | None = None
+_sync: Auth0WriteBehind | None = None
+
+
+def _open_store() -> HistoryStore:
+    try:
+        if HISTORY_STORE == "redis":
+            return RedisHistoryStore()
+        if HISTORY_STORE == "sqlite":
+            return SqliteHistoryStore()
+    except Exception as e:
+        print(f"⚠️ History store {HISTORY_STORE!r} unavailable ({e}); using in-memory store")
+    return InMemoryHistoryStore()
+
+
+def get_store() -> HistoryStore:
+    global _store
+    if _store is None:
+        _store = _open_store()
+    return _store
+
+
+def _get_sync() -> Auth0WriteBehind | None:
+    global _sync
+    if _sync is None and AUTH0_SYNC_ENABLED and AUTH0_DOMAIN and auth0_storage.configured():
+        _sync = Auth0WriteBehind(get_store())
+    return _sync
+
+
+async def _seed_from_auth0(user_id: str) -> List[str]:
+    """Copy the user's Auth0 history into the local store (no-op if they already have one).
+
+    Raises 503 if Auth0 could not be read, so a transient failure never stores an empty history.
+    """
+    history: List[str] = []
+    if auth0_storage.configured():
+        try:
+            history = await auth0_storage.get_node_history_async(user_id)
+        except HTTPException as e:
+            if e.status_code != status.HTTP_404_NOT_FOUND:
+                metrics.incr("history_store.seed_error")
+                raise
+            # User unknown to Auth0: start empty
+        except Exception as e:
+            metrics.incr("history_store.seed_error")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not read the user's history from Auth0",
+            ) from e
+    return await run_in_threadpool(get_store().seed, user_id, history)
+
+
+async def get_history(user_id: str) -> List[str]:
+    """User's history from the local store, seeded from Auth0 on first sight."""
+    history = await run_in_threadpool(get_store().get, user_id)
+    if history is None:
+        metrics.incr("history_store.seed")
+        history = await _seed_from_auth0(user_id)
+    return history[-NODE_HISTORY_MAX_SIZE:]
+
+
+async def append(user_id: str, node_id: str) -> List[str]:
+    """Record a click locally (atomic) and queue the user for the Auth0 sync."""
+    store = get_store()
+    if await run_in_threadpool(store.get, user_id) is None:
+        await _seed_from_auth0(user_id)
+    with metrics.timer("history_store.append"):
+        history = await run_in_threadpool(store.append, user_id, str(node_id), NODE_HISTORY_MAX_SIZE)
+    sync = _get_sync()
+    if sync is not None:
+        sync.schedule(user_id)
+    return history
+
+
+def shutdown() -> None:
+    """Flush pending Auth0 writes (app shutdown)."""
+    if _sync is not None:
+        _sync.stop()
@@ -0,0 +1,85 @@
+"""Precomputed global 2D map of all papers (replaces the per-request t-SNE fit).
+
+`python -m backend.scripts.build_layout` embeds the normalized paper embeddings into 2D once
+(openTSNE if installed, else UMAP, else a PCA projection) and writes a float32 (num_nodes, 2) .npy
+that workers memory-map. Papers are placed by a row lookup. Virtual points (e.g. a user's averaged
+vector) are projected by kNN interpolation: the weighted mean position of their nearest papers,
+weighted by inverse Euclidean distance between the unit embeddings (sqrt(2 - 2 * cosine)).
+"""
+from pathlib import Path
+
+import numpy as np
+
+from ..core.config import LAYOUT_PATH
+
+LAYOUT_METHODS = ("opentsne", "umap", "pca")
+
+# Layout coordinates, shape (num_nodes, 2); None until first use, False if not built
+_layout = None
+
+
+def _available_method() -> str:
+    for method, module in (("opentsne", "openTSNE"), ("umap", "umap")):
+        try:
+            __import__(module)
+            return method
+        except ImportError:
+            continue
+    return "pca"
+
+
+def build_layout(embeddings: np.ndarray, method: str = "auto", seed: int = 42, n_jobs: int = -1) -> np.ndarray:
+    """2D float32 coordinates for every row of `embeddings` (normalized)."""
+    if method == "auto":
+        method = _available_method()
+    if method not in LAYOUT_METHODS:
+        raise ValueError(f"Unknown layout method {method!r}; expected one of {LAYOUT_METHODS}")
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if method == "opentsne":
+        from openTSNE import TSNE
+
+        coords = TSNE(n_components=2, metric="cosine", n_jobs=n_jobs, random_state=seed).fit(embeddings)
+    elif method == "umap":
+        import umap
+
+        coords = umap.UMAP(n_components=2, metric="cosine", random_state=seed).fit_transform(embeddings)
+    else:
+        # Top-2 principal components; loses local structure but needs no extra dependency
+        centered = embeddings - embeddings.mean(axis=0)
+        _, _, vt = np.linalg.svd(centered[:: max(1, len(centered) // 100000)], full_matrices=False)
+        coords = centered @ vt[:2].T
+    return np.ascontiguousarray(coords, dtype=np.float32)
+
+
+def save_layout(coords: np.ndarray, path: Path = LAYOUT_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp.npy")
+    np.save(tmp, np.ascontiguousarray(coords, dtype=np.float32))
+    tmp.replace(path)
+
+
+def get_layout() -> np.ndarray | None:
+    """Memory-mapped layout, or None if it has not been built."""
+    global _layout
+    if _layout is None:
+        _layout = False
+        if LAYOUT_PATH.exists():
+            _layout = np.load(LAYOUT_PATH, mmap_mode="r")
+            print(f"✅ Loaded 2D layout for {_layout.shape[0]} papers from {LAYOUT_PATH}")
+    return _layout if _layout is not False else None
+
+
+def coordinates(layout: np.ndarray, node_ids) -> np.ndarray:
+    """Layout positions of the given papers, shape (len(node_ids), 2)."""
+    return np.asarray(layout[np.asarray(node_ids, dtype=np.int64)], dtype=np.float32).reshape(-1, 2)
+
+
+def interpolate(layout: np.ndarray, neighbor_ids, similarities) -> np.ndarray:
+    """Weighted mean position of the given papers, weighted by 1 / sqrt(2 - 2 * cosine similarity)."""
+    neighbor_ids = np.asarray(neighbor_ids, dtype=np.int64)
+    if len(neighbor_ids) == 0:
+        return np.zeros(2, dtype=np.float32)
+    # Euclidean (chord) distance between unit vectors; an exact match gets (almost) all the weight
+    dist = np.sqrt(np.maximum(2.0 - 2.0 * np.asarray(similarities, dtype=np.float32), 0.0))
+    weights = 1.0 / (dist + 1e-6)
+    return (coordinates(layout, neighbor_ids) * weights[:, None]).sum(axis=0) / weights.sum()
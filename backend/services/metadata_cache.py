@@ -0,0 +1,159 @@
+"""Tiered cache for OpenAlex work metadata keyed by numeric MAG id.
+
+Tier 1 is an in-process LRU bounded by entry count; tier 2 is a SQLite file on disk shared by all
+workers on the host. Entries expire after a TTL. Misses (no such work on OpenAlex) are cached too,
+with a shorter TTL, so unknown ids don't hit the API on every request. Fetch errors are not cached.
+`peek` checks the LRU only and is safe on the event loop; `get` / `put` (and the batch forms
+`get_many` / `put_many`, one query / transaction per call) touch SQLite, so async callers run them
+in the threadpool. Hit/miss counters go to core.metrics under `<name>.*`.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+from pathlib import Path
+
+from ..core import metrics
+from ..core.config import (
+    METADATA_CACHE_MAX_ENTRIES,
+    METADATA_CACHE_NEGATIVE_TTL_S,
+    METADATA_CACHE_PATH,
+    METADATA_CACHE_TTL_S,
+)
+
+SQLITE_MAX_PARAMS = 500  # keys per SELECT ... IN (...), below SQLite's variable limit
+
+
+class MetadataCache:
+    def __init__(
+        self,
+        path: Path | None = METADATA_CACHE_PATH,
+        max_entries: int = METADATA_CACHE_MAX_ENTRIES,
+        ttl_s: float = METADATA_CACHE_TTL_S,
+        negative_ttl_s: float = METADATA_CACHE_NEGATIVE_TTL_S,
+        name: str = "openalex_cache",
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.name = name
+        self._lock = threading.Lock()  # guards the LRU only, never held across disk I/O
+        self._db_lock = threading.Lock()
+        # key -> (expires_at, value or None for a cached miss)
+        self._lru: OrderedDict[int, tuple[float, dict | None]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key INTEGER PRIMARY KEY, payload TEXT, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key: int, expires_at: float, value: dict | None) -> None:
+        self._lru[key] = (expires_at, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            metrics.incr(f"{self.name}.evict")
+
+    def peek(self, key: int) -> tuple[bool, dict | None]:
+        """(found, value) from the in-memory tier only; no disk I/O, no miss counted."""
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._lru[key]
+                return False, None
+            self._lru.move_to_end(key)
+        metrics.incr(f"{self.name}.hit")
+        metrics.incr(f"{self.name}.memory_hit")
+        return True, entry[1]
+
+    def get(self, key: int) -> tuple[bool, dict | None]:
+        """Return (found, value). value is None for a cached miss. Blocks on SQLite."""
+        found, value = self.peek(key)
+        if found:
+            return found, value
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and row[1] > time.time():
+                value = json.loads(row[0]) if row[0] is not None else None
+                with self._lock:
+                    self._remember(key, row[1], value)
+                metrics.incr(f"{self.name}.hit")
+                metrics.incr(f"{self.name}.disk_hit")
+                return True, value
+        metrics.incr(f"{self.name}.miss")
+        return False, None
+
+    def get_many(self, keys: list[int]) -> dict[int, dict | None]:
+        """{key: value} for the keys found in either tier (one SELECT per 500 disk lookups)."""
+        found: dict[int, dict | None] = {}
+        rest = []
+        for key in keys:
+            hit, value = self.peek(key)
+            if hit:
+                found[key] = value
+            else:
+                rest.append(key)
+        if rest and self._db is not None:
+            rows = []
+            with self._db_lock:
+                for i in range(0, len(rest), SQLITE_MAX_PARAMS):
+                    chunk = rest[i:i + SQLITE_MAX_PARAMS]
+                    rows += self._db.execute(
+                        f"SELECT key, payload, expires_at FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+            now = time.time()
+            with self._lock:
+                for key, payload, expires_at in rows:
+                    if expires_at > now:
+                        found[key] = json.loads(payload) if payload is not None else None
+                        self._remember(key, expires_at, found[key])
+            disk_hits = sum(key in found for key in rest)
+            metrics.incr(f"{self.name}.hit", disk_hits)
+            metrics.incr(f"{self.name}.disk_hit", disk_hits)
+        metrics.incr(f"{self.name}.miss", len(keys) - len(found))
+        return found
+
+    def put(self, key: int, value: dict | None) -> None:
+        """Store a value (or None to record a miss) with the matching TTL."""
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[tuple[int, dict | None]]) -> None:
+        """put() for several (key, value) pairs in a single SQLite transaction."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, value in items:
+                expires_at = now + (self.ttl_s if value is not None else self.negative_ttl_s)
+                self._remember(key, expires_at, value)
+                rows.append((key, json.dumps(value) if value is not None else None, expires_at))
+        if rows and self._db is not None:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries (key, payload, expires_at) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+
+
+_cache: MetadataCache | None = None
+
+
+def get_cache() -> MetadataCache:
+    """Process-wide OpenAlex metadata cache."""
+    global _cache
+    if _cache is None:
+        _cache = MetadataCache()
+    return _cache
@@ -0,0 +1,201 @@
+"""Dense node index <-> MAG id mapping backed by memory-mapped int64 arrays.
+
+Replaces the pickled dicts in mag_to_node_idx.npy / node_to_mag_id.npy:
+- node -> MAG: int64 array of length num_nodes, MISSING where a node has no MAG id
+- MAG -> node: sorted int64 MAG id keys plus the node index for each key, looked up
+  with np.searchsorted
+
+Build the arrays once with `python -m backend.scripts.build_node_index`. If they are missing,
+the legacy pickles are converted in memory on first use. `backend.scripts.refresh_embeddings`
+appends new papers with `extend` + `save_arrays`; every process re-checks the files at most every
+EMBEDDING_DELTA_POLL_S seconds and reloads them when they change.
+"""
+import threading
+import time
+
+import numpy as np
+
+from ..core.config import (
+    EMBEDDING_DELTA_POLL_S,
+    MAG_SORTED_KEYS_PATH,
+    MAG_SORTED_NODES_PATH,
+    MAG_TO_NODE_IDX_PATH,
+    NODE_TO_MAG_ARRAY_PATH,
+    NODE_TO_MAG_ID_PATH,
+)
+
+MISSING = -1
+OPENALEX_URL_PREFIX = "https://openalex.org/W"
+
+_ARRAY_PATHS = (NODE_TO_MAG_ARRAY_PATH, MAG_SORTED_KEYS_PATH, MAG_SORTED_NODES_PATH)
+
+# node idx -> numeric MAG id (MISSING if none)
+_node_to_mag: np.ndarray | None = None
+# (sorted numeric MAG ids, node idx for each), swapped together on reload
+_mag_index: tuple[np.ndarray, np.ndarray] | None = None
+# File mtimes of the loaded arrays (None: converted from the pickles), last check, loads so far
+_fingerprint: tuple | None = None
+_last_poll = 0.0
+_generation = 0
+_lock = threading.Lock()
+
+
+def _load_legacy_dict(path) -> dict:
+    if not path.exists():
+        raise FileNotFoundError(f"Mapping not found: {path}")
+    return np.load(path, allow_pickle=True).item()
+
+
+def build_arrays(node_to_mag: dict, mag_to_node: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert the legacy dicts to (node_to_mag, sorted mag keys, node idx per key) arrays."""
+    num_nodes = max((int(k) for k in node_to_mag), default=-1) + 1
+    node_arr = np.full(num_nodes, MISSING, dtype=np.int64)
+    if node_to_mag:
+        node_arr[np.fromiter((int(k) for k in node_to_mag), dtype=np.int64, count=len(node_to_mag))] = (
+            np.fromiter((int(v) for v in node_to_mag.values()), dtype=np.int64, count=len(node_to_mag))
+        )
+    keys = np.fromiter((int(k) for k in mag_to_node), dtype=np.int64, count=len(mag_to_node))
+    nodes = np.fromiter((int(v) for v in mag_to_node.values()), dtype=np.int64, count=len(mag_to_node))
+    order = np.argsort(keys, kind="stable")
+    return node_arr, keys[order], nodes[order]
+
+
+def build_from_legacy() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Load the pickled dict mappings and convert them to dense arrays."""
+    return build_arrays(_load_legacy_dict(NODE_TO_MAG_ID_PATH), _load_legacy_dict(MAG_TO_NODE_IDX_PATH))
+
+
+def extend(start: int, mag_ids) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Dense arrays with nodes start, start + 1, ... mapped to `mag_ids` (MISSING = no MAG id).
+
+    Nodes before `start` keep their ids; any mapping at or after `start` is replaced, so extending
+    from the same start again is idempotent.
+    """
+    _load()
+    mag_ids = np.asarray(mag_ids, dtype=np.int64)
+    old = _node_to_mag[:start]
+    node_arr = np.full(start + len(mag_ids), MISSING, dtype=np.int64)
+    node_arr[: len(old)] = old
+    node_arr[start:] = mag_ids
+    keys, nodes = _mag_index
+    keep = nodes < start
+    added = np.flatnonzero(mag_ids != MISSING)
+    keys = np.concatenate([keys[keep], mag_ids[added]])
+    nodes = np.concatenate([nodes[keep], start + added])
+    order = np.argsort(keys, kind="stable")
+    return node_arr, keys[order], nodes[order]
+
+
+def save_arrays(node_arr: np.ndarray, keys: np.ndarray, nodes: np.ndarray) -> None:
+    """Write the dense arrays to their configured paths (plain .npy, loadable with mmap).
+
+    Each file is swapped in atomically, so running workers never map a partial file.
+    """
+    NODE_TO_MAG_ARRAY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    for path, array in zip(_ARRAY_PATHS, (node_arr, keys, nodes)):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(array, dtype=np.int64))
+        tmp.replace(path)
+
+
+def _files_fingerprint() -> tuple | None:
+    try:
+        return tuple(p.stat().st_mtime_ns for p in _ARRAY_PATHS)
+    except FileNotFoundError:
+        return None
+
+
+def _load() -> None:
+    global _node_to_mag, _mag_index, _fingerprint, _last_poll, _generation
+    if _node_to_mag is not None and time.monotonic() - _last_poll < EMBEDDING_DELTA_POLL_S:
+        return
+    with _lock:
+        if _node_to_mag is not None:
+            if time.monotonic() - _last_poll < EMBEDDING_DELTA_POLL_S:
+                return
+            _last_poll = time.monotonic()
+            fingerprint = _files_fingerprint()
+            if fingerprint is None or fingerprint == _fingerprint:
+                return
+            node_arr, keys, nodes = (np.load(p, mmap_mode="r") for p in _ARRAY_PATHS)
+            if keys.shape != nodes.shape:
+                return  # caught between save_arrays' renames; the next poll sees the rest
+            print(f"✅ Reloaded node index ({node_arr.shape[0]} nodes)")
+        else:
+            fingerprint = _files_fingerprint()
+            if fingerprint is not None:
+                node_arr, keys, nodes = (np.load(p, mmap_mode="r") for p in _ARRAY_PATHS)
+            else:
+                print("⚠️ Dense node index not built, converting pickled mappings (run backend.scripts.build_node_index)")
+                node_arr, keys, nodes = build_from_legacy()
+        _mag_index = (keys, nodes)
+        _node_to_mag = node_arr
+        _fingerprint = fingerprint
+        _last_poll = time.monotonic()
+        _generation += 1
+
+
+def generation() -> int:
+    """Number of times the arrays have been (re)loaded; changes when new papers are mapped."""
+    _load()
+    return _generation
+
+
+def node_to_mag_array() -> np.ndarray:
+    """Numeric MAG id per node idx (MISSING where unknown)."""
+    _load()
+    return _node_to_mag
+
+
+def mag_ids_to_node_ids(mag_ids) -> np.ndarray:
+    """Batch lookup: numeric MAG ids -> node idx array (MISSING where not in the mapping)."""
+    _load()
+    keys, nodes = _mag_index
+    mag_ids = np.asarray(mag_ids, dtype=np.int64)
+    out = np.full(mag_ids.shape, MISSING, dtype=np.int64)
+    if keys.shape[0] == 0:
+        return out
+    pos = np.searchsorted(keys, mag_ids)
+    pos_clipped = np.minimum(pos, keys.shape[0] - 1)
+    found = keys[pos_clipped] == mag_ids
+    out[found] = nodes[pos_clipped[found]]
+    return out
+
+
+def node_ids_to_mag_ids(node_ids) -> np.ndarray:
+    """Batch lookup: node idx -> numeric MAG id array (MISSING where out of range or unknown)."""
+    node_arr = node_to_mag_array()
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    out = np.full(node_ids.shape, MISSING, dtype=np.int64)
+    valid = (node_ids >= 0) & (node_ids < node_arr.shape[0])
+    out[valid] = node_arr[node_ids[valid]]
+    return out
+
+
+def mag_id_to_node_id(numeric_mag_id: str) -> int | None:
+    """Resolve a numeric MAG id string to a node idx, or None."""
+    if not numeric_mag_id.isdigit():
+        return None
+    _load()
+    keys, nodes = _mag_index
+    key = int(numeric_mag_id)
+    if key > np.iinfo(np.int64).max:
+        return None
+    pos = int(np.searchsorted(keys, key))
+    if pos < keys.shape[0] and int(keys[pos]) == key:
+        return int(nodes[pos])
+    return None
+
+
+def node_ids_to_mag_urls(node_ids) -> list[str | None]:
+    """Batch lookup: node idx -> OpenAlex URL (None where unknown)."""
+    return [
+        f"{OPENALEX_URL_PREFIX}{m}" if m != MISSING else None
+        for m in node_ids_to_mag_ids(node_ids).tolist()
+    ]
+
+
+def node_id_to_mag_url(node_id: int) -> str | None:
+    """Convert node idx to OpenAlex URL, or None."""
+    return node_ids_to_mag_urls([node_id])[0]
@@ -0,0 +1,64 @@
+"""Async OpenAlex works client on the shared connection pool, with a concurrency limit."""
+import asyncio
+
+from ..core import http, metrics
+from ..core.config import OPENALEX_API_URL, OPENALEX_MAX_CONCURRENCY, OPENALEX_TIMEOUT_S
+
+OPENALEX_WORKS_URL = f"{OPENALEX_API_URL}/works"
+USER_AGENT = "AriadneBackend/1.0 (mailto:optional@example.com)"
+WORK_FIELDS = "doi,abstract_inverted_index"
+# OpenAlex accepts up to 50 ids per `ids.mag:a|b|c` filter
+MAX_IDS_PER_REQUEST = 50
+
+# Created lazily so it binds to the running event loop
+_semaphore: asyncio.Semaphore | None = None
+
+
+def _limit() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OPENALEX_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def fetch_work(numeric_id: str) -> dict | None:
+    """Fetch one work by numeric MAG id. Returns None if OpenAlex has no such work; raises on errors."""
+    params = {"filter": f"ids.mag:{numeric_id}", "select": WORK_FIELDS, "per_page": 1}
+    async with _limit():
+        with metrics.timer("openalex.request"):
+            resp = await http.get_async_client().get(
+                OPENALEX_WORKS_URL,
+                params=params,
+                headers={"User-Agent": USER_AGENT},
+                timeout=OPENALEX_TIMEOUT_S,
+            )
+    resp.raise_for_status()
+    results = resp.json().get("results", [])
+    return results[0] if results else None
+
+
+async def fetch_works(numeric_ids: list[str]) -> dict[str, dict]:
+    """Fetch up to MAX_IDS_PER_REQUEST works in one call. Returns {numeric MAG id: work} for the
+    ids OpenAlex knows; missing ids are absent. Raises on errors."""
+    if len(numeric_ids) > MAX_IDS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_IDS_PER_REQUEST} ids per request")
+    params = {
+        "filter": f"ids.mag:{'|'.join(numeric_ids)}",
+        "select": f"ids,{WORK_FIELDS}",
+        "per_page": MAX_IDS_PER_REQUEST,
+    }
+    async with _limit():
+        with metrics.timer("openalex.batch_request"):
+            resp = await http.get_async_client().get(
+                OPENALEX_WORKS_URL,
+                params=params,
+                headers={"User-Agent": USER_AGENT},
+                timeout=OPENALEX_TIMEOUT_S,
+            )
+    resp.raise_for_status()
+    works: dict[str, dict] = {}
+    for work in resp.json().get("results", []):
+        mag = (work.get("ids") or {}).get("mag")
+        if mag is not None:
+            works[str(mag)] = work
+    return works
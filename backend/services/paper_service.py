@@ -1,16 +1,23 @@
 """Paper lookup and PDF URL resolution via OpenAlex + arXiv fallback."""
-import json
-import random
-import urllib.request
-from pathlib import Path
+import asyncio
 
 import arxiv
-from ..core.config import MAG_ID_TO_TITLE_PATH
+import numpy as np
+from starlette.concurrency import run_in_threadpool
 
-# In-memory cache: OpenAlex ID -> title
-_mag_id_to_title: dict[str, str] | None = None
+from ..core import metrics
+from ..core.singleflight import SingleFlight
+from . import metadata_cache, node_index, openalex_client, title_store
 
-OPENALEX_WORKS_URL = "https://api.openalex.org/works"
+# Node ids that have both a MAG id and a title (sampled by get_random_papers), and the
+# (node index, title store) generations they were computed from
+_titled_node_ids: np.ndarray | None = None
+_titled_key: tuple | None = None
+
+OPENALEX_WORKS_URL = openalex_client.OPENALEX_WORKS_URL
+
+# Concurrent async lookups of the same MAG id share one OpenAlex request
+_openalex_flight = SingleFlight("openalex_flight")
 
 
 def _normalize_mag_id(mag_id: str) -> str:
@@ -35,21 +42,23 @@ def _mag_id_to_numeric(mag_id: str) -> str:
     return s
 
 
-def _load_mag_id_to_title() -> dict[str, str]:
-    global _mag_id_to_title
-    if _mag_id_to_title is None:
-        if not MAG_ID_TO_TITLE_PATH.exists():
-            raise FileNotFoundError(f"MAG title mapping not found: {MAG_ID_TO_TITLE_PATH}")
-        with open(MAG_ID_TO_TITLE_PATH, encoding="utf-8") as f:
-            _mag_id_to_title = json.load(f)
-    return _mag_id_to_title
+def _canonical_mag_id(mag_id: str) -> str | None:
+    """Numeric MAG id without leading zeros, or None if it is not a number that fits in int64."""
+    numeric_id = _mag_id_to_numeric(mag_id)
+    if not numeric_id.isdigit() or int(numeric_id) > np.iinfo(np.int64).max:
+        return None
+    return str(int(numeric_id))
 
 
 def get_title_by_mag_id(mag_id: str) -> str | None:
-    """Return paper title for a given MAG/OpenAlex id from backend/mag_id_to_title.json, or None."""
-    mapping = _load_mag_id_to_title()
-    key = _normalize_mag_id(mag_id)
-    return mapping.get(key)
+    """Return paper title for a given MAG/OpenAlex id from the node-indexed title store, or None."""
+    node_id = node_index.mag_id_to_node_id(_mag_id_to_numeric(mag_id))
+    return title_store.get_title(node_id) if node_id is not None else None
+
+
+def get_titles_by_node_ids(node_ids) -> list[str | None]:
+    """Bulk title fetch by node id (None where missing)."""
+    return title_store.get_titles(node_ids)
 
 
 def _abstract_inverted_index_to_text(inverted: dict | None) -> str | None:
@@ -70,53 +79,139 @@ def _abstract_inverted_index_to_text(inverted: dict | None) -> str | None:
     return " ".join(w for (_, w) in pairs)
 
 
-def _fetch_openalex_work_by_mag_id(mag_id: str) -> dict | None:
-    """Query OpenAlex API by MAG id; return first work with doi and abstract_inverted_index selected."""
-    numeric_id = _mag_id_to_numeric(mag_id)
-    if not numeric_id:
+def _work_to_metadata(work: dict | None) -> dict | None:
+    """Reduce an OpenAlex work to the cached fields (DOI URL and plain-text abstract)."""
+    if work is None:
+        return None
+    return {
+        "doi_url": work.get("doi"),
+        "abstract": _abstract_inverted_index_to_text(work.get("abstract_inverted_index")),
+    }
+
+
+async def get_work_metadata_async(mag_id: str) -> dict | None:
+    """DOI URL and abstract for a MAG id: cache first, then one coalesced OpenAlex request per MAG id."""
+    numeric_id = _canonical_mag_id(mag_id)
+    if numeric_id is None:
         return None
-    url = f"{OPENALEX_WORKS_URL}?filter=ids.mag:{numeric_id}&select=doi,abstract_inverted_index&per_page=1"
-    req = urllib.request.Request(url, headers={"User-Agent": "AriadneBackend/1.0 (mailto:optional@example.com)"})
+    key = int(numeric_id)
+    cache = metadata_cache.get_cache()
+    found, value = cache.peek(key)
+    if not found:
+        found, value = await run_in_threadpool(cache.get, key)
+    if found:
+        return value
+
+    async def fetch() -> dict | None:
+        meta = _work_to_metadata(await openalex_client.fetch_work(numeric_id))
+        await run_in_threadpool(cache.put, key, meta)
+        return meta
+
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode())
+        return await _openalex_flight.do(key, fetch)
     except Exception:
+        metrics.incr(f"{cache.name}.fetch_error")
         return None
-    results = data.get("results", [])
-    return results[0] if results else None
 
 
-def get_doi_for_mag_id(mag_id: str) -> str | None:
-    """Query OpenAlex API by MAG id to get DOI URL for the work."""
-    work = _fetch_openalex_work_by_mag_id(mag_id)
-    return work.get("doi") if work else None
+def _load_titled_node_ids() -> np.ndarray:
+    global _titled_node_ids, _titled_key
+    key = (node_index.generation(), title_store.generation())
+    if _titled_node_ids is None or _titled_key != key:
+        has_title = title_store.has_title_mask()
+        node_to_mag = node_index.node_to_mag_array()[: has_title.shape[0]]
+        _titled_node_ids = np.flatnonzero(has_title[: node_to_mag.shape[0]] & (node_to_mag != node_index.MISSING))
+        _titled_key = key
+    return _titled_node_ids
 
 
-def get_abstract_for_mag_id(mag_id: str) -> str | None:
-    """Query OpenAlex API by MAG id and return abstract as plain text, or None."""
-    work = _fetch_openalex_work_by_mag_id(mag_id)
-    if not work:
-        return None
-    inv = work.get("abstract_inverted_index")
-    return _abstract_inverted_index_to_text(inv)
+async def get_paper_info_by_mag_id_async(mag_id: str) -> dict:
+    """Return title (from the title store), DOI URL, and abstract from OpenAlex (cached)."""
+    meta = await get_work_metadata_async(mag_id)
+    return {
+        "mag_id": _normalize_mag_id(mag_id),
+        "title": get_title_by_mag_id(mag_id),
+        "doi_url": meta.get("doi_url") if meta else None,
+        "abstract": meta.get("abstract") if meta else None,
+    }
 
 
-def get_paper_info_by_mag_id(mag_id: str) -> dict:
-    """Return title (from backend/mag_id_to_title.json), DOI URL, and abstract from OpenAlex."""
-    normalized = _normalize_mag_id(mag_id)
-    title = get_title_by_mag_id(mag_id)
-    work = _fetch_openalex_work_by_mag_id(mag_id)
-    doi_url = work.get("doi") if work else None
-    abstract = _abstract_inverted_index_to_text(work.get("abstract_inverted_index")) if work else None
-    return {"mag_id": normalized, "title": title, "doi_url": doi_url, "abstract": abstract}
+async def _fetch_metadata_batch(numeric_ids: list[str]) -> dict[str, dict | None] | None:
+    """Fetch one <=50-id batch and cache every result in one transaction (absent ids cached as misses).
+
+    None on error.
+    """
+    try:
+        works = await openalex_client.fetch_works(numeric_ids)
+    except Exception:
+        metrics.incr(f"{metadata_cache.get_cache().name}.fetch_error", len(numeric_ids))
+        return None
+    out = {numeric_id: _work_to_metadata(works.get(numeric_id)) for numeric_id in numeric_ids}
+    await run_in_threadpool(metadata_cache.get_cache().put_many, [(int(k), v) for k, v in out.items()])
+    return out
+
+
+async def get_paper_infos_async(mag_ids: list[str]) -> list[dict]:
+    """Batch get_paper_info_by_mag_id_async, in request order, each with a `status`:
+    ok, not_found (no title and no DOI), invalid (not an int64 MAG id) or error (OpenAlex failed).
+
+    Titles come from the local title store and metadata from the cache; the remaining ids are
+    fetched in concurrent batches of 50 (`ids.mag:a|b|c` filter).
+    """
+    cache = metadata_cache.get_cache()
+    # Canonical ids (no leading zeros): OpenAlex answers with these, so they are the fetch / cache keys
+    numeric = [_canonical_mag_id(m) for m in mag_ids]
+    unique = list(dict.fromkeys(n for n in numeric if n is not None))
+    # Memory hits inline; every remaining lookup goes to SQLite in one threadpool call
+    metadata: dict[str, dict | None] = {}
+    for numeric_id in unique:
+        found, value = cache.peek(int(numeric_id))
+        if found:
+            metadata[numeric_id] = value
+    rest = [int(n) for n in unique if n not in metadata]
+    if rest:
+        metadata.update({str(k): v for k, v in (await run_in_threadpool(cache.get_many, rest)).items()})
+    misses = [n for n in unique if n not in metadata]
+
+    size = openalex_client.MAX_IDS_PER_REQUEST
+    batches = [misses[i:i + size] for i in range(0, len(misses), size)]
+    failed: set[str] = set()
+    for batch, result in zip(batches, await asyncio.gather(*(_fetch_metadata_batch(b) for b in batches))):
+        if result is None:
+            failed.update(batch)
+        else:
+            metadata.update(result)
+
+    node_ids = node_index.mag_ids_to_node_ids([int(n) if n is not None else -1 for n in numeric])
+    titles = title_store.get_titles(node_ids)
+    results = []
+    for mag_id, numeric_id, title in zip(mag_ids, numeric, titles):
+        meta = metadata.get(numeric_id)
+        item = {
+            "mag_id": _normalize_mag_id(mag_id),
+            "title": title,
+            "doi_url": meta.get("doi_url") if meta else None,
+            "abstract": meta.get("abstract") if meta else None,
+        }
+        if numeric_id is None:
+            item["status"] = "invalid"
+        elif numeric_id in failed:
+            item["status"] = "error"
+        elif item["title"] is None and item["doi_url"] is None:
+            item["status"] = "not_found"
+        else:
+            item["status"] = "ok"
+        results.append(item)
+    return results
 
 
 def get_random_papers(n: int = 50) -> list[dict]:
-    """Return n random papers (mag_id, title) from the mapping. For 'For You' placeholder."""
-    mapping = _load_mag_id_to_title()
-    keys = list(mapping.keys())
-    if n >= len(keys):
-        chosen = keys
+    """Return n random papers (mag_id, title) from the title store. For 'For You' placeholder."""
+    candidates = _load_titled_node_ids()
+    if n >= candidates.shape[0]:
+        chosen = candidates
     else:
-        chosen = random.sample(keys, n)
-    return [{"mag_id": k, "title": mapping[k]} for k in chosen]
\ No newline at end of file
+        chosen = np.random.default_rng().choice(candidates, size=n, replace=False)
+    urls = node_index.node_ids_to_mag_urls(chosen)
+    titles = title_store.get_titles(chosen)
+    return [{"mag_id": url, "title": title} for url, title in zip(urls, titles)]
@@ -0,0 +1,113 @@
+"""Compact (int8 or float16) copy of the normalized embeddings for coarse scoring.
+
+`python -m backend.scripts.build_quantized_store --kind int8` writes either
+- int8 rows with one float32 scale per row (row ~= q * scale; 4x smaller than float32), or
+- float16 rows (2x smaller).
+Recommendations score every paper on the compact matrix, keep the best `k * EMBEDDING_RESCORE_FACTOR`
+candidates and rescore only those rows in float32 (the memory-mapped store pages in just those rows).
+Opt in with EMBEDDING_QUANTIZATION=int8|float16 (default none); without a built store scoring stays float32.
+"""
+from pathlib import Path
+
+import numpy as np
+
+from ..core.config import (
+    EMBEDDING_QUANTIZATION,
+    QUANTIZED_EMBEDDINGS_F16_PATH,
+    QUANTIZED_EMBEDDINGS_INT8_PATH,
+    QUANTIZED_SCALES_PATH,
+)
+from . import recommender
+
+QUANTIZATION_KINDS = ("int8", "float16")
+# Rows converted to float32 per step while scoring (bounds the temporary buffer)
+SCORE_CHUNK_ROWS = 2048
+
+# (matrix, per-row scales or None); None until first use, False if not configured / not built
+_store = None
+
+
+def quantize_int8(emb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: returns (int8 rows, float32 scales)."""
+    emb = np.asarray(emb, dtype=np.float32)
+    scales = np.abs(emb).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(emb / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+def build(embeddings: np.ndarray, kind: str = "int8", chunk_rows: int = 65536) -> list[Path]:
+    """Write the compact store for `embeddings` (normalized float32). Returns the written paths."""
+    if kind not in QUANTIZATION_KINDS:
+        raise ValueError(f"Unknown quantization {kind!r}; expected one of {QUANTIZATION_KINDS}")
+    num, dim = embeddings.shape
+    path = QUANTIZED_EMBEDDINGS_INT8_PATH if kind == "int8" else QUANTIZED_EMBEDDINGS_F16_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int8 if kind == "int8" else np.float16, shape=(num, dim))
+    scales = np.empty(num, dtype=np.float32) if kind == "int8" else None
+    for start in range(0, num, chunk_rows):
+        chunk = np.asarray(embeddings[start:start + chunk_rows], dtype=np.float32)
+        if kind == "int8":
+            out[start:start + len(chunk)], scales[start:start + len(chunk)] = quantize_int8(chunk)
+        else:
+            out[start:start + len(chunk)] = chunk.astype(np.float16)
+    out.flush()
+    del out
+    if scales is None:
+        tmp.replace(path)
+        return [path]
+    # Both files complete before either is swapped in, so a crash never pairs a matrix with old scales
+    scales_tmp = QUANTIZED_SCALES_PATH.with_name(QUANTIZED_SCALES_PATH.name + ".tmp")
+    with open(scales_tmp, "wb") as f:
+        np.save(f, scales)
+    scales_tmp.replace(QUANTIZED_SCALES_PATH)
+    tmp.replace(path)
+    return [path, QUANTIZED_SCALES_PATH]
+
+
+def get_store() -> tuple[np.ndarray, np.ndarray | None] | None:
+    """(compact matrix, int8 scales or None) memory-mapped, or None if not configured or built."""
+    global _store
+    if _store is None:
+        _store = False
+        if EMBEDDING_QUANTIZATION == "int8" and QUANTIZED_EMBEDDINGS_INT8_PATH.exists() and QUANTIZED_SCALES_PATH.exists():
+            _store = (np.load(QUANTIZED_EMBEDDINGS_INT8_PATH, mmap_mode="r"), np.load(QUANTIZED_SCALES_PATH, mmap_mode="r"))
+        elif EMBEDDING_QUANTIZATION == "float16" and QUANTIZED_EMBEDDINGS_F16_PATH.exists():
+            _store = (np.load(QUANTIZED_EMBEDDINGS_F16_PATH, mmap_mode="r"), None)
+        elif EMBEDDING_QUANTIZATION not in ("", "none"):
+            print(f"⚠️ {EMBEDDING_QUANTIZATION} embedding store not built (run backend.scripts.build_quantized_store)")
+        if _store:
+            print(f"✅ Loaded {EMBEDDING_QUANTIZATION} embedding store {_store[0].shape}")
+    return _store or None
+
+
+def coarse_scores(matrix: np.ndarray, scales: np.ndarray | None, queries: np.ndarray) -> np.ndarray:
+    """Approximate `embeddings @ queries` from the compact matrix: shape (num_nodes,) or (num_nodes, B)."""
+    queries = np.asarray(queries, dtype=np.float32)
+    out = np.empty((matrix.shape[0],) + queries.shape[1:], dtype=np.float32)
+    for start in range(0, matrix.shape[0], SCORE_CHUNK_ROWS):
+        end = min(start + SCORE_CHUNK_ROWS, matrix.shape[0])
+        # numpy has no int8/float16 BLAS kernels; widen one cache-sized chunk at a time
+        out[start:end] = matrix[start:end].astype(np.float32) @ queries
+    if scales is not None:
+        out *= scales.reshape((-1,) + (1,) * (out.ndim - 1))
+    return out
+
+
+def rescore(
+    embeddings: np.ndarray,
+    coarse: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    rescore_factor: int,
+    servable: np.ndarray | None = None,
+    exclude=None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the top k * rescore_factor coarse candidates, rescore them in float32, return the best k."""
+    candidates = recommender.top_k(coarse, k * max(1, rescore_factor), servable=servable, exclude=exclude)
+    # Sorted row order reads the memory-mapped float32 store sequentially
+    candidates = np.sort(candidates)
+    exact = embeddings[candidates] @ query
+    order = np.argsort(-exact, kind="stable")[:k]
+    return candidates[order], exact[order]
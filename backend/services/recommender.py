@@ -0,0 +1,115 @@
+"""Vectorized top-k recommendation over the L2-normalized paper embedding matrix."""
+import numpy as np
+
+from . import vector_index
+
+
+def user_vector(embeddings: np.ndarray, node_ids, fallback: np.ndarray | None = None) -> np.ndarray:
+    """Average the given embedding rows and L2-normalize.
+
+    With no node ids, returns `fallback` (e.g. a cached normalized global mean) or the
+    normalized mean of all rows.
+    """
+    if len(node_ids):
+        vec = embeddings[np.asarray(node_ids, dtype=np.int64)].mean(axis=0)
+    elif fallback is not None:
+        return fallback
+    else:
+        vec = embeddings.mean(axis=0)
+    return vec / np.linalg.norm(vec)
+
+
+def top_k(
+    scores: np.ndarray,
+    k: int,
+    servable: np.ndarray | None = None,
+    exclude=None,
+) -> np.ndarray:
+    """Return up to k node ids with the highest scores, best first.
+
+    Nodes where `servable` is False and node ids in `exclude` are never returned.
+    Uses argpartition (O(N)) and only sorts the k winners.
+    """
+    masked = np.array(scores, dtype=np.float32, copy=True)
+    if servable is not None:
+        masked[~servable] = -np.inf
+    if exclude is not None and len(exclude):
+        masked[np.asarray(exclude, dtype=np.int64)] = -np.inf
+    k = min(int(k), int(np.count_nonzero(masked > -np.inf)))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < masked.shape[0]:
+        idx = np.argpartition(-masked, k - 1)[:k]
+    else:
+        idx = np.arange(masked.shape[0])
+    return idx[np.argsort(-masked[idx], kind="stable")].astype(np.int64)
+
+
+def top_k_batch(
+    scores: np.ndarray,
+    k: int,
+    servable: np.ndarray | None = None,
+    excludes: list | None = None,
+) -> list[np.ndarray]:
+    """Row-wise `top_k` for a (num_queries, num_nodes) score matrix; excludes[i] applies to row i."""
+    masked = np.array(scores, dtype=np.float32, copy=True)
+    if servable is not None:
+        masked[:, ~servable] = -np.inf
+    for row, exclude in enumerate(excludes or []):
+        if exclude is not None and len(exclude):
+            masked[row, np.asarray(exclude, dtype=np.int64)] = -np.inf
+    k = min(int(k), masked.shape[1])
+    if k <= 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(masked.shape[0])]
+    if k < masked.shape[1]:
+        idx = np.argpartition(-masked, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(masked.shape[1]), masked.shape)
+    top = np.take_along_axis(masked, idx, axis=1)
+    order = np.argsort(-top, axis=1, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    # Drop masked-out entries (rows with fewer than k candidates)
+    return [row_ids[row_scores > -np.inf].astype(np.int64) for row_ids, row_scores in zip(idx, top)]
+
+
+def top_k_ann(
+    index,
+    embeddings: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    servable: np.ndarray | None = None,
+    exclude=None,
+    overfetch: int = 4,
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """Top-k via an ANN index: fetch extra candidates, filter, rescore exactly.
+
+    Returns (node ids best first, exact scores), or None when too few candidates survive the
+    servable/exclude filtering, so the caller can fall back to exact `top_k`.
+    """
+    n_exclude = 0 if exclude is None else len(exclude)
+    _, ids = vector_index.search(index, query, (k + n_exclude) * max(1, overfetch))
+    ids = ids[0]
+    ids = ids[ids >= 0]
+    if servable is not None:
+        ids = ids[servable[ids]]
+    if n_exclude:
+        ids = ids[~np.isin(ids, np.asarray(exclude, dtype=np.int64))]
+    if len(ids) < k:
+        return None
+    scores = embeddings[ids] @ query
+    order = np.argsort(-scores, kind="stable")[:k]
+    return ids[order].astype(np.int64), scores[order]
+
+
+def valid_node_ids(history: list[str], num_nodes: int, servable: np.ndarray | None = None) -> list[int]:
+    """Parse history entries to in-range node ids (order kept), optionally keeping only servable ones."""
+    node_ids: list[int] = []
+    for x in history:
+        try:
+            ni = int(x)
+        except (ValueError, TypeError):
+            continue
+        if 0 <= ni < num_nodes and (servable is None or servable[ni]):
+            node_ids.append(ni)
+    return node_ids
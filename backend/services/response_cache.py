@@ -0,0 +1,99 @@
+"""In-process LRU cache for computed responses (For You similar papers, map coordinates).
+
+Keys are a sha256 over the canonical (endpoint, history node ids, n, version) tuple, so users with
+the same short history share entries. The cache is bounded by entry count and by the approximate
+serialized size of the values. `version` fingerprints the files the response was computed from
+(embeddings, layout); when it changes, every older entry is dropped. Hit/miss/evict counters go to
+core.metrics under `<name>.*`.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from ..core import metrics
+from ..core.config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_ENTRIES
+
+
+def make_key(endpoint: str, node_ids, n: int, version: str) -> str:
+    """Canonical cache key; pass node ids sorted when their order does not affect the response."""
+    payload = json.dumps([endpoint, [int(x) for x in node_ids], int(n), version], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def file_fingerprint(*paths: Path) -> str:
+    """Name, size and mtime of each existing file; changes whenever one of them is rebuilt."""
+    parts = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    return "|".join(parts)
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        name: str = "response_cache",
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.name = name
+        self._lock = threading.Lock()
+        # key -> (size in bytes, value)
+        self._entries: OrderedDict[str, tuple[int, object]] = OrderedDict()
+        self._bytes = 0
+        self._version: str | None = None
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                metrics.incr(f"{self.name}.invalidate")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, key: str, version: str):
+        """Cached value for key, or None."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                metrics.incr(f"{self.name}.hit")
+                return entry[1]
+        metrics.incr(f"{self.name}.miss")
+        return None
+
+    def put(self, key: str, version: str, value) -> None:
+        """Store a JSON-serializable value; values larger than the byte bound are not cached."""
+        size = len(json.dumps(value, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                metrics.incr(f"{self.name}.evict")
+
+
+_cache: ResponseCache | None = None
+
+
+def get_cache() -> ResponseCache:
+    """Process-wide response cache shared by /for-you and /tsne-coordinates."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,159 @@
+"""Compact, memory-mapped paper title store indexed by node id.
+
+All titles are concatenated into one UTF-8 byte blob; offsets[i]:offsets[i + 1] is the title of
+node i (empty = no title). Both arrays are .npy files opened with mmap_mode="r", and titles are
+decoded straight from the mapped buffer.
+
+Build with `python -m backend.scripts.build_title_store` (converts backend/mag_id_to_title.json).
+If the store is missing, the JSON is converted in memory on first use. New papers are appended by
+`backend.scripts.refresh_embeddings` (`extend` + `save`); like the node index, the files are
+re-checked at most every EMBEDDING_DELTA_POLL_S seconds and reloaded when they change.
+"""
+import json
+import threading
+import time
+
+import numpy as np
+
+from ..core.config import EMBEDDING_DELTA_POLL_S, MAG_ID_TO_TITLE_PATH, TITLE_BLOB_PATH, TITLE_OFFSETS_PATH
+from . import node_index
+
+# uint8 blob of concatenated UTF-8 titles
+_blob: np.ndarray | None = None
+# int64 offsets into _blob, shape (num_nodes + 1,)
+_offsets: np.ndarray | None = None
+# File mtimes of the loaded store (None: converted from the JSON), last check, loads so far
+_fingerprint: tuple | None = None
+_last_poll = 0.0
+_generation = 0
+_lock = threading.Lock()
+
+
+def build_from_mapping(mag_id_to_title: dict[str, str], num_nodes: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Convert an OpenAlex URL -> title dict to (blob, offsets) in node order."""
+    node_to_mag = node_index.node_to_mag_array()
+    num_nodes = node_to_mag.shape[0] if num_nodes is None else num_nodes
+    urls = node_index.node_ids_to_mag_urls(np.arange(num_nodes))
+    encoded = [(mag_id_to_title.get(url) or "").encode("utf-8") if url else b"" for url in urls]
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def build_from_json(path=MAG_ID_TO_TITLE_PATH) -> tuple[np.ndarray, np.ndarray]:
+    """Load the legacy mag_id_to_title.json and convert it."""
+    if not path.exists():
+        raise FileNotFoundError(f"MAG title mapping not found: {path}")
+    with open(path, encoding="utf-8") as f:
+        return build_from_mapping(json.load(f))
+
+
+def extend(start: int, titles) -> tuple[np.ndarray, np.ndarray]:
+    """(blob, offsets) with nodes start, start + 1, ... titled `titles` (None = no title).
+
+    Nodes before `start` keep their titles; anything at or after `start` is replaced.
+    """
+    _load()
+    kept = min(start, _offsets.shape[0] - 1)
+    encoded = [(t or "").encode("utf-8") for t in titles]
+    offsets = np.empty(start + len(encoded) + 1, dtype=np.int64)
+    offsets[: kept + 1] = _offsets[: kept + 1]
+    offsets[kept + 1 : start + 1] = offsets[kept]  # nodes without a title up to `start`
+    offsets[start + 1 :] = offsets[start] + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    blob = np.concatenate([_blob[: offsets[kept]], np.frombuffer(b"".join(encoded), dtype=np.uint8)])
+    return blob, offsets
+
+
+def save(blob: np.ndarray, offsets: np.ndarray) -> None:
+    """Write the store; blob first, each file swapped in atomically (safe while workers map it)."""
+    TITLE_BLOB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    for path, array in ((TITLE_BLOB_PATH, np.ascontiguousarray(blob, dtype=np.uint8)),
+                        (TITLE_OFFSETS_PATH, np.ascontiguousarray(offsets, dtype=np.int64))):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        tmp.replace(path)
+
+
+def _files_fingerprint() -> tuple | None:
+    try:
+        return TITLE_BLOB_PATH.stat().st_mtime_ns, TITLE_OFFSETS_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load() -> None:
+    global _blob, _offsets, _fingerprint, _last_poll, _generation
+    if _offsets is not None and time.monotonic() - _last_poll < EMBEDDING_DELTA_POLL_S:
+        return
+    with _lock:
+        if _offsets is not None:
+            if time.monotonic() - _last_poll < EMBEDDING_DELTA_POLL_S:
+                return
+            _last_poll = time.monotonic()
+            fingerprint = _files_fingerprint()
+            if fingerprint is None or fingerprint == _fingerprint:
+                return
+            blob = np.load(TITLE_BLOB_PATH, mmap_mode="r")
+            offsets = np.load(TITLE_OFFSETS_PATH, mmap_mode="r")
+            if int(offsets[-1]) > blob.shape[0]:
+                return  # caught between save's renames; the next poll sees the rest
+            print(f"✅ Reloaded title store ({offsets.shape[0] - 1} nodes)")
+        else:
+            fingerprint = _files_fingerprint()
+            if fingerprint is not None:
+                blob = np.load(TITLE_BLOB_PATH, mmap_mode="r")
+                offsets = np.load(TITLE_OFFSETS_PATH, mmap_mode="r")
+            else:
+                print("⚠️ Title store not built, converting mag_id_to_title.json (run backend.scripts.build_title_store)")
+                blob, offsets = build_from_json()
+        # Blob first: nodes before `start` keep their bytes, so old offsets stay valid on the new blob
+        _blob = blob
+        _offsets = offsets
+        _fingerprint = fingerprint
+        _last_poll = time.monotonic()
+        _generation += 1
+
+
+def generation() -> int:
+    """Number of times the store has been (re)loaded; changes when new papers get titles."""
+    _load()
+    return _generation
+
+
+def num_nodes() -> int:
+    _load()
+    return int(_offsets.shape[0] - 1)
+
+
+def has_title_mask() -> np.ndarray:
+    """Boolean array, shape (num_nodes,): True where the node has a non-empty title."""
+    _load()
+    return np.diff(_offsets) > 0
+
+
+def _decode(start: int, end: int) -> str | None:
+    if end <= start:
+        return None
+    return str(memoryview(_blob[start:end]), "utf-8")
+
+
+def get_title(node_id: int) -> str | None:
+    """Title of one node, or None if missing / out of range."""
+    _load()
+    node_id = int(node_id)
+    if not 0 <= node_id < _offsets.shape[0] - 1:
+        return None
+    return _decode(int(_offsets[node_id]), int(_offsets[node_id + 1]))
+
+
+def get_titles(node_ids) -> list[str | None]:
+    """Bulk title fetch for a node-id array (None where missing / out of range)."""
+    _load()
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    valid = (node_ids >= 0) & (node_ids < _offsets.shape[0] - 1)
+    safe = np.where(valid, node_ids, 0)
+    starts = _offsets[safe].tolist()
+    ends = _offsets[safe + 1].tolist()
+    return [_decode(s, e) if v else None for s, e, v in zip(starts, ends, valid.tolist())]
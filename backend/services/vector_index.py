@@ -0,0 +1,158 @@
+"""Pluggable approximate nearest-neighbour index over the normalized paper embeddings (FAISS).
+
+Index kinds (all inner product, i.e. cosine on normalized rows):
+- flat:     exact brute force (IndexFlatIP), the recall baseline
+- ivf_flat: inverted file with full vectors; tune `nprobe`
+- hnsw:     graph index (IndexHNSWFlat); tune `efSearch`
+- ivf_pq:   inverted file with product-quantized vectors, smallest on disk; tune `nprobe`
+
+Built offline by `python -m backend.scripts.build_vector_index`, saved to VECTOR_INDEX_PATH and
+memory-mapped at startup where FAISS supports it. faiss is optional: without it (or without a
+built index) callers fall back to exact numpy scoring.
+"""
+import time
+
+import numpy as np
+
+from ..core.config import (
+    VECTOR_INDEX_EF_SEARCH,
+    VECTOR_INDEX_ENABLED,
+    VECTOR_INDEX_NPROBE,
+    VECTOR_INDEX_PATH,
+)
+
+INDEX_KINDS = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+# Vectors added per call while building
+ADD_CHUNK_ROWS = 65536
+
+# Loaded index (None until first use, False if unavailable)
+_index = None
+
+
+def _faiss():
+    try:
+        import faiss
+    except ImportError as e:
+        raise ImportError("faiss is required for the vector index (pip install faiss-cpu)") from e
+    return faiss
+
+
+def default_nlist(num_vectors: int) -> int:
+    """Rule-of-thumb IVF list count: ~4*sqrt(N), at least 1."""
+    return max(1, int(4 * np.sqrt(num_vectors)))
+
+
+def build_index(
+    embeddings: np.ndarray,
+    kind: str = "ivf_flat",
+    nlist: int | None = None,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    pq_m: int = 32,
+    pq_bits: int = 8,
+    train_size: int = 100000,
+    seed: int = 0,
+):
+    """Build a FAISS inner-product index of the given kind over `embeddings` (float32, normalized)."""
+    faiss = _faiss()
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind {kind!r}; expected one of {INDEX_KINDS}")
+    num, dim = embeddings.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+    nlist = nlist or default_nlist(num)
+    if kind == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction
+    elif kind == "ivf_flat":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, metric)
+    else:
+        index = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, pq_m, pq_bits, metric)
+
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(num, size=min(num, train_size), replace=False)
+        index.train(np.ascontiguousarray(embeddings[np.sort(sample)], dtype=np.float32))
+    for start in range(0, num, ADD_CHUNK_ROWS):
+        index.add(np.ascontiguousarray(embeddings[start:start + ADD_CHUNK_ROWS], dtype=np.float32))
+    return index
+
+
+def save_index(index, path=VECTOR_INDEX_PATH) -> None:
+    faiss = _faiss()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    faiss.write_index(index, str(tmp))
+    tmp.replace(path)
+
+
+def load_index(path=VECTOR_INDEX_PATH, mmap: bool = True):
+    """Read a saved index, memory-mapping it when the index type supports it."""
+    faiss = _faiss()
+    if mmap:
+        try:
+            return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
+    return faiss.read_index(str(path))
+
+
+def set_search_params(index, nprobe: int | None = None, ef_search: int | None = None) -> None:
+    """Set recall/latency knobs: nprobe for IVF indexes, efSearch for HNSW. Others are ignored."""
+    faiss = _faiss()
+    if nprobe is not None:
+        try:
+            faiss.extract_index_ivf(index).nprobe = int(nprobe)
+        except RuntimeError:
+            pass
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = int(ef_search)
+
+
+def search(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return (scores, ids) of shape (num_queries, k); ids are -1 where fewer than k were found."""
+    queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+    return index.search(queries, int(k))
+
+
+def exact_search(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-k ids (best first) by inner product; the baseline for recall."""
+    scores = np.atleast_2d(queries) @ np.asarray(embeddings).T
+    k = min(int(k), scores.shape[1])
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def recall_at_k(approx_ids: np.ndarray, exact_ids: np.ndarray) -> float:
+    """Mean fraction of the exact top-k ids found in the approximate top-k, over all queries."""
+    approx_ids, exact_ids = np.atleast_2d(approx_ids), np.atleast_2d(exact_ids)
+    hits = sum(len(np.intersect1d(a[a >= 0], e)) for a, e in zip(approx_ids, exact_ids))
+    return hits / exact_ids.size
+
+
+def evaluate(index, embeddings: np.ndarray, queries: np.ndarray, k: int = 35) -> dict:
+    """Recall@k against exact search plus mean per-query search latency (ms)."""
+    exact = exact_search(embeddings, queries, k)
+    t0 = time.perf_counter()
+    _, ids = search(index, queries, k)
+    elapsed = time.perf_counter() - t0
+    return {"recall": recall_at_k(ids, exact), "latency_ms": elapsed * 1000 / len(queries)}
+
+
+def get_index():
+    """Return the configured index, or None if it is not built or faiss is not installed."""
+    global _index
+    if _index is None:
+        _index = False
+        if VECTOR_INDEX_ENABLED and VECTOR_INDEX_PATH.exists():
+            try:
+                index = load_index(VECTOR_INDEX_PATH)
+            except ImportError as e:
+                print(f"⚠️ {e}; using exact scoring")
+            else:
+                set_search_params(index, nprobe=VECTOR_INDEX_NPROBE, ef_search=VECTOR_INDEX_EF_SEARCH)
+                print(f"✅ Loaded vector index with {index.ntotal} vectors from {VECTOR_INDEX_PATH}")
+                _index = index
+    return _index or None
@@ -23,6 +23,20 @@ export async function fetchPaperInfo(magId: string): Promise<PaperInfo> {
   return res.json();
 }
 
+export type PaperInfoStatus = 'ok' | 'not_found' | 'invalid' | 'error';
+export type PaperInfoBatchItem = PaperInfo & { status: PaperInfoStatus };
+export type PaperInfoBatchResponse = { papers: PaperInfoBatchItem[]; count: number };
+
+export async function fetchPaperInfoBatch(magIds: string[]): Promise<PaperInfoBatchResponse> {
+  const res = await fetch(`${API_BASE}/api/papers/paper-info:batch`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ mag_ids: magIds }),
+  });
+  if (!res.ok) throw new Error('Failed to fetch paper info');
+  return res.json();
+}
+
 export async function registerPaperClick(magId: string, accessToken?: string): Promise<void> {
   const headers: HeadersInit = { 'Content-Type': 'application/json' };
   if (accessToken) headers['Authorization'] = `Bearer ${accessToken}`;
@@ -35,7 +49,12 @@ export async function registerPaperClick(magId: string, accessToken?: string): P
 }
 
 export type TsneNode = { node_id: number; mag_id: string; title?: string; x: number; y: number };
-export type TsneResponse = { history: TsneNode[]; recommendations: TsneNode[] };
+export type TsneResponse = {
+  history: TsneNode[];
+  recommendations: TsneNode[];
+  /** User vector projected onto the precomputed map (null when the map is not built) */
+  user?: { x: number; y: number } | null;
+};
 
 export async function fetchTsneCoordinates(accessToken?: string): Promise<TsneResponse> {
   const res = await fetch(`${API_BASE}/api/papers/tsne-coordinates`, {
@@ -0,0 +1,94 @@
+"""Compare training runs logged with `train.py --log-file`: epoch time, throughput and loss curves.
+
+Usage (from ml_pipeline/):
+    python train.py --loss-seeds first --epochs 10 --log-file runs/first.jsonl --no-wandb
+    python train.py --loss-seeds all --epochs 10 --log-file runs/all.jsonl --no-wandb
+    python scripts/compare_runs.py runs/first.jsonl runs/all.jsonl --plot runs/compare.png
+
+The first run is the baseline: for every other run it reports how long (wall clock) it took to reach
+the baseline's best validation loss. --plot needs matplotlib (optional).
+"""
+import argparse
+import json
+from pathlib import Path
+
+
+def load_run(path):
+    epochs = [json.loads(line) for line in Path(path).read_text().splitlines() if line.strip()]
+    if not epochs:
+        raise SystemExit(f"No epochs logged in {path}")
+    elapsed = 0.0
+    for e in epochs:
+        elapsed += e["epoch_s"]
+        e["elapsed_s"] = elapsed
+    return epochs
+
+
+def time_to_reach(epochs, target):
+    """Wall-clock seconds until valid_loss <= target, or None."""
+    for e in epochs:
+        if e.get("valid_loss") is not None and e["valid_loss"] <= target:
+            return e["elapsed_s"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare train.py runs")
+    parser.add_argument("logs", nargs="+", type=Path, help="JSONL files from train.py --log-file (first = baseline)")
+    parser.add_argument("--plot", type=Path, default=None, help="Save loss curves (vs epoch and vs time) to this image")
+    args = parser.parse_args()
+
+    runs = {path.stem: load_run(path) for path in args.logs}
+    baseline_name, baseline = next(iter(runs.items()))
+    valid = [e["valid_loss"] for e in baseline if e.get("valid_loss") is not None]
+    target = min(valid) if valid else None
+
+    print(f"{'run':16s} {'epochs':>6s} {'epoch s':>9s} {'seeds/s':>9s} {'scored/s':>9s} {'final train':>12s} {'best valid':>11s} {'to baseline best':>17s}")
+    for name, epochs in runs.items():
+        epoch_s = sum(e["epoch_s"] for e in epochs) / len(epochs)
+        seeds_s = sum(e["train_seeds_per_s"] for e in epochs) / len(epochs)
+        scored_s = sum(e.get("train_scored_per_s", 0.0) for e in epochs) / len(epochs)
+        best = min((e["valid_loss"] for e in epochs if e.get("valid_loss") is not None), default=None)
+        reach = time_to_reach(epochs, target) if target is not None else None
+        print(
+            f"{name:16s} {len(epochs):6d} {epoch_s:9.1f} {seeds_s:9.0f} {scored_s:9.0f} {epochs[-1]['train_loss']:12.5f} "
+            + (f"{best:11.5f} " if best is not None else f"{'-':>11s} ")
+            + (f"{reach:16.0f}s" if reach is not None else f"{'not reached':>17s}")
+        )
+
+    print(f"\nValidation loss per epoch (baseline: {baseline_name})")
+    names = list(runs)
+    print("epoch " + " ".join(f"{n:>14s}" for n in names))
+    for i in range(max(len(e) for e in runs.values())):
+        cells = []
+        for n in names:
+            v = runs[n][i].get("valid_loss") if i < len(runs[n]) else None
+            cells.append(f"{v:14.5f}" if v is not None else f"{'':>14s}")
+        print(f"{i:5d} " + " ".join(cells))
+
+    if args.plot is not None:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            raise SystemExit("--plot needs matplotlib (pip install matplotlib)")
+        fig, (by_epoch, by_time) = plt.subplots(1, 2, figsize=(12, 4.5))
+        for name, epochs in runs.items():
+            points = [(e["epoch"], e["elapsed_s"], e["valid_loss"]) for e in epochs if e.get("valid_loss") is not None]
+            if not points:
+                continue
+            ep, t, loss = zip(*points)
+            by_epoch.plot(ep, loss, marker="o", label=name)
+            by_time.plot(t, loss, marker="o", label=name)
+        by_epoch.set(xlabel="epoch", ylabel="valid loss", title="Loss vs epoch")
+        by_time.set(xlabel="wall clock (s)", ylabel="valid loss", title="Loss vs time")
+        by_epoch.legend()
+        fig.tight_layout()
+        args.plot.parent.mkdir(parents=True, exist_ok=True)
+        fig.savefig(args.plot, dpi=120)
+        print(f"\nSaved {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ from tqdm.asyncio import tqdm_asyncio
 # Allow importing from ml_pipeline.src when running from scripts/
 _SCRIPT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(_SCRIPT_DIR.parent))
-from src.data_loader import load_ogbn_arxiv, DATA_DIR
+from src import graph_bundle
 
 def reconstruct_abstract(inverted_index):
     if not inverted_index:
@@ -65,10 +65,14 @@ async def fetch_batch(session, ids, pbar=None):
     return [] # Failed after retries
 
 async def process_data(input_file, output_file, batch_size, limit):
-    print(f"Reading ID mapping from {input_file}...")
+    print(f"Reading ID mapping from {input_file or 'the graph bundle'}...")
     
     try:
-        if input_file.endswith('.gz'):
+        if input_file is None:
+            # Node index -> MAG id, memory-mapped from the graph bundle
+            df = pd.DataFrame({'mag_id': graph_bundle.load().node_mag_id})
+            df = df[df['mag_id'] >= 0]
+        elif input_file.endswith('.gz'):
             df = pd.read_csv(input_file, compression='gzip')
         else:
             df = pd.read_csv(input_file)
@@ -121,9 +125,9 @@ async def process_data(input_file, output_file, batch_size, limit):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch paper metadata from OpenAlex based on MAG IDs.")
-    default_mapping = DATA_DIR / "ogbn-arxiv" / "mapping" / "nodeidx2paperid.csv.gz"
-    parser.add_argument("--input", type=str, default=str(default_mapping),
-                        help="Path to the input CSV/GZ file containing MAG IDs.")
+    parser.add_argument("--input", type=str, default=None,
+                        help="Path to an input CSV/GZ file containing MAG IDs "
+                             "(default: the node -> MAG id mapping of the graph bundle).")
     parser.add_argument("--output", type=str, default="arxiv_mag_metadata.json",
                         help="Path to save the output JSON.")
     parser.add_argument("--batch_size", type=int, default=50,
@@ -133,8 +137,4 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    print("Loading ogbn-arxiv (downloads to cache if not present)...")
-    load_ogbn_arxiv()
-    print("Proceeding with metadata fetch...")
-
     asyncio.run(process_data(args.input, args.output, args.batch_size, args.limit))
\ No newline at end of file
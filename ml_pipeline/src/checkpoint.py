@@ -0,0 +1,200 @@
+# Resumable training checkpoints written off the training loop.
+#
+# CheckpointManager.save snapshots the full training state (model, optimizer, scheduler, epoch /
+# step, RNG states, loader position, best validation loss) to CPU on the calling thread, which is
+# only a memory copy, then a background thread torch.saves it to a temp file and renames it into
+# place, so a crash mid-write never leaves a truncated checkpoint. It keeps the last `keep_last`
+# step-*.pt files (always at least the newest, so a run stays resumable) plus best.pt (a hard
+# link to the checkpoint with the lowest validation loss, or a copy where the filesystem has no
+# hard links) and can export weights-only state_dicts (the format the rest of the repo loads) the
+# same way.
+# Blocking (snapshot) and background (write) seconds are recorded per save in `timings`.
+#
+# EpochSampler makes the loader position resumable: the order of epoch e is a fixed permutation of
+# (seed, e), and a resumed epoch starts at its first unseen batch instead of replaying the epoch.
+
+import os
+import queue
+import random
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+CHECKPOINT_PATTERN = re.compile(r"step-(\d+)\.pt$")
+
+
+def rng_state():
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def _to_cpu(obj):
+    """Copy every tensor in a (nested) state to CPU so training can keep updating the originals."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+def _save_atomic(obj, path):
+    tmp = path.with_name(path.name + ".tmp")
+    torch.save(obj, tmp)
+    os.replace(tmp, path)
+
+
+class EpochSampler(torch.utils.data.Sampler):
+    """Shuffled positions 0..n-1, a fixed permutation per (seed, epoch), starting at a given batch."""
+
+    def __init__(self, n, batch_size, seed=0):
+        self.n, self.batch_size, self.seed = n, batch_size, seed
+        self.epoch, self.start_batch = 0, 0
+
+    def set_epoch(self, epoch, start_batch=0):
+        self.epoch, self.start_batch = epoch, start_batch
+
+    def num_batches(self):
+        return -(-self.n // self.batch_size)
+
+    def __iter__(self):
+        g = torch.Generator().manual_seed(self.seed * 100003 + self.epoch)
+        return iter(torch.randperm(self.n, generator=g)[self.start_batch * self.batch_size:].tolist())
+
+    def __len__(self):
+        return max(0, self.n - self.start_batch * self.batch_size)
+
+
+class CheckpointManager:
+    """Save / resume full training state under `directory`, writing on a background thread.
+
+    synchronous=True writes inline instead (to measure what the background thread saves).
+    """
+
+    def __init__(self, directory, keep_last=3, synchronous=False, log=print):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.synchronous = synchronous
+        self.log = log
+        self.best_metric = float("inf")
+        self.timings = []  # (step, snapshot_s, write_s) per save
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = None
+        if not synchronous:
+            self._thread = threading.Thread(target=self._worker, name="checkpoint-writer", daemon=True)
+            self._thread.start()
+
+    def checkpoints(self):
+        """(step, path) of the step-*.pt checkpoints on disk, oldest first."""
+        found = []
+        for path in self.directory.glob("step-*.pt"):
+            match = CHECKPOINT_PATTERN.search(path.name)
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+
+    def latest(self):
+        found = self.checkpoints()
+        return found[-1][1] if found else None
+
+    def save(self, state, step, metric=None, weights_path=None):
+        """Snapshot state (a dict of state_dicts / values) and write it as step-<step>.pt.
+
+        metric: validation loss; a new minimum also becomes best.pt.
+        weights_path: also write state["model"] there as a weights-only state_dict.
+        Returns the seconds the caller was blocked.
+        """
+        self._raise_pending()
+        t0 = time.perf_counter()
+        is_best = metric is not None and metric < self.best_metric
+        if is_best:
+            self.best_metric = metric
+        snapshot = _to_cpu({**state, "step": step, "metric": metric, "best_metric": self.best_metric})
+        job = (snapshot, step, is_best, weights_path, time.perf_counter() - t0)
+        if self.synchronous:
+            self._write(*job)
+        else:
+            self._queue.put(job)
+        return time.perf_counter() - t0
+
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        if self._thread is not None:
+            self._queue.join()
+        self._raise_pending()
+
+    def close(self):
+        self.wait()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def load(self, path=None):
+        """State saved by `save` (default: the latest checkpoint); restores best_metric."""
+        path = Path(path) if path is not None else self.latest()
+        if path is None:
+            raise FileNotFoundError(f"No checkpoints in {self.directory}")
+        # weights_only=False: the state holds numpy / python RNG states
+        state = torch.load(path, map_location="cpu", weights_only=False)
+        self.best_metric = state.get("best_metric", float("inf"))
+        self.log(f"Resuming from {path} (step {state['step']}, epoch {state['epoch']})")
+        return state
+
+    def _raise_pending(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Writing a checkpoint failed") from error
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._write(*job)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, snapshot, step, is_best, weights_path, snapshot_s):
+        t0 = time.perf_counter()
+        path = self.directory / f"step-{step:08d}.pt"
+        _save_atomic(snapshot, path)
+        if is_best:
+            tmp = self.directory / "best.pt.tmp"
+            tmp.unlink(missing_ok=True)
+            try:
+                os.link(path, tmp)
+            except OSError:  # no hard links on this filesystem
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, self.directory / "best.pt")
+        if weights_path is not None:
+            Path(weights_path).parent.mkdir(parents=True, exist_ok=True)
+            _save_atomic(snapshot["model"], Path(weights_path))
+        for _, old in self.checkpoints()[:-max(1, self.keep_last)]:
+            old.unlink()  # best.pt is a separate link, so the best survives pruning
+        self.timings.append((step, snapshot_s, time.perf_counter() - t0))
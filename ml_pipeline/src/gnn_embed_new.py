@@ -9,11 +9,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import torch
 from torch_geometric.data import Data
-from torch_geometric.utils import k_hop_subgraph, subgraph
 import numpy as np
 from contextlib import contextmanager
 from src.model import EmbedderGNNv3
-from src.data_loader import load_ogbn_arxiv, unsafe_load_ogbn_arxiv
+from src import graph_bundle
+from src.sampler import load_csr, sample_query_subgraphs, sample_subgraphs
 from src.hf_embed import get_semantic_embed
 
 INPUT_DIM = 384   # 128 (Original) + 256 (Qwen)
@@ -31,30 +31,28 @@ model = EmbedderGNNv3(INPUT_DIM, HIDDEN_DIM, OUTPUT_DIM, num_layers=4)
 model.load_state_dict(torch.load("ml_pipeline/models/gnn_contrastive_v2.pth", map_location=device))
 model.eval()
 
+# Out-edge CSR per graph (keyed by the edge tensor), built once and cached on disk by the sampler
+_csr_cache = {}
+
+def _csr_key(data):
+    return (data.edge_index.data_ptr(), tuple(data.edge_index.shape))
+
+def _csr(data):
+    key = _csr_key(data)
+    if key not in _csr_cache:
+        _csr_cache[key] = load_csr(data.edge_index.numpy(), data.num_nodes)
+    return _csr_cache[key]
+
+
 def get_cluster(data, center=None, num_neighbors=[10, 10, 5]):
     """Extract k-hop neighborhood with sampling. num_neighbors: list of ints per hop."""
     if center is None:
         center = np.random.randint(0, data.num_nodes)
-    
-    # Sample neighbors per hop (similar to NeighborLoader)
-    all_nodes = {center}
-    current_layer = {center}
-    
-    for n_sample in num_neighbors:
-        next_layer = set()
-        for node in current_layer:  # Only sample from current layer, not all nodes
-            neighbors = data.edge_index[1, data.edge_index[0] == node].numpy()
-            if len(neighbors) > n_sample:
-                neighbors = np.random.choice(neighbors, n_sample, replace=False)
-            next_layer.update(neighbors)
-        all_nodes.update(next_layer)
-        current_layer = next_layer  # Move to next layer
-    
-    subset = torch.tensor(sorted(all_nodes), dtype=torch.long)
-    sub_edge_index, _ = subgraph(subset, data.edge_index, relabel_nodes=True, num_nodes=data.num_nodes)
-    mapping = (subset == center).nonzero(as_tuple=True)[0].item()
-    return Data(x=data.x[subset], edge_index=sub_edge_index, num_nodes=len(subset)), mapping, subset
-    # Relabeled subgraph, index of the center node, tensor of original node IDs
+    rowptr, col = _csr(data)
+    node_ids, _, edge_index = sample_subgraphs(rowptr, col, [center], num_neighbors, np.random.default_rng())
+    subset = torch.from_numpy(node_ids)
+    return Data(x=data.x[subset], edge_index=torch.from_numpy(edge_index), num_nodes=len(subset)), 0, subset
+    # Relabeled subgraph, index of the center node (always 0), tensor of original node IDs
 
 
 def build_query_graph(base_graph, cited_node_ids, num_neighbors=[10, 10, 5]):
@@ -72,59 +70,23 @@ def build_query_graph(base_graph, cited_node_ids, num_neighbors=[10, 10, 5]):
     Returns:
         subgraph_data (with center at index 0), original_node_ids
     """
-    # Assign a new node ID to the new paper
     num_original_nodes = base_graph.num_nodes
-    new_node_id = num_original_nodes  # New node ID
-    
-    # Extend node features (use zeros placeholder, the model masks it anyway)
-    placeholder_embedding = torch.zeros(1, base_graph.x.shape[1])
-    extended_x = torch.cat([base_graph.x, placeholder_embedding], dim=0)
-    
-    # Create edges: new_node -> all of cited_node_ids
     assert all(i < num_original_nodes for i in cited_node_ids),\
            "Cited node IDs out of range"
-    
-    new_edges = torch.tensor([
-        [new_node_id] * len(cited_node_ids),
-        cited_node_ids
-    ], dtype=torch.long)
-    
-    # Extend edge_index and create extended graph
-    extended_edge_index = torch.cat([base_graph.edge_index, new_edges], dim=1)
-    extended_graph = Data(
-        x=extended_x,
-        edge_index=extended_edge_index,
-        num_nodes=num_original_nodes + 1
-    )
-    
-    # Use get_cluster to sample neighborhood
-    subgraph, center_idx, orig_ids = get_cluster(
-        extended_graph,
-        center=new_node_id,
-        num_neighbors=num_neighbors
-    )
-    
-    # Reorder to put center at index 0
-    other_indices = [i for i in range(subgraph.num_nodes) if i != center_idx]
-    reorder = torch.tensor([center_idx] + other_indices)
-    
-    # Reorder features and original IDs
-    reordered_x = subgraph.x[reorder]
-    reordered_orig_ids = orig_ids[reorder]
-    
-    # Remap edge indices
-    old_to_new = torch.zeros(subgraph.num_nodes, dtype=torch.long)
-    old_to_new[reorder] = torch.arange(subgraph.num_nodes)
-    reordered_edge_index = old_to_new[subgraph.edge_index]
-    
-    # Create final subgraph
-    final_subgraph = Data(
-        x=reordered_x,
-        edge_index=reordered_edge_index,
-        num_nodes=subgraph.num_nodes
+
+    # The sampler lays the new paper out at index 0 with edges new_node -> sampled cited papers,
+    # so there is no extended graph to build and no reorder/remap pass
+    rowptr, col = _csr(base_graph)
+    node_ids, _, edge_index = sample_query_subgraphs(
+        rowptr, col, [cited_node_ids], num_neighbors, np.random.default_rng()
     )
-    
-    return final_subgraph, reordered_orig_ids
+    # Placeholder features for the new paper (the model masks it anyway)
+    x = base_graph.x[torch.from_numpy(np.maximum(node_ids, 0))]
+    x[0] = 0
+    node_ids[0] = num_original_nodes  # New node ID
+
+    subgraph = Data(x=x, edge_index=torch.from_numpy(edge_index), num_nodes=len(node_ids))
+    return subgraph, torch.from_numpy(node_ids)
 
 
 def endpoint(graph, citation_ids): 
@@ -136,17 +98,29 @@ def endpoint(graph, citation_ids):
     # Return the embedding of the new paper (always at index 0)
     return embeddings[0]
 
+def endpoint_batch(graph, citation_lists, num_neighbors=[10, 10, 5]):
+    # Embed many new papers in one forward pass: the sampler returns the query subgraphs as one
+    # disjoint union (centers at ptr[:-1]), and each graph's center is masked via mask_index
+    rowptr, col = _csr(graph)
+    node_ids, ptr, edge_index = sample_query_subgraphs(
+        rowptr, col, citation_lists, num_neighbors, np.random.default_rng()
+    )
+    centers = torch.from_numpy(ptr[:-1])
+    x = graph.x[torch.from_numpy(np.maximum(node_ids, 0))]
+    x[centers] = 0
+    with torch.no_grad():
+        embeddings = model(x, torch.from_numpy(edge_index), mask_index=centers)
+    return embeddings[centers]
+
 if __name__ == "__main__":
-    # Load data
-    dataset = unsafe_load_ogbn_arxiv()
-    graph_dict, labels = dataset[0]
+    # Load data: the graph bundle already has the 384-d features (OGB + semantic) and the out-edge CSR
+    bundle = graph_bundle.load()
     data = Data(
-        x=torch.tensor(graph_dict['node_feat'], dtype=torch.float),
-        edge_index=torch.tensor(graph_dict['edge_index'], dtype=torch.long),
-        num_nodes=graph_dict['num_nodes']
+        x=torch.from_numpy(np.array(bundle.node_feat)),
+        edge_index=torch.from_numpy(np.array(bundle.edge_index)),
+        num_nodes=bundle.num_nodes
     )
-    # Add to feature dimension to simulate the reembedded graph
-    data.x = torch.cat([data.x, torch.zeros(data.num_nodes, 256)], dim=1)
-    
+    _csr_cache[_csr_key(data)] = (bundle.csr_rowptr, bundle.csr_col)
+
     # Get cluster and run inference
     print(endpoint(data, [6767, 6, 7, 67]))
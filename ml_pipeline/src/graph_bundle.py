@@ -0,0 +1,237 @@
+# Versioned graph bundle: ogbn-arxiv preprocessed once into memory-mapped .npy files.
+#
+# Loading ogbn-arxiv through OGB unpickles the processed dataset (under the torch.load monkeypatch
+# in data_loader.unsafe_load_ogbn_arxiv), and every consumer then rebuilds tensors, CSR indexes and
+# the 384-d features itself. The bundle stores all of it once:
+#
+#   node_feat                              float32 (N, 384): 128 OGB + 256 semantic (Qwen) columns
+#   edge_index                             int64 (2, E), citing -> cited
+#   csr_rowptr, csr_col                    out-edges (sampler.build_csr)
+#   csc_colptr, csc_row                    in-edges (sampler.build_csc)
+#   labels, node_year                      int64 (N,), -1 for papers added after the OGB snapshot
+#   split_train, split_valid, split_test   int64 node ids
+#   node_mag_id                            int64 (N,) node index -> MAG paper id, -1 if unknown
+#
+# in <root>/<version>/ with a manifest.json (shapes, dtypes, sources). The version is a hash of the
+# contents and <root>/CURRENT names the version `load` opens, so a new bundle (e.g. after
+# backend.scripts.refresh_embeddings adds papers) is swapped in atomically and readers of the old
+# one keep their mappings. `load` reads the manifest and the .npy headers only (mmap_mode="r").
+# numpy only, so the backend can import it without torch; building from OGB needs torch + ogb.
+#
+# Usage (from repo root):
+#   python ml_pipeline/src/graph_bundle.py --semantic-features path/to/qwen_256d.npy
+#   python ml_pipeline/src/graph_bundle.py --info
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BUNDLE_ROOT = Path(__file__).resolve().parent.parent / "data" / "graph_bundle"
+OGB_DIM = 128
+SEMANTIC_DIM = 256
+ARRAYS = (
+    "node_feat", "edge_index", "csr_rowptr", "csr_col", "csc_colptr", "csc_row",
+    "labels", "node_year", "split_train", "split_valid", "split_test", "node_mag_id",
+)
+SPLITS = ("train", "valid", "test")
+HASH_BLOCK = 1 << 24  # bytes hashed per step
+
+
+class GraphBundle:
+    """A loaded bundle: each of ARRAYS as a read-only memmap attribute, plus the manifest."""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.arrays = arrays
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["arrays"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    @property
+    def num_nodes(self):
+        return self.manifest["num_nodes"]
+
+    @property
+    def num_edges(self):
+        return self.manifest["num_edges"]
+
+    def split(self):
+        """{"train": ids, "valid": ids, "test": ids}, like OGB's get_idx_split()."""
+        return {name: self.arrays[f"split_{name}"] for name in SPLITS}
+
+
+def current_version(root=BUNDLE_ROOT):
+    """Version named by <root>/CURRENT, or None if no bundle was written there."""
+    try:
+        return (Path(root) / "CURRENT").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load(root=BUNDLE_ROOT, version=None):
+    """Open a bundle (default: the current one) with every array memory-mapped."""
+    root = Path(root)
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No graph bundle in {root} (run ml_pipeline/src/graph_bundle.py)")
+    path = root / version
+    manifest = json.loads((path / "manifest.json").read_text())
+    arrays = {name: np.load(path / entry["file"], mmap_mode="r") for name, entry in manifest["arrays"].items()}
+    return GraphBundle(path, manifest, arrays)
+
+
+def _digest(arrays):
+    h = hashlib.sha256()
+    for name in sorted(arrays):
+        array = arrays[name]
+        h.update(f"{name}:{array.dtype.str}:{array.shape};".encode())
+        flat = array.reshape(-1) if array.flags.c_contiguous else np.ascontiguousarray(array).reshape(-1)
+        step = max(1, HASH_BLOCK // array.itemsize)
+        for start in range(0, len(flat), step):
+            h.update(np.ascontiguousarray(flat[start:start + step]).tobytes())
+    return h.hexdigest()
+
+
+def write(arrays, meta=None, root=BUNDLE_ROOT, make_current=True):
+    """Write a new bundle version and (by default) point CURRENT at it; returns the loaded bundle.
+
+    arrays: every name in ARRAYS -> ndarray, or the Path of an .npy already written on the same
+    filesystem (moved into the bundle instead of copied, e.g. a features file built chunk by chunk).
+    meta: extra manifest fields (sources, notes).
+    """
+    root = Path(root)
+    missing = set(ARRAYS) - set(arrays)
+    if missing:
+        raise ValueError(f"Graph bundle is missing arrays: {sorted(missing)}")
+    opened = {
+        name: np.load(value, mmap_mode="r") if isinstance(value, Path) else np.asarray(value)
+        for name, value in arrays.items()
+    }
+    num_nodes, num_edges = len(opened["csr_rowptr"]) - 1, len(opened["csr_col"])
+    for name in ("node_feat", "labels", "node_year", "node_mag_id"):
+        if len(opened[name]) != num_nodes:
+            raise ValueError(f"{name} has {len(opened[name])} rows, expected {num_nodes}")
+    if opened["edge_index"].shape != (2, num_edges) or len(opened["csc_row"]) != num_edges:
+        raise ValueError(f"edge_index / csc_row do not match the {num_edges} CSR edges")
+
+    version = _digest(opened)[:16]
+    dest = root / version
+    if not (dest / "manifest.json").exists():
+        stage = root / f".{version}.tmp"
+        shutil.rmtree(stage, ignore_errors=True)
+        stage.mkdir(parents=True)
+        entries = {}
+        for name, value in arrays.items():
+            file = f"{name}.npy"
+            if isinstance(value, Path):
+                os.replace(value, stage / file)
+            else:
+                with open(stage / file, "wb") as f:
+                    np.save(f, opened[name])
+            entries[name] = {"file": file, "dtype": opened[name].dtype.str, "shape": list(opened[name].shape)}
+        manifest = {
+            "version": version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "num_nodes": num_nodes,
+            "num_edges": num_edges,
+            "arrays": entries,
+            **(meta or {}),
+        }
+        (stage / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        shutil.rmtree(dest, ignore_errors=True)  # a partial copy without a manifest
+        stage.rename(dest)
+    if make_current:
+        tmp = root / "CURRENT.tmp"
+        tmp.write_text(version + "\n")
+        tmp.replace(root / "CURRENT")
+    return load(root, version)
+
+
+def from_ogb(dataset, semantic_features=None):
+    """ARRAYS of an ogb NodePropPredDataset (ogbn-arxiv); semantic_features (N, 256) or zeros.
+
+    Imports src.sampler, so ml_pipeline/ must be on sys.path (as in the pipeline scripts).
+    """
+    from src.sampler import build_csc, build_csr
+
+    graph_dict, labels = dataset[0]
+    num_nodes = int(graph_dict["num_nodes"])
+    edge_index = np.ascontiguousarray(graph_dict["edge_index"], dtype=np.int64)
+    ogb = np.asarray(graph_dict["node_feat"], dtype=np.float32)
+    if semantic_features is None:
+        print(f"⚠️ No semantic features given, using zeros for the {SEMANTIC_DIM} semantic columns")
+        semantic_features = np.zeros((num_nodes, SEMANTIC_DIM), dtype=np.float32)
+    if semantic_features.shape != (num_nodes, SEMANTIC_DIM):
+        raise ValueError(f"Semantic features must be ({num_nodes}, {SEMANTIC_DIM}), got {semantic_features.shape}")
+    node_feat = np.concatenate([ogb, np.asarray(semantic_features, dtype=np.float32)], axis=1)
+
+    # nodeidx2paperid.csv.gz: "node idx,paper id", one row per node in index order
+    mapping = np.loadtxt(Path(dataset.root) / "mapping" / "nodeidx2paperid.csv.gz",
+                         delimiter=",", skiprows=1, dtype=np.int64).reshape(-1, 2)
+    node_mag_id = np.full(num_nodes, -1, dtype=np.int64)
+    node_mag_id[mapping[:, 0]] = mapping[:, 1]
+
+    rowptr, col = build_csr(edge_index, num_nodes)
+    colptr, row = build_csc(edge_index, num_nodes)
+    split_idx = dataset.get_idx_split()
+    return {
+        "node_feat": node_feat,
+        "edge_index": edge_index,
+        "csr_rowptr": rowptr,
+        "csr_col": col,
+        "csc_colptr": colptr,
+        "csc_row": row,
+        "labels": np.asarray(labels, dtype=np.int64).reshape(-1),
+        "node_year": np.asarray(graph_dict["node_year"], dtype=np.int64).reshape(-1),
+        **{f"split_{name}": np.asarray(split_idx[name], dtype=np.int64) for name in SPLITS},
+        "node_mag_id": node_mag_id,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped ogbn-arxiv graph bundle")
+    parser.add_argument("--semantic-features", type=Path, default=None, help=".npy of shape (num_nodes, 256)")
+    parser.add_argument("--root", type=Path, default=BUNDLE_ROOT)
+    parser.add_argument("--info", action="store_true", help="Print the current bundle's manifest and load time")
+    args = parser.parse_args()
+
+    if args.info:
+        t0 = time.perf_counter()
+        bundle = load(args.root)
+        print(f"Loaded {bundle.path} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        print(json.dumps(bundle.manifest, indent=2))
+        return
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from src.data_loader import unsafe_load_ogbn_arxiv
+
+    t0 = time.perf_counter()
+    dataset = unsafe_load_ogbn_arxiv()
+    semantic = np.load(args.semantic_features, mmap_mode="r") if args.semantic_features is not None else None
+    arrays = from_ogb(dataset, semantic)
+    meta = {
+        "source": "ogbn-arxiv",
+        "semantic_features": args.semantic_features.name if args.semantic_features is not None else "zeros",
+    }
+    bundle = write(arrays, meta, args.root)
+    print(f"✅ Wrote graph bundle {bundle.version} to {bundle.path} ({bundle.num_nodes} nodes, "
+          f"{bundle.num_edges} edges) in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# Layer-wise full-graph inference: regenerates the embedding of every paper in one pass per layer.
+#
+# Sampled per-node forwards (NeighborLoader-style subgraphs) recompute overlapping neighbourhoods
+# for every target. Here layer l is computed for ALL nodes (in chunks of target nodes) before layer
+# l + 1 starts, so each node's hidden state is computed exactly once per layer. Activations between
+# layers are streamed to memory-mapped .npy files, so peak RAM is one chunk's messages plus the
+# model, not (num_nodes x hidden_dim x num_layers).
+#
+# Embeddings are unmasked and unsampled: every node uses its own features and all its in-neighbours
+# (the exact eval-mode forward of the model over the full graph).
+#
+# Output: <out>.npy (num_nodes, out_dim) float32 and <out stem>.manifest.json with a version id
+# (hash of checkpoint + graph + features) that the backend reads alongside the embeddings.
+#
+# Usage (from repo root):
+#   python ml_pipeline/src/layerwise_inference.py   # graph + features from the graph bundle
+#   cp ml_pipeline/data/paper_embeddings_256d.npy ml_pipeline/data/paper_embeddings_256d.manifest.json backend/
+
+import sys
+from pathlib import Path
+# Add parent directory to path so we can import from src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import hashlib
+import json
+import resource
+import shutil
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from src import graph_bundle
+from src.data_loader import DATA_DIR
+from src.model import EmbedderGNNv3, EmbedderGNNv4
+from src.sampler import gather_neighbors
+
+MODELS = {"v3": EmbedderGNNv3, "v4": EmbedderGNNv4}
+# Bytes hashed per read when fingerprinting input files
+HASH_BLOCK = 1 << 24
+
+
+def mean_aggregate(x, colptr, row, start, end):
+    """Mean of the in-neighbours' rows of x for target nodes [start, end) (zeros where there are none)."""
+    lo, hi = int(colptr[start]), int(colptr[end])
+    deg = np.diff(colptr[start:end + 1])
+    # Read each distinct source row once, in file order (x may be a memmap)
+    sources, inverse = np.unique(row[lo:hi], return_inverse=True)
+    messages = torch.from_numpy(np.asarray(x[sources], dtype=np.float32))[torch.from_numpy(inverse)]
+    targets = torch.from_numpy(np.repeat(np.arange(end - start), deg))
+    out = torch.zeros(end - start, x.shape[1]).index_add_(0, targets, messages)
+    return out / torch.from_numpy(deg).clamp(min=1).unsqueeze(1).to(out.dtype)
+
+
+def sage_conv(conv, aggregated, x_self):
+    """SAGEConv forward given the mean-aggregated neighbour rows (same math as conv(x, edge_index))."""
+    assert not getattr(conv, "project", False), "SAGEConv(project=True) is not supported"
+    out = conv.lin_l(aggregated)
+    if conv.root_weight:
+        out = out + conv.lin_r(x_self)
+    if conv.normalize:
+        out = F.normalize(out, p=2.0, dim=-1)
+    return out
+
+
+def _stages(model):
+    """The model as (pre, layers, post): pointwise input fn, per-layer fns (agg, x_self) -> h, pointwise output fn."""
+    if isinstance(model, EmbedderGNNv4):
+        def pre(x):
+            return F.gelu(model.input_norm(model.input_projection(x)))
+
+        def layer(i):
+            def run(agg, x_self):
+                return x_self + F.gelu(model.norms[i](sage_conv(model.convs[i], agg, x_self)))
+            return run
+
+        return pre, [layer(i) for i in range(model.num_layers)], model.output_projection
+
+    if isinstance(model, EmbedderGNNv3):
+        def layer(i):
+            def run(agg, x_self):
+                h = model.bns[i](sage_conv(model.convs[i], agg, x_self))
+                if i != model.num_layers - 1:
+                    h = F.relu(h)
+                return h + x_self if h.shape == x_self.shape else h
+            return run
+
+        return None, [layer(i) for i in range(model.num_layers)], None
+
+    raise TypeError(f"Layer-wise inference supports EmbedderGNNv3 / EmbedderGNNv4, not {type(model).__name__}")
+
+
+def _open(path, num_nodes, dim):
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(num_nodes, dim))
+
+
+@torch.inference_mode()
+def layerwise_inference(model, features, colptr, row, out_path, work_dir, chunk_size=16384, log=print):
+    """Write the model's full-graph embeddings to out_path (.npy); returns per-layer seconds."""
+    model.eval()
+    num_nodes = features.shape[0]
+    pre, layers, post = _stages(model)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    timings = []
+
+    x = features
+    if pre is not None:
+        t0 = time.perf_counter()
+        dim = pre(torch.from_numpy(np.asarray(features[:1], dtype=np.float32))).shape[1]
+        h_out = _open(work_dir / "input.npy", num_nodes, dim)
+        for start in range(0, num_nodes, chunk_size):
+            chunk = torch.from_numpy(np.asarray(features[start:start + chunk_size], dtype=np.float32))
+            h_out[start:start + len(chunk)] = pre(chunk).numpy()
+        h_out.flush()
+        x = h_out
+        timings.append(("input", time.perf_counter() - t0))
+
+    for i, layer in enumerate(layers):
+        t0 = time.perf_counter()
+        last = i == len(layers) - 1
+        h_out = None
+        for start in range(0, num_nodes, chunk_size):
+            end = min(start + chunk_size, num_nodes)
+            agg = mean_aggregate(x, colptr, row, start, end)
+            h = layer(agg, torch.from_numpy(np.asarray(x[start:end], dtype=np.float32)))
+            if last and post is not None:
+                h = post(h)
+            if h_out is None:
+                # Final layer goes straight to the output file; others ping-pong between two work files
+                path = out_path.with_name(out_path.name + ".tmp") if last else work_dir / f"layer{i % 2}.npy"
+                h_out = _open(path, num_nodes, h.shape[1])
+            h_out[start:end] = h.numpy()
+        h_out.flush()
+        x = h_out
+        timings.append((f"layer {i}", time.perf_counter() - t0))
+        log(f"Layer {i + 1}/{len(layers)}: {timings[-1][1]:.1f}s")
+
+    del x, h_out
+    out_path.with_name(out_path.name + ".tmp").replace(out_path)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return timings
+
+
+@torch.inference_mode()
+def subset_inference(model, features, colptr, row, targets, chunk_size=16384, log=print):
+    """Exact full-graph embeddings of only `targets`: returns (sorted target ids, (len, out_dim) float32).
+
+    Layer l is computed for the targets' (num_layers - l)-hop in-neighbourhood only, so the result
+    equals the matching rows of layerwise_inference without touching the rest of the graph.
+    """
+    model.eval()
+    pre, layers, post = _stages(model)
+    # needed[l]: nodes whose layer-l output is required (needed[0] = input rows)
+    needed = [np.unique(np.asarray(targets, dtype=np.int64))]
+    for _ in layers:
+        needed.insert(0, np.union1d(needed[0], gather_neighbors(colptr, row, needed[0])))
+    log(f"Receptive field per layer: {[len(n) for n in needed]}")
+
+    x = torch.from_numpy(np.asarray(features[needed[0]], dtype=np.float32))
+    if pre is not None:
+        x = pre(x)
+    for l, layer in enumerate(layers, start=1):
+        prev_ids, ids = needed[l - 1], needed[l]
+        out = []
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            lens = colptr[chunk + 1] - colptr[chunk]
+            sources = torch.from_numpy(np.searchsorted(prev_ids, gather_neighbors(colptr, row, chunk)))
+            dst = torch.from_numpy(np.repeat(np.arange(len(chunk)), lens))
+            agg = torch.zeros(len(chunk), x.shape[1]).index_add_(0, dst, x[sources])
+            agg = agg / torch.from_numpy(lens).clamp(min=1).unsqueeze(1).to(agg.dtype)
+            out.append(layer(agg, x[torch.from_numpy(np.searchsorted(prev_ids, chunk))]))
+        x = torch.cat(out)
+    if post is not None:
+        x = post(x)
+    return needed[-1], x.numpy()
+
+
+def _digest(*arrays_or_paths):
+    h = hashlib.sha256()
+    for item in arrays_or_paths:
+        if isinstance(item, Path):
+            with open(item, "rb") as f:
+                while block := f.read(HASH_BLOCK):
+                    h.update(block)
+        else:
+            rows = max(1, HASH_BLOCK // max(1, item[:1].nbytes))
+            for start in range(0, len(item), rows):
+                h.update(np.ascontiguousarray(item[start:start + rows]).tobytes())
+    return h.hexdigest()
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layer-wise full-graph GNN inference for all papers")
+    parser.add_argument("--model", choices=sorted(MODELS), default="v3")
+    parser.add_argument("--checkpoint", type=Path, default=Path(__file__).parent.parent / "models" / "gnn_contrastive_v2.pth")
+    parser.add_argument("--bundle", type=Path, default=graph_bundle.BUNDLE_ROOT, help="Graph bundle directory")
+    parser.add_argument("--features", type=Path, default=None,
+                        help="(num_nodes, in_dim) float32 .npy overriding the bundle's node features")
+    parser.add_argument("--in-dim", type=int, default=384)
+    parser.add_argument("--hidden-dim", type=int, default=256)
+    parser.add_argument("--out-dim", type=int, default=256)
+    parser.add_argument("--num-layers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=16384, help="Target nodes per chunk")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--out", type=Path, default=DATA_DIR / "paper_embeddings_256d.npy")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Intermediate activations (default: next to --out)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    t_start = time.perf_counter()
+
+    bundle = graph_bundle.load(args.bundle)
+    num_nodes = bundle.num_nodes
+    colptr, row = bundle.csc_colptr, bundle.csc_row
+    features = np.load(args.features, mmap_mode="r") if args.features is not None else bundle.node_feat
+    assert features.shape == (num_nodes, args.in_dim), f"Expected features ({num_nodes}, {args.in_dim}), got {features.shape}"
+
+    model = MODELS[args.model](args.in_dim, args.hidden_dim, args.out_dim, num_layers=args.num_layers)
+    model.load_state_dict(torch.load(args.checkpoint, map_location="cpu"))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    work_dir = args.work_dir or args.out.parent / f".{args.out.stem}.layers"
+    print(f"Nodes: {num_nodes}, edges: {len(row)}, model: {args.model}, chunk: {args.chunk_size}")
+    timings = layerwise_inference(model, features, colptr, row, args.out, work_dir, args.chunk_size)
+    wall_s = time.perf_counter() - t_start
+
+    version = _digest(args.checkpoint, colptr, row, features)[:16]
+    manifest = {
+        "version": version,
+        "file": args.out.name,
+        "shape": [num_nodes, args.out_dim],
+        "dtype": "float32",
+        "model": args.model,
+        "checkpoint": args.checkpoint.name,
+        "num_layers": args.num_layers,
+        "features": args.features.name if args.features is not None else "graph bundle",
+        "graph_bundle": bundle.version,
+        "num_edges": int(len(row)),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "wall_s": round(wall_s, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "layer_s": {name: round(s, 2) for name, s in timings},
+    }
+    manifest_path = args.out.with_name(args.out.stem + ".manifest.json")
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    print(f"Wrote {args.out} ({num_nodes} x {args.out_dim}), version {version}")
+    print(f"Wall clock: {wall_s:.1f}s, peak RSS: {manifest['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -104,9 +104,11 @@ class EmbedderGNNv3(nn.Module):
     # Input format (probably): 
     # x: (n, F)
     # edge_index: (2, E)
-    def forward(self, x, edge_index):
+    # mask_index: indices of the nodes to mask (one center per graph when several query
+    #             subgraphs are batched as a disjoint union); defaults to node 0
+    def forward(self, x, edge_index, mask_index=None):
         x = x.clone().detach()
-        x[0] = self.mask_embed
+        x[0 if mask_index is None else mask_index] = self.mask_embed
 
         for i in range(self.num_layers):
             h = self.convs[i](x, edge_index)
@@ -145,9 +147,11 @@ class EmbedderGNNv4(nn.Module):
 
         self.output_projection = nn.Linear(hidden_dim, out_dim)
 
-    def forward(self, x, edge_index):
-        mask_vector = self.mask_token
-        x_masked = torch.cat([mask_vector.unsqueeze(0), x[1:].detach()], dim=0)
+    # mask_index: indices of the nodes whose features are replaced by the mask token
+    #             (e.g. every seed node of a NeighborLoader batch); defaults to node 0
+    def forward(self, x, edge_index, mask_index=None):
+        x_masked = x.detach().clone()
+        x_masked[0 if mask_index is None else mask_index] = self.mask_token
 
         x = self.input_projection(x_masked) 
         x = self.input_norm(x)
@@ -207,11 +211,11 @@ class EmbedderGNNv5(nn.Module):
 
         self.output_projection = nn.Linear(hidden_dim * num_layers, out_dim)
 
-    def forward(self, x, edge_index):
-        mask_vector = self.mask_token
-        x_masked = torch.cat([mask_vector.unsqueeze(0), x[1:].detach()], dim=0)
+    def forward(self, x, edge_index, mask_index=None):
+        x_masked = x.detach().clone()
+        x_masked[0 if mask_index is None else mask_index] = self.mask_token
 
-        x = self.input_proj(x_masked)
+        x = self.input_projection(x_masked)
         x = self.input_norm(x)
         x = F.gelu(x)
 
@@ -223,5 +227,5 @@ class EmbedderGNNv5(nn.Module):
 
         x = self.jk(layer_outputs)
 
-        x = self.out_proj(x)
+        x = self.output_projection(x)
         return x
\ No newline at end of file
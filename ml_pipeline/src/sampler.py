@@ -0,0 +1,165 @@
+# CSR neighbour sampler: fixed fan-out neighbourhoods for a batch of centers, vectorized with numpy.
+#
+# The graph is indexed once as CSR over out-edges (rowptr, col: out-neighbours of u are
+# col[rowptr[u]:rowptr[u + 1]]) and cached to disk as .npy, so each hop reads only the frontier's
+# adjacency slices instead of scanning all edges per node. Sampling runs for every frontier node of
+# every subgraph at once: random keys + one lexsort pick up to `fanout` neighbours per node without
+# replacement, and (subgraph, node) pairs are deduplicated as int64 keys.
+#
+# Subgraphs come back as a disjoint union (node_ids, ptr, edge_index): subgraph i owns positions
+# ptr[i]:ptr[i + 1] with its center at ptr[i], and edge_index (2, E) holds every edge between its
+# sampled nodes in those positions. `split` gives per-subgraph (node_ids, edge_index) with the center
+# at index 0. numpy only, so the backend can import it without torch.
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+CSR_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "csr"
+
+
+def build_csr(edge_index, num_nodes):
+    """CSR (rowptr, col) of a (2, E) source -> target edge array, rows = sources."""
+    src = np.asarray(edge_index[0], dtype=np.int64)
+    dst = np.asarray(edge_index[1], dtype=np.int64)
+    order = np.argsort(src, kind="stable")
+    rowptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=rowptr[1:])
+    return rowptr, dst[order]
+
+
+def build_csc(edge_index, num_nodes):
+    """CSC (colptr, row) of a (2, E) source -> target edge array: in-neighbours of i = row[colptr[i]:colptr[i + 1]]."""
+    return build_csr(np.asarray(edge_index)[::-1], num_nodes)
+
+
+def load_csr(edge_index, num_nodes, cache_dir=CSR_CACHE_DIR):
+    """build_csr, cached as .npy under cache_dir (keyed by a hash of the edges) and memory-mapped."""
+    edge_index = np.ascontiguousarray(edge_index, dtype=np.int64)
+    key = hashlib.sha256(edge_index.tobytes() + str(num_nodes).encode()).hexdigest()[:16]
+    rowptr_path = Path(cache_dir) / f"csr_{key}_rowptr.npy"
+    col_path = Path(cache_dir) / f"csr_{key}_col.npy"
+    if not (rowptr_path.exists() and col_path.exists()):
+        rowptr, col = build_csr(edge_index, num_nodes)
+        rowptr_path.parent.mkdir(parents=True, exist_ok=True)
+        for path, array in ((col_path, col), (rowptr_path, rowptr)):
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            tmp.replace(path)
+    return np.load(rowptr_path, mmap_mode="r"), np.load(col_path, mmap_mode="r")
+
+
+def gather_neighbors(ptr, idx, nodes):
+    """Concatenated adjacency slices idx[ptr[u]:ptr[u + 1]] of the given nodes (CSR or CSC)."""
+    nodes = np.asarray(nodes, dtype=np.int64)
+    starts, lens = ptr[nodes], ptr[nodes + 1] - ptr[nodes]
+    offsets = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(int(lens.sum()))
+    return np.asarray(idx[offsets], dtype=np.int64)
+
+
+def _choose_per_segment(seg, fanout, rng):
+    """Mask keeping up to `fanout` random entries of each run of equal values in sorted `seg`."""
+    order = np.lexsort((rng.random(len(seg)), seg))
+    rank = np.arange(len(seg)) - np.searchsorted(seg, seg)
+    keep = np.zeros(len(seg), dtype=bool)
+    keep[order[rank < fanout]] = True
+    return keep
+
+
+def sample_fanout(rowptr, col, nodes, fanout, rng):
+    """Up to `fanout` distinct out-neighbours of each node: returns (position in nodes, neighbour id)."""
+    nodes = np.asarray(nodes, dtype=np.int64)
+    lens = rowptr[nodes + 1] - rowptr[nodes]
+    seg = np.repeat(np.arange(len(nodes)), lens)
+    neighbors = gather_neighbors(rowptr, col, nodes)
+    keep = _choose_per_segment(seg, fanout, rng)
+    return seg[keep], neighbors[keep]
+
+
+def _expand(rowptr, col, graph, frontier, num_neighbors, rng):
+    """Hop-by-hop sampling from (graph, node) pairs; returns the sorted unique keys graph * N + node seen."""
+    n = len(rowptr) - 1
+    seen = np.unique(graph * n + frontier)
+    frontier_keys = seen
+    for fanout in num_neighbors:
+        if len(frontier_keys) == 0:
+            break
+        pos, neighbors = sample_fanout(rowptr, col, frontier_keys % n, fanout, rng)
+        keys = np.unique(frontier_keys[pos] // n * n + neighbors)
+        frontier_keys = keys[~np.isin(keys, seen, assume_unique=True)]
+        seen = np.union1d(seen, frontier_keys)
+    return seen
+
+
+def _assemble(rowptr, col, keys, centers, center_targets=None):
+    """Lay out the sampled keys as a disjoint union with each center first; add induced edges.
+
+    centers: base node id of each subgraph's center, or -1 for a new node that is not in the graph
+    (its edges are center_targets: (subgraph, node) pairs it points to).
+    """
+    n = len(rowptr) - 1
+    num_graphs = len(centers)
+    keys = keys[~np.isin(keys, np.arange(num_graphs)[centers >= 0] * n + centers[centers >= 0])]
+    graph = keys // n
+    ptr = np.zeros(num_graphs + 1, dtype=np.int64)
+    np.cumsum(np.bincount(graph, minlength=num_graphs) + 1, out=ptr[1:])
+    is_center = np.zeros(ptr[-1], dtype=bool)
+    is_center[ptr[:-1]] = True
+    node_ids = np.empty(ptr[-1], dtype=np.int64)
+    node_ids[ptr[:-1]] = centers
+    node_ids[~is_center] = keys % n  # keys are sorted by subgraph, matching the position order
+    graph_of = np.repeat(np.arange(num_graphs), np.diff(ptr))
+
+    # Induced edges: out-edges of every base node whose target is in the same subgraph
+    base_pos = np.flatnonzero(node_ids >= 0)
+    base_keys = graph_of[base_pos] * n + node_ids[base_pos]
+    order = np.argsort(base_keys)
+    sorted_keys, sorted_pos = base_keys[order], base_pos[order]
+    lens = rowptr[node_ids[base_pos] + 1] - rowptr[node_ids[base_pos]]
+    src = np.repeat(base_pos, lens)
+    dst_keys = graph_of[src] * n + gather_neighbors(rowptr, col, node_ids[base_pos])
+    found = np.minimum(np.searchsorted(sorted_keys, dst_keys), len(sorted_keys) - 1)
+    keep = sorted_keys[found] == dst_keys
+    src, dst = [src[keep]], [sorted_pos[found[keep]]]
+    if center_targets is not None:
+        target_graph, targets = center_targets
+        src.append(ptr[:-1][target_graph])
+        dst.append(sorted_pos[np.searchsorted(sorted_keys, target_graph * n + targets)])
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    # Group edges by subgraph (sources sit in their subgraph's positions); center edges come first
+    order = np.argsort(src, kind="stable")
+    return node_ids, ptr, np.stack([src[order], dst[order]])
+
+
+def sample_subgraphs(rowptr, col, seeds, num_neighbors, rng):
+    """Sampled out-neighbourhoods of existing nodes, one subgraph per seed (center = the seed)."""
+    seeds = np.asarray(seeds, dtype=np.int64)
+    keys = _expand(rowptr, col, np.arange(len(seeds)), seeds, num_neighbors, rng)
+    return _assemble(rowptr, col, keys, seeds)
+
+
+def sample_query_subgraphs(rowptr, col, citation_lists, num_neighbors, rng):
+    """Subgraphs for new papers given their citations: hop 1 samples up to num_neighbors[0] cited
+    papers, later hops sample out-neighbours. Centers are -1 with edges center -> sampled cited."""
+    cited = [np.unique(np.asarray(c, dtype=np.int64)) for c in citation_lists]
+    if any(len(c) == 0 for c in cited):
+        raise ValueError("At least one cited node id is required")
+    graph = np.repeat(np.arange(len(cited)), [len(c) for c in cited])
+    cited = np.concatenate(cited)
+    if num_neighbors:
+        keep = _choose_per_segment(graph, num_neighbors[0], rng)
+        graph, cited = graph[keep], cited[keep]
+    keys = _expand(rowptr, col, graph, cited, num_neighbors[1:], rng)
+    return _assemble(rowptr, col, keys, np.full(len(citation_lists), -1, dtype=np.int64), (graph, cited))
+
+
+def split(node_ids, ptr, edge_index):
+    """Per-subgraph (node_ids, edge_index) with local indices; the center is at index 0."""
+    graph = np.searchsorted(ptr, edge_index[0], side="right") - 1
+    bounds = np.searchsorted(graph, np.arange(len(ptr)))
+    return [
+        (node_ids[ptr[i]:ptr[i + 1]], edge_index[:, bounds[i]:bounds[i + 1]] - ptr[i])
+        for i in range(len(ptr) - 1)
+    ]
@@ -1,106 +1,287 @@
+# Training runner for the masked-feature GNN embedders.
+#
+# Loader parallelism (workers, persistent workers, prefetching, pinned memory), bf16 autocast,
+# torch.compile and which seed nodes the loss scores are all flags, and every epoch logs
+# throughput (seeds/sec) and wall-clock so configs can be compared. Run from ml_pipeline/:
+#
+#   python train.py --num-workers 4 --persistent-workers --pin-memory --bf16 --loss-seeds all
+#   python train.py --loss-seeds first --num-workers 0   # the original loop (mask and loss on node 0 only)
+#   python scripts/compare_runs.py runs/first.jsonl runs/all.jsonl
+#
+# The graph comes from the memory-mapped bundle (python src/graph_bundle.py, once), not from OGB.
+#
+# Full training state is checkpointed every epoch (and every --checkpoint-every steps) on a
+# background thread (src/checkpoint.py); an interrupted run continues where it stopped:
+#
+#   python train.py --epochs 100 --checkpoint-dir checkpoints/run1
+#   python train.py --epochs 100 --checkpoint-dir checkpoints/run1 --resume
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
 import torch
-import torch_geometric
 from torch_geometric.loader import NeighborLoader
 from torch_geometric.data import Data
-from src.model import EmbedderGNNv2
+from src.model import EmbedderGNNv3, EmbedderGNNv4, EmbedderGNNv5
 from tqdm import tqdm
-from src.data_loader import load_ogbn_arxiv
-
-from contextlib import contextmanager
-
-WITH_WANDB = True
-BATCH_SIZE = 1024
-NUM_NEIGHBORS = [16, 8]
-LEARNING_RATE = 0.01
-NUM_EPOCHS = 100
-HIDDEN_DIM = 128
-
-if WITH_WANDB: 
-    import wandb
-    wandb.init(
-        project="embedder-gnn-at-cxc",
-        config={
-            "learning_rate": LEARNING_RATE,
-            "notes": "test run with no masking"
-        }
+from src import graph_bundle
+from src.checkpoint import CheckpointManager, EpochSampler, rng_state, set_rng_state
+
+MODELS = {"v3": EmbedderGNNv3, "v4": EmbedderGNNv4, "v5": EmbedderGNNv5}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the masked-feature GNN embedder on ogbn-arxiv")
+    parser.add_argument("--model", choices=sorted(MODELS), default="v3")
+    parser.add_argument("--hidden-dim", type=int, default=128)
+    parser.add_argument("--num-layers", type=int, default=3)
+    parser.add_argument("--dropout", type=float, default=0.2)
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1024, help="Seed nodes per batch")
+    parser.add_argument("--num-neighbors", type=int, nargs="+", default=[16, 8])
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--lr-schedule", choices=["constant", "cosine"], default="constant")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the RNGs and the per-epoch shuffle order")
+    parser.add_argument("--loss-seeds", choices=["all", "first"], default="all",
+                        help="Mask and score every seed node of a batch, or only index 0 (original loop)")
+    parser.add_argument("--val-every", type=int, default=1, help="Validate every N epochs (0 = never)")
+    # Data loading
+    parser.add_argument("--bundle", type=Path, default=graph_bundle.BUNDLE_ROOT, help="Graph bundle directory")
+    parser.add_argument("--features", choices=["ogb", "full"], default="ogb",
+                        help="Node features: the 128 OGB columns, or all 384 (OGB + semantic)")
+    parser.add_argument("--num-workers", type=int, default=0, help="Loader worker processes")
+    parser.add_argument("--persistent-workers", action="store_true", help="Keep workers alive between epochs")
+    parser.add_argument("--prefetch-factor", type=int, default=2, help="Batches prefetched per worker")
+    parser.add_argument("--pin-memory", action="store_true", help="Page-locked batches for faster host->device copies")
+    # Compute
+    parser.add_argument("--device", default="auto", help="auto | cpu | cuda | mps")
+    parser.add_argument("--bf16", action="store_true", help="bfloat16 autocast (CPU or CUDA)")
+    parser.add_argument("--compile", action="store_true", help="torch.compile the model")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--out", default="models/model_v1.pth", help="Weights-only state_dict, written every epoch")
+    # Checkpointing
+    parser.add_argument("--checkpoint-dir", type=Path, default=Path("checkpoints"))
+    parser.add_argument("--keep-last", type=int, default=3, help="Checkpoints kept besides best.pt (the newest is always kept)")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="Also checkpoint every N steps (0 = per epoch only)")
+    parser.add_argument("--checkpoint-sync", action="store_true", help="Write checkpoints inline (to measure the overhead)")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None,
+                        help="Resume from a checkpoint (default: the latest in --checkpoint-dir)")
+    parser.add_argument("--log-file", type=Path, default=None,
+                        help="Append one JSON line of metrics per epoch (compare with scripts/compare_runs.py)")
+    parser.add_argument("--no-wandb", action="store_true")
+    args = parser.parse_args()
+    if args.keep_last < 0:
+        parser.error("--keep-last must be >= 0")
+    return args
+
+
+def pick_device(name):
+    if name != "auto":
+        return torch.device(name)
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    if torch.backends.mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
+
+
+def make_loader(data, input_nodes, args, shuffle, sampler=None):
+    workers = args.num_workers
+    return NeighborLoader(
+        data,
+        num_neighbors=args.num_neighbors,
+        batch_size=args.batch_size,
+        input_nodes=input_nodes,
+        shuffle=shuffle and sampler is None,
+        sampler=sampler,
+        num_workers=workers,
+        persistent_workers=args.persistent_workers and workers > 0,
+        prefetch_factor=args.prefetch_factor if workers > 0 else None,
+        pin_memory=args.pin_memory,
     )
 
 
-@contextmanager
-def allow_unsafe_torch_load():
-    # Temporarily allow torch.load with weights_only=False
-    # Maybe move to data_loader.py?
-    original_load = torch.load
-    
-    def patched_load(*args, **kwargs):
-        kwargs.setdefault('weights_only', False)
-        return original_load(*args, **kwargs)
-    
-    torch.load = patched_load
-    try:
-        yield
-    finally:
-        torch.load = original_load
-
-with allow_unsafe_torch_load():
-    dataset = load_ogbn_arxiv()
-
-graph_dict, labels = dataset[0]
-print(graph_dict["edge_index"].shape) # (2, 1166243) (2, E)
-print(graph_dict["node_year"].shape) # (169343, 1) (N, 1)
-print(graph_dict["num_nodes"]) # Scal.
-print(graph_dict["node_feat"].shape) # (169343, 128) (N, F)
-
-EMBED_SIZE = graph_dict["node_feat"].shape[-1]
-
-data = Data(
-    x=torch.tensor(graph_dict['node_feat'], dtype=torch.float),
-    edge_index=torch.tensor(graph_dict['edge_index'], dtype=torch.long),
-    y=torch.tensor(labels.squeeze(), dtype=torch.long),
-    num_nodes=graph_dict['num_nodes']
-)
-
-split_idx = dataset.get_idx_split()
-train_loader = NeighborLoader(data, num_neighbors=NUM_NEIGHBORS, batch_size=BATCH_SIZE, input_nodes=split_idx["train"], shuffle=True)
-valid_loader = NeighborLoader(data, num_neighbors=NUM_NEIGHBORS, batch_size=BATCH_SIZE, input_nodes=split_idx["valid"], shuffle=False)
-
-loss_fn = torch.nn.MSELoss()
-
-model = EmbedderGNNv2(EMBED_SIZE, HIDDEN_DIM, EMBED_SIZE, dropout=0.2)
-mask_embedding = torch.nn.Parameter(torch.randn(EMBED_SIZE), requires_grad=True)
-
-optimizer = torch.optim.Adam(model.parameters(), lr=LEARNING_RATE)
-
-for epoch in tqdm(range(NUM_EPOCHS), desc="Training"):
-    total_train_loss = 0
-    total_valid_loss = 0
-
-    model.train()
-    for batch in tqdm(train_loader, desc=f"Epoch {epoch}"):
-        x, edge_index = batch.x, batch.edge_index
-        target_embedding = x[0]
-        optimizer.zero_grad()
-        out = model(x, edge_index)
-        pred_embedding = out[0]
-        loss = loss_fn(pred_embedding, target_embedding)
-        total_train_loss += loss.item()
-        loss.backward()
-        optimizer.step()
-    
-    model.eval()
-    for batch in tqdm(valid_loader, desc=f"Validating Epoch {epoch}"):
-        x, edge_index = batch.x, batch.edge_index
-        target_embedding = x[0]
-        out = model(x, edge_index)
-        pred_embedding = out[0]
-        loss = loss_fn(pred_embedding, target_embedding)
-        total_valid_loss += loss.item()
-    if WITH_WANDB:
-        wandb.log({"train_loss": total_train_loss / len(train_loader),
-                   "valid_loss": total_valid_loss / len(valid_loader),
-                   "mask_embedding": model.mask_embed.norm().item(),
-                   "mask_embedding_grad": model.mask_embed.grad.norm().item()})
-    torch.save(model.state_dict(), f"models/model_v1.pth")
-
-if WITH_WANDB:
-    wandb.finish()
\ No newline at end of file
+def batch_loss(model, batch, loss_fn, loss_seeds):
+    x, edge_index = batch.x, batch.edge_index
+    # Seed nodes are the first batch_size rows of a NeighborLoader batch; each scored seed has its
+    # own features masked and is reconstructed from its sampled neighbourhood
+    n = batch.batch_size if loss_seeds == "all" else 1
+    out = model(x, edge_index, mask_index=torch.arange(n, device=x.device))
+    return loss_fn(out[:n].float(), x[:n]), n
+
+
+def run_epoch(model, loader, loss_fn, args, device, optimizer=None, desc="", loss_seeds=None, on_step=None):
+    """One pass over the loader (training if an optimizer is given; on_step(batches done) after each step).
+
+    Returns (mean loss, seed nodes sampled, seed nodes scored by the loss, seconds).
+    """
+    model.train(optimizer is not None)
+    total_loss, seeds, scored, batches = 0.0, 0, 0, 0
+    t0 = time.perf_counter()
+    with torch.set_grad_enabled(optimizer is not None):
+        for batch in tqdm(loader, desc=desc, leave=False):
+            batch = batch.to(device, non_blocking=args.pin_memory)
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=args.bf16):
+                loss, n = batch_loss(model, batch, loss_fn, loss_seeds or args.loss_seeds)
+            if optimizer is not None:
+                optimizer.zero_grad(set_to_none=True)
+                loss.backward()
+                optimizer.step()
+            total_loss += loss.item()
+            seeds += batch.batch_size
+            scored += n
+            batches += 1
+            if on_step is not None:
+                on_step(batches)
+    return total_loss / max(1, batches), seeds, scored, time.perf_counter() - t0
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    device = pick_device(args.device)
+
+    t0 = time.perf_counter()
+    bundle = graph_bundle.load(args.bundle)
+    embed_size = graph_bundle.OGB_DIM if args.features == "ogb" else bundle.node_feat.shape[1]
+    # np.array copies out of the read-only mappings (torch tensors over them would not be writable)
+    data = Data(
+        x=torch.from_numpy(np.array(bundle.node_feat[:, :embed_size])),
+        edge_index=torch.from_numpy(np.array(bundle.edge_index)),
+        y=torch.from_numpy(np.array(bundle.labels)),
+        num_nodes=bundle.num_nodes,
+    )
+    print(f"Graph bundle {bundle.version}: {bundle.num_nodes} nodes, {bundle.num_edges} edges, "
+          f"{embed_size} features ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+    split_idx = {name: torch.from_numpy(np.array(ids)) for name, ids in bundle.split().items()}
+    # Shuffle order is a function of (seed, epoch), so a resumed epoch can skip the batches it already did
+    train_sampler = EpochSampler(len(split_idx["train"]), args.batch_size, args.seed)
+    train_loader = make_loader(data, split_idx["train"], args, shuffle=True, sampler=train_sampler)
+    valid_loader = make_loader(data, split_idx["valid"], args, shuffle=False)
+
+    model = MODELS[args.model](embed_size, args.hidden_dim, embed_size, num_layers=args.num_layers, dropout=args.dropout)
+    model.to(device)
+    # mask_embed (v3) / mask_token (v4, v5), logged to watch the learned mask
+    mask_param = model.mask_embed if hasattr(model, "mask_embed") else model.mask_token
+    optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
+    scheduler = None
+    if args.lr_schedule == "cosine":
+        scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=args.epochs)
+    # Batches have a different node count every step, so compile for dynamic shapes
+    step_model = torch.compile(model, dynamic=True) if args.compile else model
+    loss_fn = torch.nn.MSELoss()
+
+    config = {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}
+    config["device"] = str(device)
+    config["graph_bundle"] = bundle.version
+    print(f"Config: {config}")
+
+    checkpoints = CheckpointManager(args.checkpoint_dir, args.keep_last, synchronous=args.checkpoint_sync)
+    start_epoch, start_batch, global_step = 0, 0, 0
+    if args.resume is not None:
+        state = checkpoints.load(None if args.resume == "latest" else args.resume)
+        for key in ("model", "batch_size", "seed", "hidden_dim", "num_layers", "features"):
+            if state["config"][key] != config[key]:
+                raise SystemExit(f"--{key.replace('_', '-')} {config[key]} does not match the checkpoint "
+                                 f"({state['config'][key]})")
+        model.load_state_dict(state["model"])
+        optimizer.load_state_dict(state["optimizer"])
+        if scheduler is not None and state["scheduler"] is not None:
+            scheduler.load_state_dict(state["scheduler"])
+        set_rng_state(state["rng"])
+        start_epoch, start_batch, global_step = state["epoch"], state["epoch_step"], state["step"]
+        config["resumed_from_step"] = global_step
+
+    def training_state(epoch, epoch_step):
+        # epoch / epoch_step: where a resumed run continues (batches of that epoch already trained)
+        return {
+            "model": model.state_dict(),
+            "optimizer": optimizer.state_dict(),
+            "scheduler": scheduler.state_dict() if scheduler is not None else None,
+            "epoch": epoch,
+            "epoch_step": epoch_step,
+            "rng": rng_state(),
+            "config": config,
+        }
+
+    wandb = None
+    if not args.no_wandb:
+        import wandb
+        wandb.init(project="embedder-gnn-at-cxc", config=config)
+
+    for epoch in range(start_epoch, args.epochs):
+        epoch_start = time.perf_counter()
+        first_batch = start_batch if epoch == start_epoch else 0
+        train_sampler.set_epoch(epoch, first_batch)
+        checkpoint_block_s = 0.0
+
+        def on_step(batches):
+            nonlocal global_step, checkpoint_block_s
+            global_step += 1
+            done = first_batch + batches
+            # The last step of the epoch is covered by the end-of-epoch checkpoint
+            if args.checkpoint_every and global_step % args.checkpoint_every == 0 and done < train_sampler.num_batches():
+                checkpoint_block_s += checkpoints.save(training_state(epoch, done), global_step)
+
+        train_loss, train_seeds, train_scored, train_s = run_epoch(
+            step_model, train_loader, loss_fn, args, device, optimizer, desc=f"Epoch {epoch}", on_step=on_step
+        )
+        log = {
+            "epoch": epoch,
+            "train_loss": train_loss,
+            "train_seeds_per_s": train_seeds / train_s,
+            # Seeds that contribute to the loss (batch_size per forward with --loss-seeds all, else 1)
+            "train_scored_per_s": train_scored / train_s,
+            "train_s": train_s,
+            "mask_embedding": mask_param.norm().item(),
+            "mask_embedding_grad": mask_param.grad.norm().item() if mask_param.grad is not None else 0.0,
+        }
+        if args.val_every and (epoch + 1) % args.val_every == 0:
+            # Always over every masked seed, so runs with either --loss-seeds are comparable
+            valid_loss, valid_seeds, _, valid_s = run_epoch(
+                step_model, valid_loader, loss_fn, args, device, desc=f"Validating Epoch {epoch}", loss_seeds="all"
+            )
+            log.update(valid_loss=valid_loss, valid_seeds_per_s=valid_seeds / valid_s, valid_s=valid_s)
+        if scheduler is not None:
+            log["lr"] = optimizer.param_groups[0]["lr"]
+            scheduler.step()
+        # Blocks only for the CPU snapshot; the write (and the --out weights) happen on the writer thread
+        checkpoint_block_s += checkpoints.save(
+            training_state(epoch + 1, 0), global_step, metric=log.get("valid_loss"), weights_path=args.out
+        )
+        log["checkpoint_block_s"] = checkpoint_block_s
+        if checkpoints.timings:
+            log["checkpoint_write_s"] = checkpoints.timings[-1][2]  # most recent completed write
+        log["epoch_s"] = time.perf_counter() - epoch_start
+        print(
+            f"Epoch {epoch}: train_loss={train_loss:.5f} "
+            + (f"valid_loss={log['valid_loss']:.5f} " if "valid_loss" in log else "")
+            + f"{log['train_seeds_per_s']:.0f} seeds/s ({log['train_scored_per_s']:.0f} scored), "
+            + f"epoch {log['epoch_s']:.1f}s (checkpoint {checkpoint_block_s * 1000:.0f} ms blocking)"
+        )
+        if wandb is not None:
+            wandb.log(log)
+        if args.log_file is not None:
+            args.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(args.log_file, "a") as f:
+                f.write(json.dumps({"config": config, **log} if epoch == start_epoch else log) + "\n")
+
+    checkpoints.close()
+    if checkpoints.timings:
+        _, snapshot_s, write_s = zip(*checkpoints.timings)
+        mode = "inline" if args.checkpoint_sync else "background"
+        print(f"Checkpoints: {len(write_s)} saved, snapshot {1000 * sum(snapshot_s) / len(snapshot_s):.0f} ms "
+              f"(blocking), write {1000 * sum(write_s) / len(write_s):.0f} ms ({mode}), best valid {checkpoints.best_metric:.5f}")
+    if wandb is not None:
+        wandb.finish()
+
+
+if __name__ == "__main__":
+    main()